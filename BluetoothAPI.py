@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response
 import sys
 import time
 import threading
@@ -8,7 +8,20 @@ import platform
 import os
 import subprocess
 import re
-from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal, QEventLoop, QThread
+import collections
+import heapq
+import queue
+import atexit
+import uuid
+import shlex
+import random
+import concurrent.futures
+import hashlib
+import struct
+import mmap
+import bisect
+from datetime import datetime
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal, QThread, Qt
 from PySide6.QtBluetooth import (QBluetoothDeviceDiscoveryAgent,
                               QBluetoothSocket, QBluetoothServiceInfo, QBluetoothAddress, QBluetoothLocalDevice)
 
@@ -17,115 +30,646 @@ if platform.system() == "Windows":
     import ctypes
     from ctypes import wintypes
 
-# Globalne zmienne do przechowywania stanu
-discovered_devices = []
-paired_devices = []
-logs = []
-bt_client = None
-qt_app = None
-connected_device_address = None
+# Maksymalna liczba przechowywanych logów
+LOG_CAPACITY = 500
 
-# Inicjalizacja aplikacji Flask
-app = Flask(__name__)
+# Poziomy logów i ich wagi
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+DEFAULT_LOG_CATEGORY = "app"
+
+# Minimalne poziomy logów dla kategorii ("*" - domyślny dla pozostałych)
+log_thresholds = {"*": LOG_LEVELS.get(os.environ.get("BT_LOG_LEVEL", "DEBUG").upper(), 10)}
+
+
+def set_log_level(level, category="*"):
+    """Ustawia w czasie działania minimalny poziom logów dla kategorii"""
+    level = level.upper()
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Nieznany poziom logów: {level}")
+    log_thresholds[category] = LOG_LEVELS[level]
 
-def add_log(message, level="INFO"):
-    """Dodaje wiadomość do logów z poziomem ważności"""
-    log_entry = f"[{level}] {message}"
-    logs.append(log_entry)
-    print(log_entry)  # Wyświetl również w konsoli
+
+def is_log_enabled(level, category=DEFAULT_LOG_CATEGORY):
+    """Sprawdza, czy wpis o danym poziomie i kategorii zostanie zapisany"""
+    threshold = log_thresholds.get(category, log_thresholds["*"])
+    return LOG_LEVELS.get(level, LOG_LEVELS["INFO"]) >= threshold
+
+
+class HexDump:
+    """Leniwy zapis bajtów w postaci HEX - konwersja następuje dopiero przy formatowaniu"""
+    __slots__ = ('data',)
+    
+    def __init__(self, data):
+        self.data = data
     
-    # Zachowaj tylko ostatnie 500 logów
-    if len(logs) > 500:
-        logs.pop(0)
+    def __str__(self):
+        return self.data.hex().upper()
 
-def get_current_os():
-    """Zwraca aktualny system operacyjny"""
-    return platform.system()
 
-def reset_bluetooth():
+# Tablice do budowania podglądu ASCII bez pętli po znakach
+PRINTABLE_TABLE = bytes(b if 32 <= b <= 126 else ord('.') for b in range(256))
+NON_PRINTABLE_BYTES = bytes(b for b in range(256) if not 32 <= b <= 126)
+
+
+class PrintableView:
+    """Leniwy podgląd ASCII bajtów - znaki niedrukowalne zastępowane są kropką"""
+    __slots__ = ('data',)
+    
+    def __init__(self, data):
+        self.data = data
+    
+    def __str__(self):
+        return self.data.translate(PRINTABLE_TABLE).decode('ascii')
+
+
+def has_printable(data):
+    """Sprawdza, czy dane zawierają choć jeden znak drukowalny"""
+    return len(data.translate(None, NON_PRINTABLE_BYTES)) > 0
+
+
+class LogRecord:
     """
-    Funkcja resetująca adapter Bluetooth niezależnie od klasy klienta.
-    Ta funkcja może być wywoływana bezpośrednio po rozłączeniu.
+    Ustrukturyzowany wpis logu. Treść jest formatowana dopiero przy pierwszym
+    odczycie (np. przez konsolę lub API), a wynik jest zapamiętywany.
     """
-    try:
-        add_log("Uruchamianie procedury resetowania Bluetooth...", "INFO")
+    __slots__ = ('seq', 'timestamp', 'level', 'category', 'address',
+                 '_source', '_message', '_text', '_search_text')
+    
+    def __init__(self, level, message, args=(), category=DEFAULT_LOG_CATEGORY, address=None, exc_info=None):
+        self.seq = 0
+        self.timestamp = time.time()
+        self.level = level
+        self.category = category
+        self.address = address
+        # Dane źródłowe są trzymane w jednej krotce, aby formatowanie z kilku wątków było bezpieczne
+        self._source = (message, args, exc_info)
+        self._message = None
+        self._text = None
+        self._search_text = None
+    
+    def _format(self):
+        """Formatuje treść wpisu i zwalnia referencje do danych źródłowych"""
+        source = self._source
+        if source is None:
+            return
         
-        # Poczekaj chwilę, aby upewnić się, że rozłączenie się zakończyło
-        time.sleep(1)
-        QCoreApplication.processEvents()
+        message, args, exc_info = source
+        # Błędne wywołanie add_log nie może psuć każdego kolejnego odczytu wpisu
+        if callable(message):
+            try:
+                message = message()
+            except Exception as e:
+                message = f"{message!r} {args!r} ({type(e).__name__}: {e})"
+        elif args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message!r} {args!r}"
+        if exc_info:
+            message = f"{message} {''.join(traceback.format_exception(*exc_info))}"
         
-        # Spróbuj resetować Bluetooth przez Qt API
-        local_device = QBluetoothLocalDevice()
-        if local_device.isValid():
-            current_mode = local_device.hostMode()
-            add_log(f"Aktualny tryb Bluetooth: {current_mode}", "DEBUG")
+        self._message = message
+        self._text = f"[{self.level}] {message}"
+        self._source = None
+    
+    @property
+    def message(self):
+        """Sformatowana treść wpisu"""
+        self._format()
+        return self._message
+    
+    @property
+    def text(self):
+        """Treść wpisu w formacie wyświetlanym w konsoli"""
+        self._format()
+        return self._text
+    
+    @property
+    def search_text(self):
+        """Treść małymi literami do wyszukiwania podciągów"""
+        if self._search_text is None:
+            self._search_text = self.text.lower()
+        return self._search_text
+    
+    def to_dict(self):
+        """Zwraca wpis jako słownik do serializacji JSON"""
+        return {
+            'seq': self.seq,
+            'timestamp': self.timestamp,
+            'level': self.level,
+            'category': self.category,
+            'address': self.address,
+            'message': self.message,
+            'text': self.text
+        }
+
+
+class LogStore:
+    """
+    Bufor cykliczny logów o stałej pojemności.
+    Każdy wpis dostaje rosnący numer sekwencyjny (seq), dzięki czemu klient
+    może pobierać tylko wpisy nowsze niż ostatnio widziany numer.
+    Indeksy poziomów są aktualizowane przy dodawaniu wpisu, więc zapytania
+    filtrowane po poziomie nie muszą przeglądać całego bufora.
+    """
+    
+    def __init__(self, capacity=LOG_CAPACITY):
+        self.capacity = capacity
+        self._entries = [None] * capacity
+        self._level_index = {}  # poziom -> deque numerów seq (rosnąco)
+        self._next_seq = 1   # Numer, który otrzyma następny wpis
+        self._first_seq = 1  # Najstarszy numer nadal obecny w buforze
+        self._lock = threading.Lock()
+    
+    @property
+    def last_seq(self):
+        """Numer ostatniego dodanego wpisu (0 jeśli nic nie dodano)"""
+        return self._next_seq - 1
+    
+    @property
+    def first_seq(self):
+        """Numer najstarszego wpisu dostępnego w buforze"""
+        return self._first_seq
+    
+    def __len__(self):
+        return self._next_seq - self._first_seq
+    
+    def append(self, record):
+        """Dodaje wpis (LogRecord) w czasie O(1), nadpisując najstarszy po zapełnieniu bufora"""
+        with self._lock:
+            seq = self._next_seq
+            slot = seq % self.capacity
             
-            # Zapamiętaj oryginalny tryb
-            original_mode = current_mode
+            # Wpis wypychany z bufora jest zawsze najstarszym w swoim indeksie
+            evicted = self._entries[slot]
+            if evicted is not None and evicted.seq >= self._first_seq:
+                self._level_index[evicted.level].popleft()
+            
+            record.seq = seq
+            self._entries[slot] = record
+            self._level_index.setdefault(record.level, collections.deque()).append(seq)
+            
+            self._next_seq = seq + 1
+            if self._next_seq - self._first_seq > self.capacity:
+                self._first_seq = self._next_seq - self.capacity
+            return record
+    
+    def since(self, seq, limit=None):
+        """Zwraca wpisy o numerach większych niż seq (od najstarszego)"""
+        with self._lock:
+            start = max(seq + 1, self._first_seq)
+            end = self._next_seq
+            if limit is not None and end - start > limit:
+                end = start + limit
+            return [self._entries[s % self.capacity] for s in range(start, end)]
+    
+    def level_counts(self):
+        """Zwraca liczbę wpisów w buforze dla każdego poziomu"""
+        with self._lock:
+            return {level: len(seqs) for level, seqs in self._level_index.items() if seqs}
+    
+    def _seq_at_time(self, timestamp):
+        """Wyszukiwanie binarne pierwszego numeru seq z czasem >= timestamp"""
+        lo, hi = self._first_seq, self._next_seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entries[mid % self.capacity].timestamp < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def query(self, levels=None, text=None, time_from=None, time_to=None, before=None, limit=100,
+              category=None, address=None):
+        """
+        Zwraca stronę wpisów (od najnowszego) spełniających wszystkie warunki (AND).
+        Kolejną stronę pobiera się przekazując zwrócony next_cursor jako before.
+        """
+        with self._lock:
+            # Zakres numerów seq wyznaczony przez przedział czasu i kursor
+            lo = self._first_seq
+            hi = self._next_seq - 1
+            if time_from is not None:
+                lo = max(lo, self._seq_at_time(time_from))
+            if time_to is not None:
+                hi = min(hi, self._seq_at_time(time_to + 1e-6) - 1)
+            if before is not None:
+                hi = min(hi, before - 1)
             
-            add_log("Wyłączam Bluetooth...", "INFO")
-            local_device.setHostMode(QBluetoothLocalDevice.HostMode.HostPoweredOff)
+            # Kandydaci z indeksów poziomów albo cały zakres
+            if levels:
+                indexes = [self._level_index.get(level, ()) for level in levels]
+                candidates = heapq.merge(*(reversed(seqs) for seqs in indexes), reverse=True)
+            else:
+                candidates = range(hi, lo - 1, -1)
             
-            # Daj czas adaptera na wyłączenie
-            for i in range(10):  # Timeout: 2 sekundy
-                time.sleep(0.2)
-                QCoreApplication.processEvents()
-                # Sprawdź, czy wyłączenie się powiodło
-                if local_device.hostMode() == QBluetoothLocalDevice.HostMode.HostPoweredOff:
-                    add_log("Bluetooth został wyłączony pomyślnie", "INFO")
+            needle = text.lower() if text else None
+            results = []
+            has_more = False
+            for seq in candidates:
+                if seq > hi:
+                    continue
+                if seq < lo:
                     break
+                record = self._entries[seq % self.capacity]
+                if category and record.category != category:
+                    continue
+                if address and record.address != address:
+                    continue
+                if needle and needle not in record.search_text:
+                    continue
+                if len(results) == limit:
+                    has_more = True
+                    break
+                results.append(record)
             
-            # Teraz spróbuj włączyć Bluetooth
-            add_log("Włączam Bluetooth w trybie Discoverable...", "INFO")
-            local_device.setHostMode(QBluetoothLocalDevice.HostMode.HostDiscoverable)
+            return {
+                'entries': results,
+                'next_cursor': results[-1].seq if results and has_more else None,
+                'has_more': has_more
+            }
+    
+    def clear(self):
+        """Czyści bufor - numeracja sekwencyjna jest kontynuowana"""
+        with self._lock:
+            self._entries = [None] * self.capacity
+            self._level_index = {}
+            self._first_seq = self._next_seq
+
+
+# ========================================
+# WYJŚCIA LOGÓW (SINKI)
+# ========================================
+
+class LogSink:
+    """Bazowa klasa wyjścia logów - metody są wywoływane wyłącznie z wątku zapisującego"""
+    name = "sink"
+    
+    def write(self, record):
+        raise NotImplementedError
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.flush()
+
+
+class ConsoleSink(LogSink):
+    """Wypisuje logi na standardowe wyjście"""
+    name = "console"
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+    
+    def write(self, record):
+        self.stream.write(record.text + "\n")
+    
+    def flush(self):
+        self.stream.flush()
+
+
+class RotatingFileSink(LogSink):
+    """Zapisuje logi do pliku, rotując go po przekroczeniu max_bytes"""
+    name = "file"
+    
+    def __init__(self, path, max_bytes=1024 * 1024, backup_count=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = open(path, "a", encoding="utf-8")
+    
+    def write(self, record):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.timestamp))
+        self._file.write(f"[{timestamp}] [{record.category}] {record.text}\n")
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+    
+    def _rotate(self):
+        """Przesuwa pliki: log -> log.1 -> log.2 ... usuwając najstarszy"""
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+    
+    def flush(self):
+        self._file.flush()
+    
+    def close(self):
+        self._file.close()
+
+
+class MemorySink(LogSink):
+    """Przechowuje ostatnie sformatowane logi w pamięci"""
+    name = "memory"
+    
+    def __init__(self, capacity=LOG_CAPACITY):
+        self.lines = collections.deque(maxlen=capacity)
+    
+    def write(self, record):
+        self.lines.append(record.text)
+
+
+class AsyncLogDispatcher:
+    """
+    Kolejka logów z wątkiem zapisującym w tle. Wątki Qt i Flask jedynie
+    wstawiają wpis do kolejki, a formatowanie i zapis do wyjść odbywa się w tle.
+    Po zapełnieniu kolejki wpisy są odrzucane (overflow="drop") albo
+    wątek wywołujący czeka na wolne miejsce (overflow="block").
+    """
+    
+    BATCH_SIZE = 256
+    
+    def __init__(self, sinks, max_queue=10000, overflow="drop"):
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"Nieznana polityka przepełnienia: {overflow}")
+        self.sinks = list(sinks)
+        self.overflow = overflow
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+    
+    def submit(self, record):
+        """Wstawia wpis do kolejki - jedyny koszt ponoszony przez wątek wywołujący"""
+        if self._thread is None:
+            self._start()
+        
+        if self.overflow == "block":
+            self._queue.put(record)
+        else:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+    
+    def stats(self):
+        """Zwraca statystyki kolejki"""
+        return {
+            'sinks': [sink.name for sink in self.sinks],
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'overflow': self.overflow,
+            'dropped': self.dropped
+        }
+    
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        """Pętla wątku zapisującego - zapisuje wpisy partiami i opróżnia bufory raz na partię"""
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
             
-            # Daj czas adaptera na włączenie
-            for i in range(15):  # Timeout: 3 sekundy
-                time.sleep(0.2)
-                QCoreApplication.processEvents()
-                current_mode = local_device.hostMode()
-                # Sprawdź, czy włączenie się powiodło
-                if current_mode != QBluetoothLocalDevice.HostMode.HostPoweredOff:
-                    add_log(f"Bluetooth został włączony pomyślnie w trybie: {current_mode}", "INFO")
-                    return True
+            stop = None in batch
+            if self.dropped != self._reported_dropped:
+                lost = self.dropped - self._reported_dropped
+                self._reported_dropped = self.dropped
+                batch.append(LogRecord("WARNING", "Kolejka logów przepełniona - pominięto %d wpisów",
+                                       (lost,), "app"))
             
-            # Jeśli nie udało się włączyć w trybie Discoverable, spróbuj Connectable
-            if local_device.hostMode() == QBluetoothLocalDevice.HostMode.HostPoweredOff:
-                add_log("Próba włączenia w trybie Connectable...", "WARNING")
-                local_device.setHostMode(QBluetoothLocalDevice.HostMode.HostConnectable)
-                
-                # Daj czas adaptera na włączenie
-                for i in range(15):  # Timeout: 3 sekundy
-                    time.sleep(0.2)
-                    QCoreApplication.processEvents()
-                    current_mode = local_device.hostMode()
-                    # Sprawdź, czy włączenie się powiodło
-                    if current_mode != QBluetoothLocalDevice.HostMode.HostPoweredOff:
-                        add_log(f"Bluetooth został włączony pomyślnie w trybie: {current_mode}", "INFO")
-                        return True
-                
-                # Jeśli nadal nie udało się włączyć, spróbuj przywrócić oryginalny tryb
-                if local_device.hostMode() == QBluetoothLocalDevice.HostMode.HostPoweredOff:
-                    add_log("Próba przywrócenia oryginalnego trybu...", "WARNING")
-                    local_device.setHostMode(original_mode)
-                    
-                    time.sleep(1)
-                    QCoreApplication.processEvents()
-                    
-                    if local_device.hostMode() == QBluetoothLocalDevice.HostMode.HostPoweredOff:
-                        add_log("Nie udało się włączyć Bluetooth", "ERROR")
-                        return False
+            for sink in self.sinks:
+                try:
+                    for record in batch:
+                        if record is not None:
+                            sink.write(record)
+                    sink.flush()
+                except Exception as e:
+                    # Błąd jednego wyjścia nie może zatrzymać pozostałych
+                    sys.stderr.write(f"Błąd zapisu logów ({sink.name}): {str(e)}\n")
             
-            add_log(f"Bluetooth działa w trybie: {local_device.hostMode()}", "INFO")
-            return True
+            if stop:
+                break
+    
+    def stop(self, timeout=2.0):
+        """Zapisuje zaległe wpisy i kończy wątek zapisujący"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+
+def create_log_sinks():
+    """
+    Tworzy wyjścia logów na podstawie zmiennej BT_LOG_SINKS (np. "console,file").
+    Plik logów wskazuje BT_LOG_FILE, a rozmiar rotacji BT_LOG_FILE_MAX_BYTES.
+    """
+    sinks = []
+    for name in os.environ.get("BT_LOG_SINKS", "console").split(","):
+        name = name.strip().lower()
+        if name == "console":
+            sinks.append(ConsoleSink())
+        elif name == "file":
+            sinks.append(RotatingFileSink(os.environ.get("BT_LOG_FILE", "bluetooth_api.log"),
+                                          int(os.environ.get("BT_LOG_FILE_MAX_BYTES", 1024 * 1024))))
+        elif name == "memory":
+            sinks.append(MemorySink())
+        elif name:
+            sys.stderr.write(f"Nieznane wyjście logów: {name}\n")
+    return sinks
+
+
+# Globalne zmienne do przechowywania stanu
+paired_devices = []
+log_store = LogStore()
+log_dispatcher = AsyncLogDispatcher(create_log_sinks(),
+                                    max_queue=int(os.environ.get("BT_LOG_QUEUE_SIZE", 10000)),
+                                    overflow=os.environ.get("BT_LOG_OVERFLOW", "drop"))
+atexit.register(log_dispatcher.stop)
+atexit.register(lambda: stop_capture())
+scan_manager = None
+connection_manager = None
+sequence_manager = None
+polling_manager = None
+capture_recorder = None
+qt_app = None
+qt_bridge = None
+
+# Inicjalizacja aplikacji Flask
+app = Flask(__name__)
+
+def add_log(message, level="INFO", *args, category=DEFAULT_LOG_CATEGORY, address=None, exc_info=False):
+    """
+    Dodaje wiadomość do logów z poziomem ważności.
+    Argumenty args są wstawiane do wiadomości (styl %) dopiero przy formatowaniu,
+    a wpisy poniżej progu kategorii są odrzucane bez żadnego kosztu formatowania.
+    Wiadomość może być też funkcją zwracającą tekst.
+    """
+    if not is_log_enabled(level, category):
+        return None
+    
+    record = LogRecord(level, message, args, category, address,
+                       sys.exc_info() if exc_info else None)
+    log_store.append(record)
+    log_dispatcher.submit(record)  # Zapis do konsoli i pozostałych wyjść odbywa się w tle
+    return record
+
+def get_current_os():
+    """Zwraca aktualny system operacyjny"""
+    return platform.system()
+
+# Limity czasu (ms) na fazy resetu adaptera
+ADAPTER_POWER_OFF_TIMEOUT_MS = int(os.environ.get("BT_RESET_POWER_OFF_TIMEOUT_MS", 2000))
+ADAPTER_POWER_ON_TIMEOUT_MS = int(os.environ.get("BT_RESET_POWER_ON_TIMEOUT_MS", 3000))
+
+
+class AdapterReset(QObject):
+    """
+    Asynchroniczny reset adaptera niezależny od klasy klienta: wyłączenie,
+    a następnie włączenie w trybie Discoverable, Connectable lub pierwotnym
+    (kolejny tryb po przekroczeniu czasu fazy). Przejścia wyzwala sygnał
+    hostModeStateChanged, więc reset kończy się, gdy tylko adapter zgłosi
+    zmianę trybu, bez blokowania wątku Qt. Wynik (True/False) trafia do future.
+    Obiekt tworzyć i uruchamiać w wątku Qt.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.future = concurrent.futures.Future()
+        self.future.set_running_or_notify_cancel()
+        self.phase = "idle"
+        self.target_mode = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self._fallback_modes = []
+        
+        self._device = QBluetoothLocalDevice(self)
+        self._device.hostModeStateChanged.connect(self._on_host_mode_changed)
+        
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+    
+    def start(self):
+        """Rozpoczyna reset i zwraca future z wynikiem"""
+        add_log("Uruchamianie procedury resetowania Bluetooth...", "INFO", category="adapter")
+        if not self._device.isValid():
+            add_log("QBluetoothLocalDevice nie jest ważny", "ERROR", category="adapter")
+            self._finish(False)
+            return self.future
+        
+        # Zapamiętaj oryginalny tryb - ostatnia próba włączenia
+        original_mode = self._device.hostMode()
+        add_log("Aktualny tryb Bluetooth: %s", "DEBUG", original_mode, category="adapter")
+        self._fallback_modes = [QBluetoothLocalDevice.HostMode.HostDiscoverable,
+                                QBluetoothLocalDevice.HostMode.HostConnectable]
+        if original_mode not in self._fallback_modes and original_mode != QBluetoothLocalDevice.HostMode.HostPoweredOff:
+            self._fallback_modes.append(original_mode)
+        
+        if original_mode == QBluetoothLocalDevice.HostMode.HostPoweredOff:
+            self._power_on()
         else:
-            add_log("QBluetoothLocalDevice nie jest ważny", "ERROR")
-            return False
-            
+            add_log("Wyłączam Bluetooth...", "INFO", category="adapter")
+            self.phase = "power_off"
+            self._timer.start(ADAPTER_POWER_OFF_TIMEOUT_MS)
+            self._device.setHostMode(QBluetoothLocalDevice.HostMode.HostPoweredOff)
+        return self.future
+    
+    def _power_on(self):
+        if not self._fallback_modes:
+            add_log("Nie udało się włączyć Bluetooth", "ERROR", category="adapter")
+            self._finish(False)
+            return
+        
+        self.phase = "power_on"
+        self.target_mode = self._fallback_modes.pop(0)
+        add_log("Włączam Bluetooth w trybie %s...", "INFO", self.target_mode, category="adapter")
+        self._timer.start(ADAPTER_POWER_ON_TIMEOUT_MS)
+        self._device.setHostMode(self.target_mode)
+    
+    def _on_host_mode_changed(self, mode):
+        add_log("Adapter zgłosił tryb: %s", "DEBUG", mode, category="adapter")
+        if self.phase == "power_off" and mode == QBluetoothLocalDevice.HostMode.HostPoweredOff:
+            add_log("Bluetooth został wyłączony pomyślnie", "INFO", category="adapter")
+            self._power_on()
+        elif self.phase == "power_on" and mode != QBluetoothLocalDevice.HostMode.HostPoweredOff:
+            add_log("Bluetooth został włączony pomyślnie w trybie: %s", "INFO", mode, category="adapter")
+            self._finish(True)
+    
+    def _on_timeout(self):
+        # Sygnał mógł nie zostać wysłany - sprawdź tryb bezpośrednio
+        mode = self._device.hostMode()
+        if self.phase == "power_off":
+            if mode != QBluetoothLocalDevice.HostMode.HostPoweredOff:
+                add_log("Adapter nie zgłosił wyłączenia w %d ms, mimo to włączam", "WARNING",
+                        ADAPTER_POWER_OFF_TIMEOUT_MS, category="adapter")
+            self._power_on()
+        elif self.phase == "power_on":
+            if mode != QBluetoothLocalDevice.HostMode.HostPoweredOff:
+                add_log("Bluetooth działa w trybie: %s", "INFO", mode, category="adapter")
+                self._finish(True)
+            else:
+                add_log("Adapter nie włączył się w trybie %s w %d ms", "WARNING",
+                        self.target_mode, ADAPTER_POWER_ON_TIMEOUT_MS, category="adapter")
+                self._power_on()
+    
+    def _finish(self, success):
+        self._timer.stop()
+        self.phase = "done" if success else "failed"
+        self.finished_at = time.time()
+        add_log("Reset adaptera zakończony (%s) po %.2f s", "DEBUG", self.phase,
+                self.finished_at - self.started_at, category="adapter")
+        if not self.future.done():
+            self.future.set_result(success)
+    
+    def to_dict(self):
+        return {
+            'phase': self.phase,
+            'target_mode': self.target_mode.name if self.target_mode is not None else None,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+adapter_reset = None  # Ostatni (lub trwający) reset adaptera
+
+
+def start_adapter_reset():
+    """Rozpoczyna reset adaptera (wątek Qt); przy trwającym resecie zwraca jego future"""
+    global adapter_reset
+    if adapter_reset is not None and not adapter_reset.future.done():
+        return adapter_reset.future
+    adapter_reset = AdapterReset()
+    return adapter_reset.start()
+
+
+def adapter_health_check():
+    """
+    Szybka kontrola stanu adaptera (bez zmiany trybu). Zwraca (sprawny, powód) -
+    reset adaptera ma sens tylko wtedy, gdy adapter nie jest sprawny.
+    """
+    try:
+        local_device = QBluetoothLocalDevice()
+        if not local_device.isValid():
+            return False, "adapter niedostępny"
+        if local_device.hostMode() == QBluetoothLocalDevice.HostMode.HostPoweredOff:
+            return False, "adapter wyłączony"
+        return True, None
     except Exception as e:
-        add_log(f"Błąd podczas resetowania Bluetooth: {str(e)}", "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
-        return False
+        return False, str(e)
 
 # ========================================
 # FUNKCJE WINDOWSOWE DLA STEROWANIA MEDIAMI
@@ -195,608 +739,3439 @@ def windows_send_media_key(vk_code):
         return True
         
     except Exception as e:
-        add_log(f"Windows: Błąd podczas wysyłania klawisza medialnego: {str(e)}", "ERROR")
+        add_log("Windows: Błąd podczas wysyłania klawisza medialnego: %s", "ERROR", e, category="media")
         return False
 
 # ========================================
-# KLASA BLUETOOTH CLIENT
+# LOGOWANIE ODBIERANYCH DANYCH
 # ========================================
 
-class BluetoothConsoleClient(QObject):
-    """Klasa obsługująca komunikację Bluetooth w aplikacji Flask"""
+# Domyślne ustawienia logowania odbioru dla nowych połączeń
+receive_log_settings = {
+    'mode': os.environ.get("BT_RX_LOG_MODE", "full"),
+    'interval': float(os.environ.get("BT_RX_LOG_INTERVAL", 1.0)),
+    'sample_every': int(os.environ.get("BT_RX_LOG_SAMPLE", 0))
+}
+
+
+class ReceiveLogger:
+    """
+    Logowanie odebranych fragmentów danych w jednym z trybów:
+    - "full": zrzut HEX i podgląd ASCII każdego fragmentu
+    - "summary": podsumowanie ruchu co interval sekund (bajty, fragmenty, przepływność),
+      opcjonalnie ze zrzutem co sample_every-tego fragmentu
+    - "off": tylko liczniki, bez wpisów w logach
+    Okno podsumowania zaczyna się od pierwszego fragmentu i jest zamykane przez
+    timer po interval sekundach, także gdy kolejne dane już nie nadchodzą.
+    Wszystkie metody wywoływać w wątku Qt.
+    """
     
-    # Sygnały
-    connected = Signal()
-    disconnected = Signal()
-    message_received = Signal(bytes)
-    error_occurred = Signal(str)
+    MODES = ("full", "summary", "off")
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, log, mode="full", interval=1.0, sample_every=0, parent=None):
+        self._log = log
+        self.total_bytes = 0
+        self.total_chunks = 0
+        self._window_bytes = 0
+        self._window_chunks = 0
+        self._window_start = None
+        self._timer = QTimer(parent)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self.configure(mode, interval, sample_every)
+    
+    def configure(self, mode=None, interval=None, sample_every=None):
+        """Zmienia tryb logowania; zaległe podsumowanie jest wypisywane przed zmianą"""
+        if mode is not None and mode not in self.MODES:
+            raise ValueError(f"Nieznany tryb logowania odbioru: {mode}")
+        if getattr(self, 'mode', None) == "summary":
+            self.flush()
+        else:
+            self._reset_window()
+        if mode is not None:
+            self.mode = mode
+        if interval is not None:
+            self.interval = max(float(interval), 0.1)
+        if sample_every is not None:
+            self.sample_every = max(int(sample_every), 0)
+    
+    def record(self, data):
+        """Rejestruje odebrany fragment danych"""
+        size = len(data)
+        self.total_bytes += size
+        self.total_chunks += 1
         
-        # Socket do komunikacji
-        self._create_socket()
+        if self.mode == "full":
+            self._dump(data)
+        if self.mode != "summary":
+            return
         
-        # Flagi stanu
-        self.is_connected = False
-        self.connection_error = False
-        self.last_error = ""
-        self.connected_device_address = None
+        if not self._window_chunks:
+            self._window_start = time.monotonic()
+            self._timer.start(round(self.interval * 1000))
+        self._window_bytes += size
+        self._window_chunks += 1
+        if self.sample_every and self.total_chunks % self.sample_every == 0:
+            self._dump(data)
     
-    def _create_socket(self):
-        """Tworzy nowy socket Bluetooth"""
-        try:
-            # Jeśli już mamy socket, zamknij go
-            if hasattr(self, 'socket') and self.socket:
-                try:
-                    self.socket.disconnectFromService()
-                    self.socket.close()
-                except Exception as e:
-                    add_log(f"Błąd podczas zamykania starego socketu: {str(e)}", "ERROR")
-                
-            # Utwórz nowy socket
-            self.socket = QBluetoothSocket(QBluetoothServiceInfo.Protocol.RfcommProtocol)
-            
-            # Połącz sygnały
-            self.socket.connected.connect(self._on_connected)
-            self.socket.disconnected.connect(self._on_disconnected)
-            self.socket.readyRead.connect(self._on_ready_read)
-            self.socket.errorOccurred.connect(self._on_socket_error)
-            
-            add_log("Utworzono nowy socket Bluetooth", "DEBUG")
-        except Exception as e:
-            add_log(f"Błąd podczas tworzenia socketu: {str(e)}", "ERROR")
-            add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+    def _dump(self, data):
+        """Loguje zrzut HEX i podgląd ASCII fragmentu"""
+        if not is_log_enabled("INFO", "bluetooth"):
+            return
+        self._log("Odebrano dane: 0x%s (%d bajtów)", "INFO", HexDump(data), len(data))
+        if has_printable(data):
+            self._log("ASCII: %s", "INFO", PrintableView(data))
     
-    def connect_to_device(self, address_str, port=1):
-        """Łączy się z urządzeniem o podanym adresie MAC"""
-        try:
-            # Jeśli mamy aktywne połączenie, najpierw rozłącz
-            if self.is_connected:
-                add_log("Rozłączanie aktywnego połączenia przed nowym połączeniem", "INFO")
-                self.disconnect()
-                
-            # Upewnij się, że socket jest w stanie niepołączonym
-            if self.socket.state() != QBluetoothSocket.SocketState.UnconnectedState:
-                add_log("Socket nie jest w stanie rozłączonym, tworzę nowy", "WARNING")
-                self._create_socket()
-                
-            add_log(f"Próba połączenia z urządzeniem {address_str}...", "INFO")
-            
-            try:
-                address = QBluetoothAddress(address_str)
-                add_log(f"Utworzono obiekt adresu: {address.toString()}", "DEBUG")
-            except Exception as e:
-                add_log(f"Błąd podczas parsowania adresu MAC: {str(e)}", "ERROR")
-                return False
-            
-            # Zresetuj flagi
-            self.is_connected = False
-            self.connection_error = False
-            self.last_error = ""
-            
-            # Połącz
-            try:
-                self.socket.connectToService(address, port)
-                add_log(f"Wywołano connectToService z adresem {address.toString()} i portem {port}", "DEBUG")
-            except Exception as e:
-                add_log(f"Błąd podczas wywołania connectToService: {str(e)}", "ERROR")
-                return False
-            
-            # Poczekaj na połączenie lub timeout
-            loop = QEventLoop()
-            
-            # Timer na timeout połączenia
-            timer = QTimer()
-            timer.setSingleShot(True)
-            timer.timeout.connect(lambda: self._connection_timeout(loop))
-            timer.start(10000)  # 10 sekund na połączenie
-            
-            # Tymczasowe funkcje dla połączeń sygnałów
-            def on_temp_connected():
-                add_log("Sygnał connected otrzymany", "DEBUG")
-                self._stop_connection_wait(loop, timer)
-                
-            def on_temp_error(err):
-                add_log(f"Sygnał błędu otrzymany: {err}", "DEBUG")
-                self._connection_error(loop, timer, err)
-            
-            # Gdy połączenie zostanie ustanowione, zatrzymaj pętlę
-            self.connected.connect(on_temp_connected)
-            
-            # Gdy wystąpi błąd, zatrzymaj pętlę
-            self.error_occurred.connect(on_temp_error)
-            
-            add_log("Oczekiwanie na połączenie lub timeout...", "DEBUG")
-            
-            # Uruchom pętlę i czekaj
-            loop.exec()
-            
-            # Odłącz tymczasowe połączenia sygnałów
-            self.connected.disconnect(on_temp_connected)
-            self.error_occurred.disconnect(on_temp_error)
-            
-            # Zwróć status połączenia
-            if self.is_connected:
-                add_log(f"Połączono z urządzeniem {address_str} pomyślnie", "INFO")
-                self.connected_device_address = address_str
-                global connected_device_address
-                connected_device_address = address_str
-                return True
-            else:
-                if self.last_error:
-                    add_log(f"Błąd połączenia: {self.last_error}", "ERROR")
-                else:
-                    add_log("Timeout połączenia", "WARNING")
-                return False
-                
-        except Exception as e:
-            add_log(f"Nieoczekiwany wyjątek podczas łączenia: {str(e)}", "ERROR")
-            add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
-            return False
+    def flush(self):
+        """Loguje podsumowanie bieżącego okna i rozpoczyna nowe"""
+        self._timer.stop()
+        if self._window_chunks:
+            elapsed = max(time.monotonic() - self._window_start, 1e-6)
+            self._log("Odebrano %d bajtów w %d fragmentach w ciągu %.1f s (%.0f B/s)", "INFO",
+                      self._window_bytes, self._window_chunks, elapsed, self._window_bytes / elapsed)
+        self._reset_window()
     
-    def unpair_device(self, address_str):
-        """Rozparowuje urządzenie w systemie Windows używając BluetoothAPI poprzez ctypes"""
-        if platform.system() != "Windows":
-            add_log("Rozparowywanie urządzeń nie jest obsługiwane na tym systemie", "WARNING")
-            return False
-            
-        try:
-            import ctypes
-            from ctypes import windll, byref, Structure, WinError, POINTER, c_ubyte
-            from ctypes.wintypes import BOOL, DWORD, HANDLE
-            
-            add_log("Używam Windows BluetoothAPI przez ctypes...", "INFO")
-            
-            # Konwersja adresu MAC do formatu potrzebnego dla API
-            try:
-                addr_bytes = bytes.fromhex(address_str.replace(":", ""))
-                addr_reversed = bytes(reversed(addr_bytes))  # Bluetooth API używa odwrotnej kolejności
-                add_log(f"Przygotowany adres w formie bajtów: {addr_bytes.hex()}", "DEBUG")
-            except Exception as e:
-                add_log(f"Błąd podczas konwersji adresu MAC: {str(e)}", "ERROR")
-                return False
-            
-            # Definicje struktur i stałych
-            class BLUETOOTH_ADDRESS(Structure):
-                _fields_ = [("addr", c_ubyte * 6)]
-            
-            # Ładowanie biblioteki i definicja funkcji
-            try:
-                bthprops = windll.LoadLibrary("bthprops.cpl")
-                BluetoothRemoveDevice = bthprops.BluetoothRemoveDevice
-                BluetoothRemoveDevice.argtypes = [POINTER(BLUETOOTH_ADDRESS)]
-                BluetoothRemoveDevice.restype = DWORD
-                add_log("Biblioteka bthprops.cpl załadowana pomyślnie", "DEBUG")
+    def _reset_window(self):
+        self._timer.stop()
+        self._window_bytes = 0
+        self._window_chunks = 0
+        self._window_start = None
+    
+    def settings(self):
+        """Zwraca aktualne ustawienia i liczniki"""
+        return {
+            'mode': self.mode,
+            'interval': self.interval,
+            'sample_every': self.sample_every,
+            'total_bytes': self.total_bytes,
+            'total_chunks': self.total_chunks
+        }
+
+
+# ========================================
+# RAMKOWANIE ODBIERANYCH DANYCH
+# ========================================
+
+# Domyślne ramkowanie dla nowych połączeń: raw - fragmenty w postaci odebranej z socketu,
+# delimiter - ramki zakończone separatorem (HEX), length - ramki z prefiksem długości,
+# cobs - ramki COBS zakończone bajtem 0x00, fixed - ramki o stałym rozmiarze
+rx_framing_settings = {
+    'mode': os.environ.get("BT_RX_FRAMING", "raw"),
+    'delimiter': os.environ.get("BT_RX_DELIMITER", "0A"),
+    'length_bytes': int(os.environ.get("BT_RX_LENGTH_BYTES", 2)),
+    'byteorder': os.environ.get("BT_RX_LENGTH_BYTEORDER", "big"),
+    'frame_size': int(os.environ.get("BT_RX_FRAME_SIZE", 16)),
+    'max_frame': int(os.environ.get("BT_RX_MAX_FRAME", 65536))
+}
+
+
+def cobs_decode(frame):
+    """Dekoduje ramkę COBS (bez końcowego 0x00); ValueError przy uszkodzonej ramce"""
+    out = bytearray()
+    index = 0
+    size = len(frame)
+    while index < size:
+        code = frame[index]
+        if code == 0 or index + code > size:
+            raise ValueError("Nieprawidłowa ramka COBS")
+        out += frame[index + 1:index + code]
+        index += code
+        if code < 0xFF and index < size:
+            out.append(0)
+    return bytes(out)
+
+
+class FrameDecoder:
+    """
+    Bazowy dekoder ramek. Odebrane fragmenty trafiają do jednego bufora
+    bytearray, ramki są wycinane przez memoryview, a przetworzona część
+    bufora jest usuwana raz na fragment. Niekompletna ramka dłuższa niż
+    max_frame jest porzucana, by uszkodzony strumień nie zajmował pamięci.
+    """
+
+    mode = "raw"
+
+    def __init__(self, max_frame=65536):
+        self.max_frame = max(int(max_frame), 1)
+        self._buffer = bytearray()
+        self.frames = 0
+        self.dropped_bytes = 0
+
+    def feed(self, data):
+        """Dopisuje fragment do bufora i zwraca listę kompletnych ramek"""
+        self._buffer += data
+        frames = []
+        with memoryview(self._buffer) as view:
+            consumed = self._extract(view, frames)
+        if consumed:
+            del self._buffer[:consumed]
+            self._consumed(consumed)
+        if len(self._buffer) > self.max_frame:
+            self.dropped_bytes += len(self._buffer)
+            self.reset()
+        self.frames += len(frames)
+        return frames
+
+    def _extract(self, view, frames):
+        """Dopisuje ramki z bufora do frames i zwraca liczbę przetworzonych bajtów"""
+        frames.append(bytes(view))
+        return len(view)
+
+    def _consumed(self, count):
+        """Wywoływane po usunięciu count bajtów z początku bufora"""
+
+    def reset(self):
+        """Porzuca niekompletną ramkę (rozłączenie lub nowy socket)"""
+        self._buffer.clear()
+
+    def settings(self):
+        return {
+            'mode': self.mode,
+            'max_frame': self.max_frame,
+            'buffered': len(self._buffer),
+            'frames': self.frames,
+            'dropped_bytes': self.dropped_bytes
+        }
+
+
+class DelimiterFrameDecoder(FrameDecoder):
+    """Ramki zakończone separatorem (separator nie wchodzi do ramki)"""
+
+    mode = "delimiter"
+
+    def __init__(self, delimiter=b"\n", max_frame=65536):
+        super().__init__(max_frame)
+        if not delimiter:
+            raise ValueError("Separator ramek nie może być pusty")
+        self.delimiter = bytes(delimiter)
+        self._scan_from = 0  # Pozycja, przed którą bufor nie zawiera separatora
+
+    def _extract(self, view, frames):
+        start = 0
+        end = self._buffer.find(self.delimiter, self._scan_from)
+        while end != -1:
+            self._emit(view[start:end], frames)
+            start = end + len(self.delimiter)
+            end = self._buffer.find(self.delimiter, start)
+        # Separator może zaczynać się w końcówce niekompletnej ramki
+        self._scan_from = max(start, len(view) - len(self.delimiter) + 1)
+        return start
+
+    def _emit(self, frame, frames):
+        frames.append(bytes(frame))
+
+    def _consumed(self, count):
+        self._scan_from -= count
+
+    def reset(self):
+        super().reset()
+        self._scan_from = 0
+
+    def settings(self):
+        return {**super().settings(), 'delimiter': self.delimiter.hex().upper()}
+
+
+class CobsFrameDecoder(DelimiterFrameDecoder):
+    """Ramki zakodowane COBS, rozdzielone bajtem 0x00"""
+
+    mode = "cobs"
+
+    def __init__(self, max_frame=65536):
+        super().__init__(b"\x00", max_frame)
+        self.invalid = 0
+
+    def _emit(self, frame, frames):
+        if not frame:
+            return  # Kolejne bajty 0x00 - pusta ramka synchronizacyjna
+        try:
+            frames.append(cobs_decode(frame))
+        except ValueError:
+            self.invalid += 1
+            self.dropped_bytes += len(frame)
+
+    def settings(self):
+        return {**super().settings(), 'invalid': self.invalid}
+
+
+class LengthPrefixedFrameDecoder(FrameDecoder):
+    """Ramki poprzedzone polem długości (1, 2 lub 4 bajty, big/little endian)"""
+
+    mode = "length"
+
+    def __init__(self, length_bytes=2, byteorder="big", max_frame=65536):
+        super().__init__(max_frame)
+        if length_bytes not in (1, 2, 4):
+            raise ValueError("Pole długości musi mieć 1, 2 lub 4 bajty")
+        if byteorder not in ("big", "little"):
+            raise ValueError("Kolejność bajtów musi być big lub little")
+        self.length_bytes = length_bytes
+        self.byteorder = byteorder
+
+    def _extract(self, view, frames):
+        start = 0
+        size = len(view)
+        header = self.length_bytes
+        while size - start >= header:
+            length = int.from_bytes(view[start:start + header], self.byteorder)
+            if length > self.max_frame:
+                # Uszkodzony nagłówek - nie da się odnaleźć początku kolejnej ramki
+                self.dropped_bytes += size - start
+                return size
+            if size - start - header < length:
+                break
+            frames.append(bytes(view[start + header:start + header + length]))
+            start += header + length
+        return start
+
+    def settings(self):
+        return {**super().settings(), 'length_bytes': self.length_bytes, 'byteorder': self.byteorder}
+
+
+class FixedSizeFrameDecoder(FrameDecoder):
+    """Ramki o stałym rozmiarze"""
+
+    mode = "fixed"
+
+    def __init__(self, frame_size=16, max_frame=65536):
+        super().__init__(max(max_frame, frame_size))
+        if frame_size < 1:
+            raise ValueError("Rozmiar ramki musi być dodatni")
+        self.frame_size = frame_size
+
+    def _extract(self, view, frames):
+        start = 0
+        size = len(view)
+        while size - start >= self.frame_size:
+            frames.append(bytes(view[start:start + self.frame_size]))
+            start += self.frame_size
+        return start
+
+    def settings(self):
+        return {**super().settings(), 'frame_size': self.frame_size}
+
+
+FRAMING_MODES = ("raw", "delimiter", "length", "cobs", "fixed")
+
+
+def create_frame_decoder(mode="raw", delimiter="0A", length_bytes=2, byteorder="big",
+                         frame_size=16, max_frame=65536):
+    """Tworzy dekoder ramek na podstawie ustawień (jak w rx_framing_settings)"""
+    if mode == "raw":
+        return FrameDecoder(max_frame)
+    if mode == "delimiter":
+        return DelimiterFrameDecoder(bytes.fromhex(delimiter), max_frame)
+    if mode == "length":
+        return LengthPrefixedFrameDecoder(int(length_bytes), byteorder, max_frame)
+    if mode == "cobs":
+        return CobsFrameDecoder(max_frame)
+    if mode == "fixed":
+        return FixedSizeFrameDecoder(int(frame_size), max_frame)
+    raise ValueError(f"Nieznany tryb ramkowania: {mode}")
+
+
+# ========================================
+# STRUMIEŃ ODBIERANYCH DANYCH
+# ========================================
+
+# Liczba ostatnich ramek przechowywanych dla połączenia oraz długość kolejki
+# subskrybenta, po przekroczeniu której odrzucane są najstarsze ramki
+RX_HISTORY_FRAMES = int(os.environ.get("BT_RX_HISTORY_FRAMES", 500))
+RX_SUBSCRIBER_QUEUE = int(os.environ.get("BT_RX_SUBSCRIBER_QUEUE", 200))
+
+
+class ReceiveSubscription:
+    """Kolejka ramek jednego subskrybenta strumienia odbioru"""
+
+    def __init__(self, stream, capacity):
+        self.stream = stream
+        self.queue = collections.deque(maxlen=capacity)
+        self.dropped = 0  # Ramki odrzucone od ostatniego odczytu
+
+    def get(self, timeout):
+        """
+        Czeka na ramki; zwraca (ramki, liczba_odrzuconych, czy_strumień_zamknięty).
+        Ramki to krotki (seq, timestamp, dane).
+        """
+        with self.stream._condition:
+            self.stream._condition.wait_for(lambda: self.queue or self.stream.closed, timeout)
+            frames = list(self.queue)
+            self.queue.clear()
+            dropped, self.dropped = self.dropped, 0
+            return frames, dropped, self.stream.closed
+
+    def close(self):
+        self.stream.unsubscribe(self)
+
+
+class ReceiveStream:
+    """
+    Historia odebranych ramek połączenia w buforze o ograniczonym rozmiarze.
+    Każda ramka dostaje rosnący numer seq, dzięki czemu klient po ponownym
+    połączeniu może pobrać tylko ramki nowsze niż ostatnio widziana. Publikacja
+    (wątek Qt) nigdy nie czeka na subskrybentów - ich kolejki przy przepełnieniu
+    odrzucają najstarsze ramki.
+    """
+
+    def __init__(self, capacity=RX_HISTORY_FRAMES):
+        self.history = collections.deque(maxlen=capacity)
+        self.subscribers = set()
+        self.closed = False
+        self._next_seq = 1
+        self._condition = threading.Condition()
+
+    @property
+    def last_seq(self):
+        return self._next_seq - 1
+
+    @property
+    def first_seq(self):
+        """Numer najstarszej ramki dostępnej w historii"""
+        return self.history[0][0] if self.history else self._next_seq
+
+    def publish(self, data):
+        """Dodaje ramkę do historii i kolejek subskrybentów; zwraca (seq, timestamp, dane)"""
+        with self._condition:
+            frame = (self._next_seq, time.time(), bytes(data))
+            self._next_seq += 1
+            self.history.append(frame)
+            for subscription in self.subscribers:
+                if len(subscription.queue) == subscription.queue.maxlen:
+                    subscription.dropped += 1
+                subscription.queue.append(frame)
+            self._condition.notify_all()
+            return frame
+
+    def since(self, seq):
+        """Ramki z historii o numerach większych niż seq"""
+        with self._condition:
+            return [frame for frame in self.history if frame[0] > seq]
+
+    def subscribe(self, last_seq=None, capacity=RX_SUBSCRIBER_QUEUE):
+        """
+        Tworzy subskrypcję. Z last_seq kolejka zaczyna się od ramek nowszych niż
+        ta wartość (brakujące w historii są liczone jako odrzucone), bez niego -
+        od następnej odebranej ramki.
+        """
+        subscription = ReceiveSubscription(self, capacity)
+        with self._condition:
+            if last_seq is not None:
+                missed = [frame for frame in self.history if frame[0] > last_seq]
+                lost = max(0, self.first_seq - last_seq - 1)
+                lost += max(0, len(missed) - capacity)
+                subscription.queue.extend(missed)
+                subscription.dropped = lost
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._condition:
+            self.subscribers.discard(subscription)
+
+    def close(self):
+        """Kończy strumień i budzi subskrybentów (usunięcie sesji)"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'last_seq': self.last_seq,
+                'first_seq': self.first_seq,
+                'history': len(self.history),
+                'subscribers': len(self.subscribers)
+            }
+
+
+def receive_frame_dict(frame):
+    """Ramka ze strumienia odbioru jako słownik JSON (HEX i podgląd ASCII)"""
+    seq, timestamp, data = frame
+    return {
+        'seq': seq,
+        'timestamp': timestamp,
+        'size': len(data),
+        'hex': data.hex().upper(),
+        'ascii': str(PrintableView(data)) if has_printable(data) else None
+    }
+
+
+# ========================================
+# ZAPIS RUCHU DO PLIKU PRZECHWYCENIA
+# ========================================
+
+# Plik przechwycenia włączany przy starcie (pusty - zapis wyłączony), co ile rekordów
+# dopisywany jest wpis indeksu czasowego i rozmiar pliku, po którym zapis jest wstrzymywany
+CAPTURE_FILE = os.environ.get("BT_CAPTURE_FILE", "")
+CAPTURE_INDEX_EVERY = int(os.environ.get("BT_CAPTURE_INDEX_EVERY", 128))
+CAPTURE_MAX_BYTES = int(os.environ.get("BT_CAPTURE_MAX_BYTES", 256 * 1024 * 1024))
+CAPTURE_FLUSH_INTERVAL = 1.0
+
+# Plik: CAPTURE_MAGIC i rekordy - nagłówek CAPTURE_RECORD (znacznik czasu w s od epoki,
+# rodzaj, adres MAC, długość danych), a po nim dane. Indeks (plik .idx): CAPTURE_INDEX_MAGIC
+# i pary (znacznik czasu, przesunięcie rekordu) co CAPTURE_INDEX_EVERY rekordów.
+CAPTURE_MAGIC = b"BTCAP1\r\n"
+CAPTURE_INDEX_MAGIC = b"BTIDX1\r\n"
+CAPTURE_RECORD = struct.Struct("<dB6sI")
+CAPTURE_INDEX_ENTRY = struct.Struct("<dQ")
+
+# Rodzaje rekordów; dane rekordu błędu to kod QBluetoothSocket.SocketError (uint16) i opis
+CAPTURE_RX, CAPTURE_TX, CAPTURE_CONNECT, CAPTURE_DISCONNECT, CAPTURE_ERROR = 1, 2, 3, 4, 5
+CAPTURE_KINDS = {CAPTURE_RX: "rx", CAPTURE_TX: "tx", CAPTURE_CONNECT: "connect",
+                 CAPTURE_DISCONNECT: "disconnect", CAPTURE_ERROR: "error"}
+CAPTURE_ERROR_CODE = struct.Struct("<H")
+
+CaptureRecord = collections.namedtuple("CaptureRecord", "offset timestamp kind address payload")
+
+
+def pack_address(address):
+    """Adres MAC jako 6 bajtów (zera dla braku lub nieprawidłowego adresu)"""
+    try:
+        raw = bytes.fromhex((address or "").replace(":", ""))
+    except ValueError:
+        raw = b""
+    return raw if len(raw) == 6 else bytes(6)
+
+
+def unpack_address(raw):
+    return ":".join(f"{b:02X}" for b in raw)
+
+
+class CaptureRecorder:
+    """
+    Dopisuje ruch połączeń do binarnego pliku przechwycenia: fragmenty wysłane (TX,
+    w postaci przyjętej do kolejki nadawczej) i odebrane (RX, w postaci odczytanej
+    z socketu - przed ramkowaniem), połączenia, rozłączenia i błędy. Plik i indeks
+    są tylko dopisywane. Zapis jest buforowany; bufor jest opróżniany najpóźniej po
+    CAPTURE_FLUSH_INTERVAL s, a od razu po rozłączeniu i błędzie.
+    """
+    
+    def __init__(self, path, index_every=CAPTURE_INDEX_EVERY, max_bytes=CAPTURE_MAX_BYTES):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.index_every = max(1, index_every)
+        self.max_bytes = max_bytes
+        self.records = 0
+        self.dropped = 0
+        self.full = False
+        self._lock = threading.Lock()
+        self._dirty = False  # Bufor zawiera rekordy jeszcze nieprzekazane do pliku
+        self._closed = threading.Event()
+        
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as existing:
+                if existing.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+                    raise ValueError(f"Plik {path} nie jest plikiem przechwycenia")
+        self._file = open(path, "ab", buffering=65536)
+        if self._file.tell() == 0:
+            self._file.write(CAPTURE_MAGIC)
+        self._index = open(self.index_path, "ab")
+        if self._index.tell() == 0:
+            self._index.write(CAPTURE_INDEX_MAGIC)
+        self.size = self._file.tell()
+        
+        # Jeden wątek na cały czas zapisu opróżnia bufor co CAPTURE_FLUSH_INTERVAL s
+        self._thread = threading.Thread(target=self._run, name="capture-flush", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while not self._closed.wait(CAPTURE_FLUSH_INTERVAL):
+            self.flush()
+    
+    def record(self, kind, address, payload=b""):
+        """Dopisuje rekord (dowolny wątek)"""
+        with self._lock:
+            if self._file is None:
+                return
+            if self.size + CAPTURE_RECORD.size + len(payload) > self.max_bytes:
+                if not self.full:
+                    self.full = True
+                    add_log("Plik przechwycenia %s osiągnął %d B - wstrzymano zapis", "WARNING",
+                            self.path, self.max_bytes, category="app")
+                self.dropped += 1
+                return
+            
+            timestamp = time.time()
+            if self.records % self.index_every == 0:
+                self._index.write(CAPTURE_INDEX_ENTRY.pack(timestamp, self.size))
+            self._file.write(CAPTURE_RECORD.pack(timestamp, kind, pack_address(address), len(payload)))
+            self._file.write(payload)
+            self.size += CAPTURE_RECORD.size + len(payload)
+            self.records += 1
+            
+            self._dirty = True
+            if kind in (CAPTURE_DISCONNECT, CAPTURE_ERROR):
+                self._flush()
+    
+    def flush(self):
+        with self._lock:
+            if self._file is not None and self._dirty:
+                self._flush()
+    
+    def _flush(self):
+        # Najpierw rekordy, potem indeks - wpis indeksu nie wyprzedza danych w pliku
+        self._file.flush()
+        self._index.flush()
+        self._dirty = False
+    
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush()
+            self._file.close()
+            self._index.close()
+            self._file = self._index = None
+        self._thread.join(CAPTURE_FLUSH_INTERVAL)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'records': self.records,
+                'bytes': self.size,
+                'dropped': self.dropped,
+                'full': self.full,
+                'max_bytes': self.max_bytes
+            }
+
+
+class CaptureReader:
+    """
+    Odczyt pliku przechwycenia przez mmap. Rzadki indeks czasowy (plik .idx, a gdy
+    go brak - budowany jednym przebiegiem) pozwala zacząć od dowolnej chwili bez
+    czytania wcześniejszych rekordów; zakłada rosnące znaczniki czasu. Urwany
+    ostatni rekord (przerwany zapis) jest pomijany.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            if os.fstat(self._file.fileno()).st_size < len(CAPTURE_MAGIC):
+                raise ValueError(f"Plik {path} nie jest plikiem przechwycenia")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+                self._map.close()
+                raise ValueError(f"Plik {path} nie jest plikiem przechwycenia")
+        except Exception:
+            self._file.close()
+            raise
+        self.index = self._load_index(path + ".idx")
+        self._index_times = [timestamp for timestamp, _ in self.index]
+    
+    def _load_index(self, index_path):
+        try:
+            with open(index_path, "rb") as index_file:
+                data = index_file.read()
+        except OSError:
+            data = b""
+        if data[:len(CAPTURE_INDEX_MAGIC)] == CAPTURE_INDEX_MAGIC:
+            body = data[len(CAPTURE_INDEX_MAGIC):]
+            body = body[:len(body) - len(body) % CAPTURE_INDEX_ENTRY.size]
+            index = [entry for entry in CAPTURE_INDEX_ENTRY.iter_unpack(body) if entry[1] < len(self._map)]
+            if index:
+                return index
+        return [(record.timestamp, record.offset)
+                for number, record in enumerate(self.records()) if number % CAPTURE_INDEX_EVERY == 0]
+    
+    def seek(self, timestamp):
+        """Przesunięcie rekordu z indeksu, od którego trzeba czytać, aby trafić na timestamp"""
+        position = bisect.bisect_right(self._index_times, timestamp) - 1
+        return self.index[position][1] if position >= 0 else len(CAPTURE_MAGIC)
+    
+    def records(self, start=None, end=None):
+        """Generator rekordów CaptureRecord z przedziału czasu [start, end]"""
+        position = self.seek(start) if start is not None else len(CAPTURE_MAGIC)
+        size = len(self._map)
+        while position + CAPTURE_RECORD.size <= size:
+            timestamp, kind, address, length = CAPTURE_RECORD.unpack_from(self._map, position)
+            payload_start = position + CAPTURE_RECORD.size
+            if payload_start + length > size:
+                break
+            if end is not None and timestamp > end:
+                break
+            if start is None or timestamp >= start:
+                yield CaptureRecord(position, timestamp, kind, unpack_address(address),
+                                    self._map[payload_start:payload_start + length])
+            position = payload_start + length
+    
+    def close(self):
+        self._map.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def start_capture(path):
+    """Włącza zapis ruchu do podanego pliku (zastępuje bieżący zapis)"""
+    global capture_recorder
+    recorder = CaptureRecorder(path)
+    previous, capture_recorder = capture_recorder, recorder
+    if previous is not None:
+        previous.close()
+    add_log("Zapis ruchu do pliku %s", "INFO", path, category="app")
+    return recorder
+
+
+def stop_capture():
+    """Wyłącza zapis ruchu; zwraca statystyki zakończonego zapisu lub None"""
+    global capture_recorder
+    recorder, capture_recorder = capture_recorder, None
+    if recorder is None:
+        return None
+    recorder.close()
+    add_log("Zakończono zapis ruchu do pliku %s", "INFO", recorder.path, category="app")
+    return recorder.stats()
+
+
+# ========================================
+# TRANSAKCJE ŻĄDANIE - ODPOWIEDŹ
+# ========================================
+
+# Domyślny i największy limit czasu na odpowiedź oraz liczba transakcji
+# jednocześnie oczekujących na odpowiedź w jednym połączeniu
+TRANSACT_TIMEOUT_MS = int(os.environ.get("BT_TRANSACT_TIMEOUT_MS", 2000))
+MAX_TRANSACT_TIMEOUT_MS = 60 * 1000
+MAX_PENDING_TRANSACTIONS = int(os.environ.get("BT_MAX_PENDING_TRANSACTIONS", 64))
+
+
+class ReplyMatcher:
+    """Dopasowanie odpowiedzi do żądania - bazowo dowolna ramka (kolejność wysłania)"""
+    
+    kind = "any"
+    
+    def validate(self, request):
+        """Sprawdza, czy żądanie nadaje się do dopasowania (ValueError)"""
+    
+    def matches(self, request, reply):
+        return True
+    
+    def settings(self):
+        return {'type': self.kind}
+
+
+class PrefixMatcher(ReplyMatcher):
+    """Odpowiedź zaczyna się od podanych bajtów"""
+    
+    kind = "prefix"
+    
+    def __init__(self, prefix):
+        if not prefix:
+            raise ValueError("Dopasowanie prefix wymaga niepustego prefiksu")
+        self.prefix = bytes(prefix)
+    
+    def matches(self, request, reply):
+        return reply.startswith(self.prefix)
+    
+    def settings(self):
+        return {'type': self.kind, 'prefix': self.prefix.hex().upper()}
+
+
+class SequenceIdMatcher(ReplyMatcher):
+    """
+    Odpowiedź powtarza identyfikator żądania: bajty request[offset:offset + size]
+    muszą wystąpić w odpowiedzi na pozycji reply_offset (domyślnie tej samej).
+    """
+    
+    kind = "seq"
+    
+    def __init__(self, offset=0, size=1, reply_offset=None):
+        self.offset = int(offset)
+        self.size = int(size)
+        self.reply_offset = self.offset if reply_offset is None else int(reply_offset)
+        if self.offset < 0 or self.size < 1 or self.reply_offset < 0:
+            raise ValueError("Nieprawidłowe położenie identyfikatora sekwencji")
+    
+    def validate(self, request):
+        if len(request) < self.offset + self.size:
+            raise ValueError("Żądanie jest krótsze niż pole identyfikatora sekwencji")
+    
+    def matches(self, request, reply):
+        expected = request[self.offset:self.offset + self.size]
+        return reply[self.reply_offset:self.reply_offset + self.size] == expected
+    
+    def settings(self):
+        return {'type': self.kind, 'offset': self.offset, 'size': self.size, 'reply_offset': self.reply_offset}
+
+
+class RegexMatcher(ReplyMatcher):
+    """Odpowiedź zawiera dopasowanie wyrażenia regularnego (na bajtach, np. rb"^OK")"""
+    
+    kind = "regex"
+    
+    def __init__(self, pattern):
+        if isinstance(pattern, str):
+            pattern = pattern.encode()
+        try:
+            self.pattern = re.compile(pattern, re.DOTALL)
+        except re.error as e:
+            raise ValueError(f"Nieprawidłowe wyrażenie regularne: {e}") from None
+    
+    def matches(self, request, reply):
+        return self.pattern.search(reply) is not None
+    
+    def settings(self):
+        return {'type': self.kind, 'pattern': self.pattern.pattern.decode(errors="replace")}
+
+
+REPLY_MATCHERS = ("any", "prefix", "seq", "regex")
+
+
+def create_reply_matcher(spec=None):
+    """
+    Tworzy dopasowanie odpowiedzi z opisu JSON, np. {"type": "prefix", "prefix": "0xAA"},
+    {"type": "seq", "offset": 1, "size": 1} lub {"type": "regex", "pattern": "^OK"}.
+    """
+    spec = spec or {}
+    kind = spec.get('type') or "any"
+    if kind == "any":
+        return ReplyMatcher()
+    if kind == "prefix":
+        try:
+            return PrefixMatcher(parse_hex_payload(spec.get('prefix')))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Nieprawidłowy prefiks HEX: {e}") from None
+    if kind == "seq":
+        try:
+            return SequenceIdMatcher(spec.get('offset', 0), spec.get('size', 1), spec.get('reply_offset'))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Nieprawidłowe dopasowanie seq: {e}") from None
+    if kind == "regex":
+        return RegexMatcher(spec.get('pattern') or "")
+    raise ValueError(f"Nieznany typ dopasowania: {kind} (dostępne: {', '.join(REPLY_MATCHERS)})")
+
+
+class Transaction:
+    """Żądanie oczekujące na odpowiedź; wynik (słownik lub wyjątek) trafia do future"""
+    
+    def __init__(self, request, matcher, timeout_ms):
+        self.id = uuid.uuid4().hex[:12]
+        self.request = bytes(request)
+        self.matcher = matcher
+        self.timeout_ms = timeout_ms
+        self.sent_at = time.monotonic()
+        self.deadline = self.sent_at + timeout_ms / 1000
+        self.future = concurrent.futures.Future()
+    
+    def complete(self, frame):
+        latency = (time.monotonic() - self.sent_at) * 1000
+        self.future.set_result({
+            'transaction_id': self.id,
+            'request': self.request.hex().upper(),
+            'reply': receive_frame_dict(frame),
+            'latency_ms': round(latency, 3)
+        })
+        return latency
+    
+    def fail(self, error):
+        self.future.set_exception(error)
+
+
+def failed_future(error):
+    """Future zakończone od razu podanym wyjątkiem"""
+    future = concurrent.futures.Future()
+    future.set_exception(error)
+    return future
+
+
+# ========================================
+# KLASA BLUETOOTH CLIENT
+# ========================================
+
+# Sposób rozłączania: soft - zamknięcie połączenia (domyślnie), recreate - dodatkowo
+# nowy socket od razu, reset - dodatkowo reset adaptera (rozłącza wszystkie urządzenia)
+DISCONNECT_POLICIES = ("soft", "recreate", "reset")
+DISCONNECT_POLICY = os.environ.get("BT_DISCONNECT_POLICY", "soft")
+
+# Czas na zamknięcie połączenia w trybie soft, po którym socket jest przerywany
+DISCONNECT_TIMEOUT_MS = int(os.environ.get("BT_DISCONNECT_TIMEOUT_MS", 2000))
+
+
+# Kolejka nadawcza: okno zbierania drobnych zapisów w jedną porcję (ms), rozmiar
+# porcji wysyłanej natychmiast oraz progi wstrzymania i wznowienia przyjmowania danych
+TX_BATCH_WINDOW_MS = int(os.environ.get("BT_TX_BATCH_WINDOW_MS", 2))
+TX_BATCH_BYTES = int(os.environ.get("BT_TX_BATCH_BYTES", 1024))
+TX_HIGH_WATERMARK = int(os.environ.get("BT_TX_HIGH_WATERMARK", 65536))
+TX_LOW_WATERMARK = int(os.environ.get("BT_TX_LOW_WATERMARK", 16384))
+
+
+class TransmitQueue:
+    """
+    Kolejka nadawcza połączenia (wątek Qt). Drobne zapisy z krótkiego okna są
+    łączone w jedną porcję dla socketu, a bajty w drodze są rozliczane sygnałem
+    bytesWritten. Powyżej górnego progu (dane oczekujące + niepotwierdzone)
+    nowe dane są odrzucane, aż kolejka opróżni się poniżej dolnego progu.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+        self.pending = bytearray()  # Dane jeszcze nieprzekazane do socketu
+        self.pending_messages = 0
+        self.in_flight = 0  # Przekazane do socketu, bez potwierdzenia bytesWritten
+        self.saturated = False
+        self.total_queued = 0
+        self.total_written = 0
+        self.batches = 0
+        self.rejected = 0
+        self.drain_callbacks = []  # Wywoływane po spadku poniżej dolnego progu i po resecie
+        
+        self._timer = QTimer(client)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+    
+    @property
+    def depth(self):
+        """Bajty oczekujące i niepotwierdzone"""
+        return len(self.pending) + self.in_flight
+    
+    def can_accept(self, size):
+        """Czy kolejka przyjmie teraz size bajtów bez przekroczenia górnego progu"""
+        return not self.saturated and self.depth + size <= TX_HIGH_WATERMARK
+    
+    def enqueue(self, data):
+        """Dodaje dane do kolejki; zwraca False, jeśli kolejka jest przepełniona"""
+        if len(data) > TX_HIGH_WATERMARK:
+            # Taka wiadomość nigdy się nie zmieści - odrzucenie bez zmiany stanu kolejki
+            self.client._log("Wiadomość %d B przekracza górny próg kolejki nadawczej (%d B)",
+                             "WARNING", len(data), TX_HIGH_WATERMARK)
+            self.rejected += 1
+            return False
+        
+        self._resume_if_drained()
+        if not self.can_accept(len(data)):
+            # Wstrzymanie tylko powyżej dolnego progu - inaczej nic by go nie zdjęło
+            if not self.saturated and self.depth > TX_LOW_WATERMARK:
+                self.client._log("Kolejka nadawcza przepełniona (%d B) - wstrzymano przyjmowanie danych",
+                                 "WARNING", self.depth)
+                self.saturated = True
+            self.rejected += 1
+            return False
+        
+        self.pending += data
+        self.pending_messages += 1
+        self.total_queued += len(data)
+        self.client._capture(CAPTURE_TX, data)
+        
+        if len(self.pending) >= TX_BATCH_BYTES:
+            self.flush()
+        elif not self._timer.isActive():
+            self._timer.start(TX_BATCH_WINDOW_MS)
+        return True
+    
+    def flush(self):
+        """Przekazuje zebraną porcję do socketu"""
+        self._timer.stop()
+        if not self.pending:
+            return
+        
+        written = self.client.socket.write(bytes(self.pending))
+        if written < 0:
+            self.client._log("Błąd zapisu do socketu: %s", "ERROR", self.client.socket.errorString())
+            self.reset()
+            return
+        
+        self.client._log("Zapisano do socketu %d B (%d wiadomości)", "DEBUG", written, self.pending_messages)
+        self.batches += 1
+        self.in_flight += written
+        del self.pending[:written]
+        self.pending_messages = 1 if self.pending else 0
+        if self.pending:
+            # Socket przyjął tylko część danych - reszta w kolejnym oknie
+            self._timer.start(TX_BATCH_WINDOW_MS)
+    
+    def on_bytes_written(self, count):
+        """Handler sygnału bytesWritten - dane faktycznie wysłane"""
+        above = self.depth > TX_LOW_WATERMARK
+        self.in_flight = max(0, self.in_flight - count)
+        self.total_written += count
+        resumed = self._resume_if_drained()
+        if resumed or (above and self.depth <= TX_LOW_WATERMARK):
+            for callback in list(self.drain_callbacks):
+                callback()
+    
+    def _resume_if_drained(self):
+        """Zdejmuje wstrzymanie, gdy kolejka zeszła do dolnego progu; zwraca True po wznowieniu"""
+        if not self.saturated or self.depth > TX_LOW_WATERMARK:
+            return False
+        self.saturated = False
+        self.client._log("Kolejka nadawcza opróżniona (%d B) - wznowiono przyjmowanie danych", "DEBUG", self.depth)
+        return True
+    
+    def reset(self):
+        """Porzuca niewysłane dane (rozłączenie lub nowy socket)"""
+        self._timer.stop()
+        if self.pending:
+            self.client._log("Porzucono %d B niewysłanych danych", "WARNING", len(self.pending))
+        self.pending.clear()
+        self.pending_messages = 0
+        self.in_flight = 0
+        self.saturated = False
+        for callback in list(self.drain_callbacks):
+            callback()
+    
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'pending_bytes': len(self.pending),
+            'pending_messages': self.pending_messages,
+            'in_flight': self.in_flight,
+            'saturated': self.saturated,
+            'total_queued': self.total_queued,
+            'total_written': self.total_written,
+            'batches': self.batches,
+            'rejected': self.rejected,
+            'high_watermark': TX_HIGH_WATERMARK,
+            'low_watermark': TX_LOW_WATERMARK
+        }
+
+
+class BluetoothConsoleClient(QObject):
+    """Klasa obsługująca komunikację Bluetooth w aplikacji Flask"""
+    
+    # Sygnały
+    connected = Signal()
+    disconnected = Signal()
+    message_received = Signal(bytes)
+    error_occurred = Signal(str)
+    
+    def __init__(self, address=None):
+        super().__init__()
+        
+        # Flagi stanu
+        self.is_connected = False
+        self.connection_error = False
+        self.last_error = ""
+        self.connected_device_address = None
+        self.target_address = address  # Adres urządzenia, z którym trwa lub trwało łączenie
+        
+        # Logowanie odbieranych danych
+        self.rx_logger = ReceiveLogger(self._log, parent=self, **receive_log_settings)
+        
+        # Składanie odebranych fragmentów w ramki
+        self.framer = create_frame_decoder(**rx_framing_settings)
+        
+        # Historia odebranych ramek dla subskrybentów (strumień SSE)
+        self.rx_stream = ReceiveStream()
+        
+        # Kolejka nadawcza z łączeniem drobnych zapisów
+        self.tx = TransmitQueue(self)
+        
+        # Transakcje oczekujące na odpowiedź (w kolejności wysłania) i ich wspólny timer
+        self.transactions = []
+        self.transaction_counts = {'completed': 0, 'timed_out': 0, 'failed': 0}
+        self.last_latency_ms = None
+        self._transaction_timer = QTimer(self)
+        self._transaction_timer.setSingleShot(True)
+        self._transaction_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._transaction_timer.timeout.connect(self._on_transaction_timeout)
+        
+        # Trwająca próba połączenia: funkcja zwrotna i timer limitu czasu
+        self._pending_connect = None
+        self._connect_timer = QTimer(self)
+        self._connect_timer.setSingleShot(True)
+        self._connect_timer.timeout.connect(self._on_connect_timeout)
+        
+        # Limit czasu na zamknięcie połączenia przy rozłączaniu
+        self._disconnect_timer = QTimer(self)
+        self._disconnect_timer.setSingleShot(True)
+        self._disconnect_timer.timeout.connect(self._on_disconnect_timeout)
+        
+        # Socket do komunikacji
+        self.socket = None
+        self._create_socket()
+    
+    def _log(self, message, level="INFO", *args, **kwargs):
+        """Dodaje wpis logu w kategorii "bluetooth" z adresem obsługiwanego urządzenia"""
+        return add_log(message, level, *args, category="bluetooth",
+                       address=self.connected_device_address or self.target_address, **kwargs)
+    
+    def _capture(self, kind, payload=b""):
+        """Dopisuje zdarzenie połączenia do pliku przechwycenia, jeśli zapis jest włączony"""
+        recorder = capture_recorder
+        if recorder is not None:
+            recorder.record(kind, self.connected_device_address or self.target_address, payload)
+    
+    def _new_socket(self):
+        """Tworzy socket RFCOMM (narzędzie odtwarzania podstawia tu socket z pliku przechwycenia)"""
+        return QBluetoothSocket(QBluetoothServiceInfo.Protocol.RfcommProtocol)
+    
+    def _create_socket(self):
+        """Tworzy nowy socket Bluetooth"""
+        try:
+            # Jeśli już mamy socket, zamknij go - jego spóźnione sygnały nie mogą
+            # wpływać na stan nowego połączenia
+            if hasattr(self, 'socket') and self.socket:
+                try:
+                    old_socket = self.socket
+                    old_socket.blockSignals(True)
+                    old_socket.abort()
+                    old_socket.deleteLater()
+                except Exception as e:
+                    self._log("Błąd podczas zamykania starego socketu: %s", "ERROR", e)
+                
+            # Utwórz nowy socket
+            self.socket = self._new_socket()
+            
+            # Połącz sygnały
+            self.socket.connected.connect(self._on_connected)
+            self.socket.disconnected.connect(self._on_disconnected)
+            self.socket.readyRead.connect(self._on_ready_read)
+            self.socket.errorOccurred.connect(self._on_socket_error)
+            self.socket.bytesWritten.connect(self.tx.on_bytes_written)
+            self.tx.reset()
+            self.framer.reset()
+            
+            self._log("Utworzono nowy socket Bluetooth", "DEBUG")
+        except Exception as e:
+            self._log("Błąd podczas tworzenia socketu: %s", "ERROR", e)
+            self._log("Stacktrace:", "DEBUG", exc_info=True)
+    
+    def start_connection(self, address_str, on_finished, port=1):
+        """
+        Rozpoczyna łączenie z urządzeniem o podanym adresie MAC bez blokowania
+        (wywoływać w wątku Qt). Wynik trafia do on_finished(success, error) po
+        sygnale connected, błędzie socketu lub przekroczeniu czasu.
+        """
+        try:
+            # Poprzednia, niezakończona próba zostaje przerwana
+            self._finish_connection(False, "Przerwano przez nową próbę połączenia")
+            
+            # Ponowne łączenie tej samej sesji - najpierw rozłącz (od razu z nowym socketem)
+            if self.is_connected:
+                self._log("Rozłączanie aktywnego połączenia przed nowym połączeniem", "INFO")
+                self.disconnect("recreate")
+                
+            # Upewnij się, że socket jest w stanie niepołączonym
+            if self.socket.state() != QBluetoothSocket.SocketState.UnconnectedState:
+                self._log("Socket nie jest w stanie rozłączonym, tworzę nowy", "WARNING")
+                self._create_socket()
+                # Trwające zamykanie starego socketu nie zgłosi już rozłączenia
+                if self._disconnect_timer.isActive():
+                    self._on_disconnected()
+                
+            self.target_address = address_str
+            self._log("Próba połączenia z urządzeniem %s...", "INFO", address_str)
+            
+            try:
+                address = QBluetoothAddress(address_str)
+                self._log("Utworzono obiekt adresu: %s", "DEBUG", address_str)
+            except Exception as e:
+                self._log("Błąd podczas parsowania adresu MAC: %s", "ERROR", e)
+                on_finished(False, f"Nieprawidłowy adres MAC: {str(e)}")
+                return
+            
+            # Zresetuj flagi
+            self.is_connected = False
+            self.connection_error = False
+            self.last_error = ""
+            self._pending_connect = on_finished
+            
+            # Połącz - dalszy przebieg obsługują _on_connected, _on_socket_error i timer
+            self.socket.connectToService(address, port)
+            self._log("Wywołano connectToService z adresem %s i portem %s", "DEBUG", address_str, port)
+            # Błąd socketu mógł już zakończyć próbę synchronicznie
+            if self._pending_connect is not None:
+                self._connect_timer.start(CONNECT_TIMEOUT_MS)
+        except Exception as e:
+            self._log("Nieoczekiwany wyjątek podczas łączenia: %s", "ERROR", e)
+            self._log("Stacktrace:", "DEBUG", exc_info=True)
+            if self._pending_connect is None:
+                on_finished(False, str(e))
+            else:
+                self._finish_connection(False, str(e))
+    
+    @property
+    def connecting(self):
+        """Czy trwa próba połączenia"""
+        return self._pending_connect is not None
+    
+    def close(self):
+        """Zamyka sesję bez resetowania adaptera (przy usuwaniu nieużywanej sesji)"""
+        self._finish_connection(False, "Sesja została zamknięta")
+        self._fail_transactions("Sesja została zamknięta")
+        self.rx_stream.close()
+        if self.socket:
+            self.socket.abort()
+    
+    def _finish_connection(self, success, error=None):
+        """Kończy trwającą próbę połączenia i przekazuje wynik"""
+        callback, self._pending_connect = self._pending_connect, None
+        self._connect_timer.stop()
+        if callback is None:
+            return
+        
+        if success:
+            self._log("Połączono z urządzeniem %s pomyślnie", "INFO", self.target_address)
+            self.connected_device_address = self.target_address
+        else:
+            self._log("Błąd połączenia: %s", "ERROR", error)
+        callback(success, error)
+    
+    def _on_connect_timeout(self):
+        """Handler timeoutu połączenia"""
+        if self._pending_connect is not None and not self.is_connected:
+            self._log("Timeout połączenia", "WARNING")
+            self._finish_connection(False, "Timeout połączenia")
+            self.socket.abort()
+    
+    def disconnect(self, policy=None):
+        """
+        Rozłącza urządzenie bez blokowania wątku Qt. Polityka (DISCONNECT_POLICIES)
+        określa, czy poza zamknięciem połączenia od razu utworzyć nowy socket lub
+        zresetować adapter. Jeśli w trybie soft socket nie zamknie się w
+        DISCONNECT_TIMEOUT_MS, zostaje przerwany, a adapter jest resetowany
+        tylko wtedy, gdy kontrola stanu wykaże problem.
+        """
+        policy = policy or DISCONNECT_POLICY
+        if policy not in DISCONNECT_POLICIES:
+            self._log("Nieznana polityka rozłączania: %s, używam soft", "WARNING", policy)
+            policy = "soft"
+        
+        if not hasattr(self, 'socket') or not self.socket:
+            self._log("Brak inicjalizowanego socketu", "WARNING")
+            self.is_connected = False
+            return False
+                
+        if self.socket.state() != QBluetoothSocket.SocketState.ConnectedState:
+            self._log("Socket nie jest w stanie połączonym (aktualny stan: %s)", "WARNING", self.socket.state())
+            return False
+        
+        self._log("Rozłączanie (tryb: %s)...", "INFO", policy)
+        self.is_connected = False
+        
+        if policy == "soft":
+            try:
+                self.socket.disconnectFromService()
+                self._log("Wywołano disconnectFromService", "DEBUG")
             except Exception as e:
-                add_log(f"Błąd podczas ładowania biblioteki bthprops.cpl: {str(e)}", "ERROR")
+                self._log("Błąd podczas disconnectFromService: %s", "ERROR", e)
+            # Zakończenie obsłuży _on_disconnected lub _on_disconnect_timeout
+            self._disconnect_timer.start(DISCONNECT_TIMEOUT_MS)
+            return True
+        
+        # Nowy socket od razu - stary jest przerywany, a jego sygnały zablokowane
+        self._create_socket()
+        self._on_disconnected()
+        
+        if policy == "reset":
+            # Reset adaptera rozłącza wszystkie urządzenia - tylko na wyraźne żądanie
+            self._reset_adapter()
+        return True
+    
+    def _on_disconnect_timeout(self):
+        """Socket nie zamknął się w wyznaczonym czasie - przerwij go i sprawdź adapter"""
+        if self.socket.state() == QBluetoothSocket.SocketState.UnconnectedState:
+            return
+        
+        self._log("Rozłączenie nie zakończyło się w %d ms, tworzę nowy socket...", "WARNING", DISCONNECT_TIMEOUT_MS)
+        self._create_socket()
+        self._on_disconnected()
+        
+        healthy, reason = adapter_health_check()
+        if not healthy:
+            self._log("Adapter wymaga resetu: %s", "WARNING", reason)
+            self._reset_adapter()
+    
+    def _reset_adapter(self):
+        """Zleca reset adaptera bez czekania na jego zakończenie"""
+        def on_done(future):
+            if not future.result():
+                self._log("Resetowanie Bluetooth nie powiodło się - sprawdź logi", "WARNING")
+        start_adapter_reset().add_done_callback(on_done)
+    
+    def send_data(self, data):
+        """Wysyła dane do urządzenia przez kolejkę nadawczą (False, gdy kolejka jest pełna)"""
+        if not self.is_connected:
+            self._log("Nie można wysłać danych - brak połączenia", "WARNING")
+            return False
+        
+        try:
+            if isinstance(data, str):
+                # Jeśli to string, zakładamy że to hex
+                if data.startswith("0x"):
+                    data = data[2:]
+                
+                self._log("Konwersja danych HEX: %s", "DEBUG", data)
+                data = bytes.fromhex(data)
+            
+            if not isinstance(data, (bytes, bytearray)):
+                self._log("Nieprawidłowy typ danych - wymagane bytes lub hex string", "ERROR")
+                return False
+            
+            if not self.tx.enqueue(data):
+                self._log("Nie wysłano %d bajtów - kolejka nadawcza jest pełna", "WARNING", len(data))
                 return False
+            self._log("Wysyłanie %d bajtów: 0x%s", "INFO", len(data), HexDump(data))
+            return True
+        except Exception as e:
+            self._log("Błąd podczas wysyłania danych: %s", "ERROR", e)
+            self._log("Stacktrace:", "DEBUG", exc_info=True)
+            return False
+    
+    def transact(self, data, matcher=None, timeout_ms=TRANSACT_TIMEOUT_MS):
+        """
+        Wysyła żądanie i zwraca Future z pierwszą pasującą odpowiedzią (wątek Qt).
+        Wiele transakcji może czekać jednocześnie - odebrana ramka trafia do
+        najstarszej, której dopasowanie ją akceptuje. Żądanie omija okno łączenia
+        zapisów, a brak odpowiedzi w timeout_ms kończy Future wyjątkiem TimeoutError.
+        """
+        matcher = matcher or ReplyMatcher()
+        try:
+            matcher.validate(data)
+        except ValueError as e:
+            return failed_future(e)
+        if not self.is_connected:
+            return failed_future(ConnectionError("Brak połączenia z urządzeniem"))
+        if len(self.transactions) >= MAX_PENDING_TRANSACTIONS:
+            return failed_future(BufferError(f"Osiągnięto limit {MAX_PENDING_TRANSACTIONS} oczekujących transakcji"))
+        if not self.send_data(data):
+            return failed_future(BufferError("Nie wysłano żądania - kolejka nadawcza jest pełna"))
+        self.tx.flush()
+        
+        transaction = Transaction(data, matcher, timeout_ms)
+        self.transactions.append(transaction)
+        self._arm_transaction_timer()
+        return transaction.future
+    
+    def transaction_stats(self):
+        return {
+            'pending': len(self.transactions),
+            **self.transaction_counts,
+            'last_latency_ms': self.last_latency_ms
+        }
+    
+    def _match_transaction(self, frame):
+        """Przekazuje ramkę najstarszej transakcji, do której pasuje"""
+        reply = frame[2]
+        for index, transaction in enumerate(self.transactions):
+            if transaction.matcher.matches(transaction.request, reply):
+                del self.transactions[index]
+                self.last_latency_ms = round(transaction.complete(frame), 3)
+                self.transaction_counts['completed'] += 1
+                self._log("Transakcja %s: odpowiedź po %.1f ms", "DEBUG", transaction.id, self.last_latency_ms)
+                self._arm_transaction_timer()
+                return True
+        return False
+    
+    def _arm_transaction_timer(self):
+        """Nastawia timer na najbliższy termin oczekującej transakcji"""
+        if not self.transactions:
+            self._transaction_timer.stop()
+            return
+        deadline = min(transaction.deadline for transaction in self.transactions)
+        self._transaction_timer.start(max(0, round((deadline - time.monotonic()) * 1000)))
+    
+    def _on_transaction_timeout(self):
+        now = time.monotonic()
+        expired = [transaction for transaction in self.transactions if transaction.deadline <= now]
+        self.transactions = [transaction for transaction in self.transactions if transaction.deadline > now]
+        for transaction in expired:
+            self.transaction_counts['timed_out'] += 1
+            self._log("Transakcja %s: brak odpowiedzi w %d ms", "WARNING", transaction.id, transaction.timeout_ms)
+            transaction.fail(TimeoutError(f"Brak odpowiedzi w {transaction.timeout_ms} ms"))
+        self._arm_transaction_timer()
+    
+    def _fail_transactions(self, message):
+        """Kończy wszystkie oczekujące transakcje błędem połączenia"""
+        transactions, self.transactions = self.transactions, []
+        self._transaction_timer.stop()
+        for transaction in transactions:
+            self.transaction_counts['failed'] += 1
+            transaction.fail(ConnectionError(message))
+    
+    def _on_connected(self):
+        """Handler połączenia"""
+        self._log("Połączono z urządzeniem!", "INFO")
+        self.is_connected = True
+        self._capture(CAPTURE_CONNECT)
+        self._finish_connection(True)
+        self.connected.emit()
+    
+    def _on_disconnected(self):
+        """Handler rozłączenia"""
+        self._disconnect_timer.stop()
+        self.tx.reset()
+        self.rx_logger.flush()
+        self.framer.reset()
+        self._finish_connection(False, "Połączenie zostało zamknięte")
+        self._fail_transactions("Połączenie zostało zamknięte")
+        self._log("Rozłączono z urządzeniem", "INFO")
+        self._capture(CAPTURE_DISCONNECT)
+        self.is_connected = False
+        self.connected_device_address = None
+        self.disconnected.emit()
+    
+    def configure_framing(self, **settings):
+        """Zmienia sposób ramkowania; niekompletna ramka w starym trybie jest porzucana"""
+        self.framer = create_frame_decoder(**{**rx_framing_settings, **settings})
+        self._log("Ramkowanie odbioru: %s", "INFO", self.framer.mode)
+        return self.framer.settings()
+    
+    def _on_ready_read(self):
+        """Handler odebrania danych - message_received dostaje tylko kompletne ramki"""
+        try:
+            data = self.socket.readAll().data()
+            self._capture(CAPTURE_RX, data)
+            self.rx_logger.record(data)
+            dropped = self.framer.dropped_bytes
+            for frame in self.framer.feed(data):
+                published = self.rx_stream.publish(frame)
+                if self.transactions:
+                    self._match_transaction(published)
+                self.message_received.emit(frame)
+            if self.framer.dropped_bytes != dropped:
+                self._log("Porzucono %d B niepoprawnych danych (ramkowanie: %s)", "WARNING",
+                          self.framer.dropped_bytes - dropped, self.framer.mode)
+        except Exception as e:
+            self._log("Błąd podczas odczytu danych: %s", "ERROR", e)
+    
+    def _on_socket_error(self, error):
+        """Handler błędu socket'u"""
+        error_messages = {
+            QBluetoothSocket.SocketError.NoSocketError: "Brak błędu",
+            QBluetoothSocket.SocketError.HostNotFoundError: "Nie znaleziono hosta",
+            QBluetoothSocket.SocketError.ServiceNotFoundError: "Nie znaleziono usługi",
+            QBluetoothSocket.SocketError.NetworkError: "Błąd sieci",
+            QBluetoothSocket.SocketError.UnsupportedProtocolError: "Nieobsługiwany protokół",
+            QBluetoothSocket.SocketError.OperationError: "Błąd operacji",
+            QBluetoothSocket.SocketError.RemoteHostClosedError: "Zdalny host zamknął połączenie",
+            QBluetoothSocket.SocketError.MissingPermissionsError: "Brak uprawnień",
+            QBluetoothSocket.SocketError.UnknownSocketError: "Nieznany błąd"
+        }
+        
+        error_message = error_messages.get(error, f"Nieznany błąd ({error})")
+        self.last_error = error_message
+        self.connection_error = True
+        self._log("Błąd socket'u: %s", "ERROR", error_message)
+        self._capture(CAPTURE_ERROR, CAPTURE_ERROR_CODE.pack(error.value) + error_message.encode())
+        self._finish_connection(False, error_message)
+        self.error_occurred.emit(error_message)
+
+
+# ========================================
+# POZOSTAŁE FUNKCJE
+# ========================================
+
+# Czas (s), po którym niewidziane urządzenie znika z pamięci podręcznej wykrytych urządzeń
+DEVICE_CACHE_TTL = float(os.environ.get("BT_DEVICE_CACHE_TTL", 300))
+
+
+class DeviceCache:
+    """
+    Pamięć podręczna wykrytych urządzeń indeksowana adresem MAC.
+    Kolejne wykrycia tego samego urządzenia są scalane (nazwa, RSSI, czas
+    ostatniego wykrycia), a wpisy niewidziane dłużej niż ttl sekund wygasają.
+    """
+    
+    def __init__(self, ttl=DEVICE_CACHE_TTL):
+        self.ttl = ttl
+        self._devices = {}  # adres -> słownik z danymi urządzenia
+        self._lock = threading.Lock()
+        self.change_callbacks = []  # Wywoływane z (urządzenie, czy_nowe) po nowym wykryciu lub zmianie nazwy
+    
+    def update(self, address, name=None, rssi=None):
+        """Scala wykrycie urządzenia; zwraca (kopia danych, czy_nowe)"""
+        now = time.time()
+        address = address.upper()
+        with self._lock:
+            device = self._devices.get(address)
+            is_new = device is None or now - device['last_seen'] > self.ttl
+            changed = is_new or bool(name and name != device['name'])
+            if is_new:
+                device = {
+                    'name': name or "Nieznane urządzenie",
+                    'address': address,
+                    'rssi': rssi,
+                    'first_seen': now,
+                    'last_seen': now,
+                    'seen_count': 1
+                }
+                self._devices[address] = device
+            else:
+                # Nie nadpisuj znanej nazwy pustą nazwą z kolejnego wykrycia
+                if name:
+                    device['name'] = name
+                if rssi is not None:
+                    device['rssi'] = rssi
+                device['last_seen'] = now
+                device['seen_count'] += 1
+            device = dict(device)
+        
+        if changed:
+            for callback in self.change_callbacks:
+                callback(device, is_new)
+        return device, is_new
+    
+    def get(self, address):
+        """Zwraca dane urządzenia w czasie O(1) lub None, jeśli nieznane lub wygasłe"""
+        with self._lock:
+            device = self._devices.get(address.upper())
+            if device is None or time.time() - device['last_seen'] > self.ttl:
+                return None
+            return dict(device)
+    
+    def devices(self):
+        """Zwraca nie wygasłe urządzenia w kolejności pierwszego wykrycia"""
+        self.prune()
+        with self._lock:
+            return sorted((dict(device) for device in self._devices.values()),
+                          key=lambda device: device['first_seen'])
+    
+    def prune(self):
+        """Usuwa wygasłe wpisy"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for address in [a for a, d in self._devices.items() if d['last_seen'] < cutoff]:
+                del self._devices[address]
+    
+    def clear(self):
+        with self._lock:
+            self._devices.clear()
+        for callback in self.change_callbacks:
+            callback(None, False)
+    
+    def __len__(self):
+        return len(self.devices())
+
+
+device_cache = DeviceCache()
+
+
+# Czas trwania skanowania i liczba zapamiętanych zadań skanowania
+SCAN_TIMEOUT_MS = 20000
+MAX_SCAN_JOBS = 10
+
+
+def discovery_error_message(error):
+    """Zwraca opis błędu QBluetoothDeviceDiscoveryAgent"""
+    error_msgs = {
+        QBluetoothDeviceDiscoveryAgent.Error.NoError: "Brak błędu",
+        QBluetoothDeviceDiscoveryAgent.Error.PoweredOffError: "Bluetooth wyłączony",
+        QBluetoothDeviceDiscoveryAgent.Error.InputOutputError: "Błąd wejścia/wyjścia",
+        QBluetoothDeviceDiscoveryAgent.Error.InvalidBluetoothAdapterError: "Nieprawidłowy adapter Bluetooth",
+        QBluetoothDeviceDiscoveryAgent.Error.UnsupportedPlatformError: "Niewspierana platforma",
+        QBluetoothDeviceDiscoveryAgent.Error.UnsupportedDiscoveryMethod: "Niewspierana metoda wykrywania",
+        QBluetoothDeviceDiscoveryAgent.Error.LocationServiceTurnedOffError: "Usługa lokalizacji wyłączona",
+        QBluetoothDeviceDiscoveryAgent.Error.MissingPermissionsError: "Brak uprawnień",
+        QBluetoothDeviceDiscoveryAgent.Error.UnknownError: "Nieznany błąd"
+    }
+    return error_msgs.get(error, f"Nieznany błąd ({error})")
+
+
+class BackgroundJob:
+    """
+    Stan operacji wykonywanej w tle (skanowanie, łączenie). Zdarzenia są
+    zapisywane w kolejności, więc każdy subskrybent SSE może je odtworzyć
+    od początku i czekać na kolejne.
+    """
+    
+    DONE_STATES = ("finished", "error")
+    
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "pending"
+        self.started_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self.events = []
+        self._condition = threading.Condition()
+    
+    @property
+    def done(self):
+        return self.status in self.DONE_STATES
+    
+    def publish(self, event_type, data):
+        """Dodaje zdarzenie i budzi oczekujących subskrybentów"""
+        with self._condition:
+            self.events.append((event_type, data))
+            self._condition.notify_all()
+    
+    def set_status(self, status):
+        """Zmienia stan pośredni i publikuje go jako zdarzenie o tej samej nazwie"""
+        with self._condition:
+            self.status = status
+            self.events.append((status, self.to_dict()))
+            self._condition.notify_all()
+    
+    def finish(self, status, error=None):
+        # Zmiana stanu i zdarzenie końcowe pod jedną blokadą, aby subskrybent
+        # widzący zakończenie zawsze otrzymał też ostatnie zdarzenie
+        with self._condition:
+            if self.done:
+                return
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self.events.append((status, self.to_dict()))
+            self._condition.notify_all()
+    
+    def wait_events(self, index, timeout):
+        """Czeka na zdarzenia o indeksie >= index; zwraca (zdarzenia, czy_zakończone)"""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.events) > index or self.done, timeout)
+            return self.events[index:], self.done
+    
+    def wait(self, timeout=None):
+        """Czeka na zakończenie operacji; zwraca True, jeśli się zakończyła"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.done, timeout)
+    
+    def to_dict(self):
+        raise NotImplementedError
+
+
+class ScanJob(BackgroundJob):
+    """Stan pojedynczego skanowania w tle wraz z wykrytymi urządzeniami"""
+    
+    def __init__(self):
+        super().__init__()
+        self.devices = collections.OrderedDict()  # adres -> dane urządzenia
+    
+    def add_device(self, device_data, is_new):
+        """Zapisuje wykrycie; ponowne wykrycia aktualizują dane urządzenia w zadaniu"""
+        with self._condition:
+            self.devices[device_data['address']] = device_data
+        self.publish("device", {'job_id': self.id, 'device': device_data, 'new': is_new})
+    
+    def to_dict(self):
+        with self._condition:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'error': self.error,
+                'count': len(self.devices),
+                'devices': list(self.devices.values())
+            }
+
+
+class ScanManager(QObject):
+    """
+    Uruchamia skanowanie urządzeń w tle. Obiekt żyje w głównym wątku Qt,
+    a żądania z wątków Flask docierają do niego przez QtBridge,
+    więc żaden wątek HTTP nie czeka na zakończenie skanowania.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.jobs = collections.OrderedDict()
+        self.current_job = None
+        self._lock = threading.Lock()
+    
+    def start_scan(self):
+        """Rozpoczyna skanowanie (lub zwraca trwające) - można wywołać z dowolnego wątku"""
+        with self._lock:
+            if self.current_job and not self.current_job.done:
+                return self.current_job, False
+            
+            job = ScanJob()
+            self.jobs[job.id] = job
+            while len(self.jobs) > MAX_SCAN_JOBS:
+                self.jobs.popitem(last=False)
+            self.current_job = job
+        
+        qt_bridge.submit(self._start_job, job.id)
+        return job, True
+    
+    def get_job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def _start_job(self, job_id):
+        """Tworzy agenta wykrywania w wątku głównym Qt"""
+        job = self.get_job(job_id)
+        if job is None:
+            return
+        
+        add_log("Rozpoczynam skanowanie urządzeń Bluetooth (zadanie %s)...", "INFO", job.id, category="scan")
+        
+        try:
+            agent = QBluetoothDeviceDiscoveryAgent(self)
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            
+            def cleanup():
+                timer.stop()
+                timer.deleteLater()
+                agent.deleteLater()
+            
+            def on_device_discovered(device_info, *args):
+                try:
+                    # deviceDiscovered i deviceUpdated mogą wielokrotnie zgłosić to samo urządzenie
+                    device_data, is_new = device_cache.update(
+                        device_info.address().toString(),
+                        device_info.name(),
+                        device_info.rssi() or None
+                    )
+                    job.add_device(device_data, is_new)
+                    if is_new:
+                        add_log("Znaleziono: %s - %s", "INFO", device_data['name'], device_data['address'], category="scan")
+                    else:
+                        add_log("Ponownie wykryto: %s (RSSI: %s)", "DEBUG", device_data['address'], device_data['rssi'], category="scan")
+                except Exception as e:
+                    add_log("Błąd podczas przetwarzania znalezionego urządzenia: %s", "ERROR", e, category="scan")
             
-            # Przygotowanie struktury adresu
-            bt_addr = BLUETOOTH_ADDRESS()
+            def on_finished():
+                add_log("Skanowanie zakończone. Znaleziono %d urządzeń.", "INFO", len(job.devices), category="scan")
+                job.finish("finished")
+                cleanup()
             
-            # Wypełnienie adresu MAC
-            for i, b in enumerate(addr_reversed):
-                bt_addr.addr[i] = b
+            def on_error(error):
+                error_msg = discovery_error_message(error)
+                add_log("Błąd podczas skanowania: %s", "ERROR", error_msg, category="scan")
+                job.finish("error", error_msg)
+                cleanup()
             
-            # Wywołanie API do rozparowania
+            def on_timeout():
+                add_log("Timeout skanowania, zatrzymuję...", "WARNING", category="scan")
+                agent.stop()
+                job.finish("finished")
+                cleanup()
+            
+            agent.deviceDiscovered.connect(on_device_discovered)
+            agent.deviceUpdated.connect(on_device_discovered)
+            agent.finished.connect(on_finished)
+            agent.errorOccurred.connect(on_error)
+            timer.timeout.connect(on_timeout)
+            
+            job.status = "running"
+            job.publish("started", {'job_id': job.id})
+            agent.start()
+            timer.start(SCAN_TIMEOUT_MS)
+            add_log("Rozpoczęto skanowanie urządzeń Bluetooth", "DEBUG", category="scan")
+        except Exception as e:
+            add_log("Nieoczekiwany błąd podczas skanowania: %s", "ERROR", e, category="scan")
+            add_log("Stacktrace:", "DEBUG", exc_info=True, category="scan")
+            job.finish("error", str(e))
+
+
+def sse_event(event_type, data, event_id=None):
+    """Formatuje zdarzenie Server-Sent Events (z id przeglądarka wznawia strumień od Last-Event-ID)"""
+    if event_id is not None:
+        return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+def job_event_stream(job):
+    """Odpowiedź SSE odtwarzająca zdarzenia zadania w tle i czekająca na kolejne"""
+    def stream():
+        index = 0
+        while True:
+            events, done = job.wait_events(index, timeout=15)
+            if not events and not done:
+                yield ": keep-alive\n\n"
+                continue
+            for event_type, data in events:
+                yield sse_event(event_type, data)
+            index += len(events)
+            if done and index >= len(job.events):
+                break
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# ========================================
+# ROZPAROWYWANIE URZĄDZEŃ
+# ========================================
+
+def unpair_device(address_str):
+    """Rozparowuje urządzenie w systemie Windows używając BluetoothAPI poprzez ctypes"""
+    def log(message, level="INFO", *args):
+        return add_log(message, level, *args, category="bluetooth", address=address_str)
+    
+    if platform.system() != "Windows":
+        log("Rozparowywanie urządzeń nie jest obsługiwane na tym systemie", "WARNING")
+        return False
+        
+    try:
+        import ctypes
+        from ctypes import windll, byref, Structure, WinError, POINTER, c_ubyte
+        from ctypes.wintypes import BOOL, DWORD, HANDLE
+        
+        log("Używam Windows BluetoothAPI przez ctypes...", "INFO")
+        
+        # Konwersja adresu MAC do formatu potrzebnego dla API
+        try:
+            addr_bytes = bytes.fromhex(address_str.replace(":", ""))
+            addr_reversed = bytes(reversed(addr_bytes))  # Bluetooth API używa odwrotnej kolejności
+            log("Przygotowany adres w formie bajtów: %s", "DEBUG", HexDump(addr_bytes))
+        except Exception as e:
+            log("Błąd podczas konwersji adresu MAC: %s", "ERROR", e)
+            return False
+        
+        # Definicje struktur i stałych
+        class BLUETOOTH_ADDRESS(Structure):
+            _fields_ = [("addr", c_ubyte * 6)]
+        
+        # Ładowanie biblioteki i definicja funkcji
+        try:
+            bthprops = windll.LoadLibrary("bthprops.cpl")
+            BluetoothRemoveDevice = bthprops.BluetoothRemoveDevice
+            BluetoothRemoveDevice.argtypes = [POINTER(BLUETOOTH_ADDRESS)]
+            BluetoothRemoveDevice.restype = DWORD
+            log("Biblioteka bthprops.cpl załadowana pomyślnie", "DEBUG")
+        except Exception as e:
+            log("Błąd podczas ładowania biblioteki bthprops.cpl: %s", "ERROR", e)
+            return False
+        
+        # Przygotowanie struktury adresu
+        bt_addr = BLUETOOTH_ADDRESS()
+        
+        # Wypełnienie adresu MAC
+        for i, b in enumerate(addr_reversed):
+            bt_addr.addr[i] = b
+        
+        # Wywołanie API do rozparowania
+        try:
+            result = BluetoothRemoveDevice(byref(bt_addr))
+            log("BluetoothRemoveDevice zwrócił kod: %s", "DEBUG", result)
+        except Exception as e:
+            log("Błąd podczas wywołania BluetoothRemoveDevice: %s", "ERROR", e)
+            return False
+        
+        if result == 0:  # ERROR_SUCCESS
+            log("Rozparowanie zakończone sukcesem", "INFO")
+            return True
+        else:
             try:
-                result = BluetoothRemoveDevice(byref(bt_addr))
-                add_log(f"BluetoothRemoveDevice zwrócił kod: {result}", "DEBUG")
+                error_message = WinError(result).strerror
+                log("Błąd rozparowania: %s (kod %s)", "ERROR", error_message, result)
             except Exception as e:
-                add_log(f"Błąd podczas wywołania BluetoothRemoveDevice: {str(e)}", "ERROR")
+                log("Nie można uzyskać komunikatu błędu: %s", "ERROR", e)
+            return False
+    
+    except Exception as e:
+        log("Nieoczekiwany wyjątek podczas rozparowania: %s", "ERROR", e)
+        log("Stacktrace:", "DEBUG", exc_info=True)
+        return False
+
+
+# ========================================
+# ŁĄCZENIE Z URZĄDZENIAMI W TLE
+# ========================================
+
+# Czas na nawiązanie połączenia RFCOMM
+CONNECT_TIMEOUT_MS = int(os.environ.get("BT_CONNECT_TIMEOUT_MS", 10000))
+MAX_CONNECT_OPERATIONS = 20
+
+# Maksymalna liczba jednoczesnych sesji (aktywny pikonet Bluetooth obsługuje do 7 urządzeń)
+MAX_CONNECTIONS = int(os.environ.get("BT_MAX_CONNECTIONS", 7))
+
+# Adres MAC po normalizacji (wielkie litery, dwukropki)
+MAC_ADDRESS_PATTERN = re.compile(r"[0-9A-F]{2}(:[0-9A-F]{2}){5}")
+
+
+class ConnectOperation(BackgroundJob):
+    """
+    Pojedyncza próba połączenia z urządzeniem. Stany: pending -> connecting ->
+    connected | failed. Kolejne żądania dla tego samego adresu dołączają do
+    trwającej próby zamiast rozpoczynać nową.
+    """
+    
+    DONE_STATES = ("connected", "failed")
+    
+    def __init__(self, address):
+        super().__init__()
+        self.address = address
+        self.requests = 1  # Liczba żądań obsłużonych przez tę próbę
+        self.device = None
+        self.callbacks = []  # Funkcje on_result(success, error) wywoływane w wątku Qt
+    
+    def to_dict(self):
+        with self._condition:
+            return {
+                'operation_id': self.id,
+                'address': self.address,
+                'status': self.status,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'error': self.error,
+                'requests': self.requests,
+                'device': self.device
+            }
+
+
+# Automatyczne ponowne łączenie (domyślnie wyłączone, włączane dla urządzenia przez API)
+AUTO_RECONNECT = os.environ.get("BT_AUTO_RECONNECT", "0").lower() in ("1", "true", "yes", "on")
+RECONNECT_BASE_DELAY_MS = int(os.environ.get("BT_RECONNECT_BASE_DELAY_MS", 1000))
+RECONNECT_MAX_DELAY_MS = int(os.environ.get("BT_RECONNECT_MAX_DELAY_MS", 30000))
+RECONNECT_MAX_ATTEMPTS = int(os.environ.get("BT_RECONNECT_MAX_ATTEMPTS", 10))
+
+# Limit danych zapamiętanych do wysłania w czasie przerwy w połączeniu
+RECONNECT_QUEUE_BYTES = int(os.environ.get("BT_RECONNECT_QUEUE_BYTES", 65536))
+
+
+class ReconnectSupervisor(QObject):
+    """
+    Nadzoruje sesję jednego urządzenia: po nieoczekiwanym rozłączeniu ponawia
+    łączenie z wykładniczo rosnącym, losowo skracanym odstępem (do limitu prób).
+    Dane wysyłane w czasie przerwy są kolejkowane (z limitem rozmiaru)
+    i wysyłane po odzyskaniu połączenia. Rozłączenie na żądanie użytkownika
+    nie uruchamia ponownego łączenia. Obiekt żyje w wątku Qt.
+    """
+    
+    def __init__(self, manager, client, enabled=AUTO_RECONNECT):
+        super().__init__(client)
+        self.manager = manager
+        self.client = client
+        self.address = client.target_address
+        self.enabled = enabled
+        self.max_attempts = RECONNECT_MAX_ATTEMPTS
+        self.state = "idle"  # idle | waiting | connecting | gave_up
+        self.attempts = 0
+        self.next_attempt_at = None
+        self._armed = False  # Połączenie zostało nawiązane i nie zamknięto go na żądanie
+        self._queue = collections.deque()
+        self._queued_bytes = 0
+        
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._attempt)
+        
+        client.connected.connect(self._on_connected)
+        client.disconnected.connect(self._on_disconnected)
+    
+    @property
+    def active(self):
+        """Czy trwa przywracanie połączenia"""
+        return self.state in ("waiting", "connecting")
+    
+    def configure(self, enabled=None, max_attempts=None):
+        if max_attempts is not None:
+            self.max_attempts = max_attempts
+        if enabled is not None:
+            self.enabled = enabled
+            if not enabled:
+                self.cancel("wyłączono automatyczne łączenie")
+    
+    def user_disconnect(self):
+        """Rozłączenie na żądanie - nie przywracaj połączenia"""
+        self._armed = False
+        self.cancel("rozłączono na żądanie")
+    
+    def cancel(self, reason):
+        if not self.active:
+            return
+        self.client._log("Przerwano ponowne łączenie: %s", "INFO", reason)
+        self._timer.stop()
+        self.state = "idle"
+        self.next_attempt_at = None
+        self._drop_queue()
+    
+    def enqueue(self, data):
+        """Zapamiętuje dane do wysłania po odzyskaniu połączenia; zwraca False przy przepełnieniu"""
+        if isinstance(data, str):
+            # Zapamiętywane są gotowe bajty, aby limit liczył rzeczywisty rozmiar danych
+            try:
+                data = parse_hex_payload(data)
+            except ValueError as e:
+                self.client._log("Nieprawidłowe dane HEX - nie zakolejkowano: %s", "ERROR", e)
                 return False
+        size = len(data)
+        if self._queued_bytes + size > RECONNECT_QUEUE_BYTES:
+            self.client._log("Kolejka danych na czas przerwy jest pełna (%d B) - odrzucono %d B", "WARNING",
+                             self._queued_bytes, size)
+            return False
+        self._queue.append(data)
+        self._queued_bytes += size
+        self.client._log("Brak połączenia - zakolejkowano %d B do wysłania po jego przywróceniu", "DEBUG", size)
+        return True
+    
+    def _drop_queue(self):
+        if self._queue:
+            self.client._log("Odrzucono %d zakolejkowanych wiadomości", "WARNING", len(self._queue))
+        self._queue.clear()
+        self._queued_bytes = 0
+    
+    def _on_connected(self):
+        self._armed = True
+        self._timer.stop()
+        if self.attempts:
+            self.client._log("Przywrócono połączenie (próba %d)", "INFO", self.attempts)
+        self.state = "idle"
+        self.attempts = 0
+        self.next_attempt_at = None
+        
+        # Wyślij dane zebrane w czasie przerwy w kolejności ich nadejścia
+        if self._queue:
+            self.client._log("Wysyłanie %d zakolejkowanych wiadomości (%d B)", "INFO",
+                             len(self._queue), self._queued_bytes)
+            while self._queue:
+                self.client.send_data(self._queue.popleft())
+            self._queued_bytes = 0
+    
+    def _on_disconnected(self):
+        # Sprawdzenie odroczone - ponowne łączenie sesji na żądanie też zgłasza rozłączenie
+        QTimer.singleShot(0, self._after_disconnected)
+    
+    def _after_disconnected(self):
+        if not (self.enabled and self._armed) or self.active or self.client.is_connected or self.client.connecting:
+            return
+        self.client._log("Utracono połączenie - uruchamiam ponowne łączenie", "WARNING")
+        self._schedule()
+    
+    def _schedule(self):
+        if self.attempts >= self.max_attempts:
+            self.client._log("Nie udało się przywrócić połączenia po %d próbach", "ERROR", self.attempts)
+            self.state = "gave_up"
+            self.next_attempt_at = None
+            self._armed = False
+            self._drop_queue()
+            return
+        
+        # Wykładniczy odstęp z losowym skróceniem do połowy, aby stacje nie łączyły się jednocześnie
+        delay = min(RECONNECT_MAX_DELAY_MS, RECONNECT_BASE_DELAY_MS * 2 ** self.attempts)
+        delay = int(delay * random.uniform(0.5, 1.0))
+        self.state = "waiting"
+        self.next_attempt_at = time.time() + delay / 1000
+        self.client._log("Kolejna próba połączenia za %d ms", "DEBUG", delay)
+        self._timer.start(delay)
+    
+    def _attempt(self):
+        self.attempts += 1
+        self.state = "connecting"
+        self.client._log("Próba ponownego połączenia %d/%d", "INFO", self.attempts, self.max_attempts)
+        self.manager.start_connect(self.address, on_result=self._on_attempt_result)
+    
+    def _on_attempt_result(self, success, error):
+        # Sukces obsługuje _on_connected
+        if success or self.state != "connecting":
+            return
+        self.client._log("Próba ponownego połączenia nieudana: %s", "WARNING", error)
+        self._schedule()
+    
+    def to_dict(self):
+        return {
+            'enabled': self.enabled,
+            'state': self.state,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'next_attempt_at': self.next_attempt_at,
+            'queued_messages': len(self._queue),
+            'queued_bytes': self._queued_bytes
+        }
+
+
+class ConnectionManager:
+    """
+    Sesje Bluetooth (BluetoothConsoleClient) kluczowane adresem urządzenia oraz
+    operacje łączenia z nimi. Klienci są tworzeni i wywoływani wyłącznie w wątku Qt;
+    wątki Flask rejestrują operacje i zlecają pracę przez QtBridge.
+    """
+    
+    def __init__(self):
+        self.sessions = collections.OrderedDict()  # adres -> BluetoothConsoleClient
+        self.supervisors = {}  # adres -> ReconnectSupervisor
+        self.operations = collections.OrderedDict()
+        self.active = {}  # adres -> trwająca operacja łączenia
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(address):
+        return address.strip().upper()
+    
+    @classmethod
+    def is_valid_address(cls, address):
+        return bool(MAC_ADDRESS_PATTERN.fullmatch(cls.normalize(address)))
+    
+    def get_session(self, address):
+        with self._lock:
+            return self.sessions.get(self.normalize(address))
+    
+    def clients(self):
+        with self._lock:
+            return list(self.sessions.values())
+    
+    def connected_addresses(self):
+        with self._lock:
+            return [address for address, client in self.sessions.items() if client.is_connected]
+    
+    def resolve_address(self, address=None):
+        """
+        Zwraca adres docelowy żądania. Bez podanego adresu wybiera jedyne połączone
+        (lub przywracane) urządzenie; przy braku połączeń lub kilku połączeniach
+        zgłasza ValueError.
+        """
+        if address:
+            return self.normalize(address)
+        connected = self.connected_addresses()
+        if not connected:
+            # W czasie przywracania połączenia dane trafią do kolejki nadzorcy
+            with self._lock:
+                connected = [a for a, supervisor in self.supervisors.items() if supervisor.active]
+        if not connected:
+            raise ValueError("Brak aktywnego połączenia")
+        if len(connected) > 1:
+            raise ValueError("Połączono z kilkoma urządzeniami - podaj adres urządzenia")
+        return connected[0]
+    
+    def sessions_info(self):
+        """Stan wszystkich sesji dla odpowiedzi JSON"""
+        with self._lock:
+            return [self._session_dict(address, client) for address, client in self.sessions.items()]
+    
+    def session_info(self, address):
+        """Stan jednej sesji (None, jeśli nie istnieje)"""
+        address = self.normalize(address)
+        with self._lock:
+            client = self.sessions.get(address)
+            return self._session_dict(address, client) if client else None
+    
+    def _session_dict(self, address, client):
+        return {
+            'address': address,
+            'connected': client.is_connected,
+            'connecting': client.connecting,
+            'last_error': client.last_error or None,
+            'reconnect': self.supervisors[address].to_dict(),
+            'tx': client.tx.stats(),
+            'framing': client.framer.settings(),
+            'rx': client.rx_stream.stats(),
+            'transactions': client.transaction_stats()
+        }
+    
+    def start_connect(self, address, on_result=None):
+        """
+        Rozpoczyna łączenie (lub dołącza do trwającego) - można wywołać z dowolnego wątku.
+        Opcjonalne on_result(success, error) zostanie wywołane w wątku Qt.
+        """
+        address = self.normalize(address)
+        with self._lock:
+            operation = self.active.get(address)
+            if operation and not operation.done:
+                with operation._condition:
+                    operation.requests += 1
+                    if on_result:
+                        operation.callbacks.append(on_result)
+                return operation, False
             
-            if result == 0:  # ERROR_SUCCESS
-                add_log("Rozparowanie zakończone sukcesem", "INFO")
-                return True
-            else:
-                try:
-                    error_message = WinError(result).strerror
-                    add_log(f"Błąd rozparowania: {error_message} (kod {result})", "ERROR")
-                except Exception as e:
-                    add_log(f"Nie można uzyskać komunikatu błędu: {str(e)}", "ERROR")
-                return False
+            operation = ConnectOperation(address)
+            if on_result:
+                operation.callbacks.append(on_result)
+            self.operations[operation.id] = operation
+            while len(self.operations) > MAX_CONNECT_OPERATIONS:
+                self.operations.popitem(last=False)
+            self.active[address] = operation
+        
+        qt_bridge.submit(self._start_operation, operation)
+        return operation, True
+    
+    def get_operation(self, operation_id):
+        with self._lock:
+            return self.operations.get(operation_id)
+    
+    def session_for(self, address):
+        """Zwraca sesję urządzenia, tworząc ją w razie potrzeby (wątek Qt)"""
+        address = self.normalize(address)
+        stale = None
+        with self._lock:
+            client = self.sessions.get(address)
+            if client is not None:
+                self.sessions.move_to_end(address)
+                return client
+            
+            # Przy limicie zwolnij najdawniej używaną nieaktywną sesję
+            if len(self.sessions) >= MAX_CONNECTIONS:
+                idle = [a for a, c in self.sessions.items()
+                        if not c.is_connected and not c.connecting and not self.supervisors[a].active]
+                if not idle:
+                    raise RuntimeError(f"Osiągnięto limit {MAX_CONNECTIONS} jednoczesnych połączeń")
+                stale = self.sessions.pop(idle[0])
+                del self.supervisors[idle[0]]
         
+        if stale is not None:
+            stale.close()
+            stale.deleteLater()
+        
+        client = BluetoothConsoleClient(address)
+        supervisor = ReconnectSupervisor(self, client)
+        client.connected.connect(lambda: self._publish_status(address))
+        client.disconnected.connect(lambda: self._publish_status(address))
+        with self._lock:
+            self.sessions[address] = client
+            self.supervisors[address] = supervisor
+        add_log("Utworzono sesję dla urządzenia %s (sesji: %d)", "DEBUG", address, len(self.sessions),
+                category="bluetooth", address=address)
+        return client
+    
+    def _publish_status(self, address):
+        """Publikuje zmianę stanu połączenia w kanale statusu"""
+        status_channel.publish("connection", {
+            'address': address,
+            'connected': address in self.connected_addresses(),
+            'addresses': self.connected_addresses(),
+            'session': self.session_info(address)
+        })
+    
+    def _start_operation(self, operation):
+        """Rozpoczyna łączenie w wątku Qt"""
+        try:
+            client = self.session_for(operation.address)
         except Exception as e:
-            add_log(f"Nieoczekiwany wyjątek podczas rozparowania: {str(e)}", "ERROR")
-            add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+            add_log("Nie można utworzyć sesji: %s", "ERROR", e, category="bluetooth", address=operation.address)
+            self._on_result(operation, False, str(e))
+            return
+        
+        operation.set_status("connecting")
+        client.start_connection(operation.address,
+                                lambda success, error: self._on_result(operation, success, error))
+    
+    def disconnect(self, address, policy=None):
+        """Rozłącza jedno urządzenie (wątek Qt); poza polityką reset pozostałe połączenia są nienaruszone"""
+        client = self.get_session(address)
+        supervisor = self.supervisors.get(self.normalize(address))
+        if supervisor is not None:
+            supervisor.user_disconnect()
+        if client is None or not client.is_connected:
             return False
-
-    def disconnect(self):
+        return client.disconnect(policy)
+    
+    def queue_chunk(self, address, chunk):
         """
-        Zmodyfikowana metoda disconnect, która po rozłączeniu wywołuje niezależną funkcję
-        resetującą Bluetooth.
+        Wstawia porcję transferu do kolejki nadawczej, jeśli się w niej zmieści (wątek Qt).
+        Zwraca (stan, głębokość_kolejki), gdzie stan to queued, full lub disconnected.
         """
-        if not hasattr(self, 'socket') or not self.socket:
-            add_log("Brak inicjalizowanego socketu", "WARNING")
-            self.is_connected = False
-            return False
-                
-        if self.socket.state() == QBluetoothSocket.SocketState.ConnectedState:
-            add_log("Rozłączanie...", "INFO")
-            
+        client = self.get_session(address)
+        if client is None or not client.is_connected:
+            return "disconnected", 0
+        tx = client.tx
+        if not tx.enqueue(chunk):
+            return "full", tx.depth
+        return "queued", tx.depth
+    
+    def transmit_depth(self, address):
+        """Bajty oczekujące w kolejce nadawczej lub None bez połączenia (wątek Qt)"""
+        client = self.get_session(address)
+        if client is None or not client.is_connected:
+            return None
+        return client.tx.depth
+    
+    def watch_drain(self, address, callback, enabled=True):
+        """Dodaje lub usuwa funkcję wywoływaną po opróżnieniu kolejki nadawczej (wątek Qt)"""
+        client = self.get_session(address)
+        if client is None:
+            return
+        if enabled:
+            client.tx.drain_callbacks.append(callback)
+        elif callback in client.tx.drain_callbacks:
+            client.tx.drain_callbacks.remove(callback)
+    
+    def transact(self, address, requests):
+        """
+        Wysyła żądania jedno za drugim bez czekania na odpowiedzi (wątek Qt).
+        requests to lista krotek (dane, dopasowanie, limit_ms); zwraca listę Future.
+        """
+        client = self.get_session(address)
+        if client is None:
+            return [failed_future(ConnectionError("Brak połączenia z urządzeniem")) for _ in requests]
+        return [client.transact(data, matcher, timeout_ms) for data, matcher, timeout_ms in requests]
+    
+    def send(self, address, data):
+        """
+        Wysyła dane do jednego urządzenia (wątek Qt). W czasie przywracania
+        połączenia dane trafiają do kolejki nadzorcy i zostaną wysłane później.
+        """
+        client = self.get_session(address)
+        if client is not None and client.is_connected:
+            return client.send_data(data)
+        supervisor = self.supervisors.get(self.normalize(address))
+        if supervisor is not None and supervisor.active:
+            return supervisor.enqueue(data)
+        add_log("Nie można wysłać danych - brak połączenia", "WARNING", category="bluetooth", address=address)
+        return False
+    
+    def reconnect_info(self, address):
+        """Stan ponownego łączenia bez tworzenia sesji; None, gdy sesji nie ma (wątek Qt)"""
+        with self._lock:
+            supervisor = self.supervisors.get(self.normalize(address))
+        return supervisor.to_dict() if supervisor is not None else None
+    
+    def configure_reconnect(self, address, enabled=None, max_attempts=None):
+        """
+        Włącza lub wyłącza automatyczne ponowne łączenie urządzenia (wątek Qt).
+        Sesja jest tworzona tylko przy włączaniu; bez sesji zwraca None.
+        """
+        if enabled:
+            self.session_for(address)
+        with self._lock:
+            supervisor = self.supervisors.get(self.normalize(address))
+        if supervisor is None:
+            return None
+        supervisor.configure(enabled, max_attempts)
+        return supervisor.to_dict()
+    
+    def send_many(self, addresses, data):
+        """
+        Wysyła te same dane do wielu urządzeń (wątek Qt). Zapis do socketu tylko
+        kolejkuje dane, więc transmisje do wszystkich urządzeń przebiegają równolegle.
+        """
+        return {address: self.send(address, data) for address in addresses}
+    
+    def _on_result(self, operation, success, error):
+        with self._lock:
+            if self.active.get(operation.address) is operation:
+                del self.active[operation.address]
+        
+        if success:
+            operation.device = self._describe_device(operation.address)
+            operation.finish("connected")
+        else:
+            operation.finish("failed", error or "Nie udało się połączyć")
+        
+        for callback in operation.callbacks:
             try:
-                self.socket.disconnectFromService()
-                add_log("Wywołano disconnectFromService", "DEBUG")
+                callback(success, error)
             except Exception as e:
-                add_log(f"Błąd podczas disconnectFromService: {str(e)}", "ERROR")
+                add_log("Błąd w obsłudze wyniku połączenia: %s", "ERROR", e, category="bluetooth",
+                        address=operation.address)
+    
+    def _describe_device(self, address):
+        """Dane połączonego urządzenia z pamięci podręcznych (bez odpytywania systemu)"""
+        device_info = {
+            'name': 'Nieznane urządzenie',
+            'address': address,
+            'connected': True,
+            'type': 'other'
+        }
+        try:
+            matching_device = paired_device_cache.lookup(address) or device_cache.get(address)
             
-            # Poczekaj na rozłączenie
-            timeout = 0
-            add_log("Oczekiwanie na rozłączenie...", "DEBUG")
-            while (self.socket.state() != QBluetoothSocket.SocketState.UnconnectedState and 
-                    timeout < 30):
-                QCoreApplication.processEvents()
-                time.sleep(0.1)
-                timeout += 1
-                    
-            self.is_connected = False
-            self.connected_device_address = None
-            global connected_device_address
-            connected_device_address = None
-
-            # Zamiast próbować resetować Bluetooth w metodzie, wywołaj dedykowaną funkcję
-            reset_success = reset_bluetooth()
-            if not reset_success:
-                add_log("Resetowanie Bluetooth nie powiodło się - sprawdź logi", "WARNING")
+            if matching_device:
+                device_info['name'] = matching_device.get('name', 'Nieznane urządzenie')
+            else:
+                # Urządzenie spoza listy sparowanych - połączenie mogło je właśnie sparować
+                paired_device_cache.invalidate(f"nowe urządzenie {address}")
+        except Exception as e:
+            add_log("Błąd podczas pobierania informacji o urządzeniu: %s", "ERROR", e, category="bluetooth")
+        return device_info
+
+
+def parse_windows_pnp_devices(devices_raw):
+    """Zamienia wynik Get-PnpDevice (lista obiektów JSON) na listę urządzeń"""
+    system_devices = []
+    if not devices_raw:
+        return system_devices
+    
+    # PowerShell może zwrócić pojedynczy obiekt zamiast tablicy, jeśli jest tylko jedno urządzenie
+    if not isinstance(devices_raw, list):
+        devices_raw = [devices_raw]
+    
+    # Parse each device and extract MAC address
+    for device in devices_raw:
+        # DeviceID format: BTHENUM\{0000110E-0000-1000-8000-00805F9B34FB}_VID&0001000F_PID&0002\7&33B46D3E&0&98:DA:F0:00:A7:01_C00000000
+        # Wyciągnij adres MAC z DeviceID (ostatnie 17 znaków przed _C00000000)
+        mac_address = None
+        
+        if 'DeviceID' in device and device['DeviceID']:
+            match = re.search(r'([0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2})', 
+                              device['DeviceID'], re.IGNORECASE)
             
-            # Jeśli socket nadal nie jest rozłączony, utwórz nowy
-            if self.socket.state() != QBluetoothSocket.SocketState.UnconnectedState:
-                add_log("Rozłączenie nie powiodło się, tworzę nowy socket...", "WARNING")
-                self._create_socket()
-                
-            return True
+            if match:
+                mac_address = match.group(1)
+        
+        if mac_address and 'FriendlyName' in device:
+            system_devices.append({
+                'name': device['FriendlyName'],
+                'address': mac_address,
+                'status': device.get('Status', 'Unknown'),
+                'connected': False  # Ustawiane przy odczycie z pamięci podręcznej
+            })
+    return system_devices
+
+
+def parse_macos_profiler_devices(data):
+    """Zamienia wynik system_profiler SPBluetoothDataType -json na listę urządzeń"""
+    system_devices = []
+    bluetooth_data = data.get('SPBluetoothDataType', [{}])[0]
+    devices_data = bluetooth_data.get('device_title', {})
+    
+    for device_name, device_info in devices_data.items():
+        if 'device_address' in device_info:
+            system_devices.append({
+                'name': device_name,
+                'address': device_info['device_address'],
+                'status': 'Connected' if device_info.get('device_isconnected', False) else 'Not Connected',
+                'connected': device_info.get('device_isconnected', False)
+            })
+    return system_devices
+
+
+def parse_device_list(data):
+    """Dane są już listą urządzeń w formacie aplikacji (np. skrypt zastępczy do testów)"""
+    return [{
+        'name': device.get('name', 'Nieznane urządzenie'),
+        'address': device['address'],
+        'status': device.get('status', 'Unknown'),
+        'connected': device.get('connected', False)
+    } for device in (data or [])]
+
+
+# Skrypt PowerShell działający w pętli: jedna linia JSON z żądaniem na wejściu,
+# jedna linia JSON z odpowiedzią na wyjściu
+WINDOWS_ENUMERATOR_SCRIPT = (
+    "[Console]::OutputEncoding = [System.Text.Encoding]::UTF8; "
+    "while (($line = [Console]::In.ReadLine()) -ne $null) { "
+    "$request = $line | ConvertFrom-Json; "
+    "try { "
+    "$devices = @(Get-PnpDevice -Class Bluetooth | Where-Object { $_.FriendlyName -notlike '*Radio*' } | Select-Object FriendlyName, DeviceID, Status); "
+    "$response = @{ id = $request.id; data = $devices } "
+    "} catch { $response = @{ id = $request.id; error = $_.Exception.Message } }; "
+    "[Console]::Out.WriteLine(($response | ConvertTo-Json -Compress -Depth 4)); "
+    "[Console]::Out.Flush() "
+    "}"
+)
+
+# Na macOS system_profiler nie ma trybu ciągłego - powłoka oszczędza start procesu pośredniczącego
+MACOS_ENUMERATOR_SCRIPT = (
+    "while IFS= read -r line; do "
+    "printf '{\"data\":'; system_profiler SPBluetoothDataType -json 2>/dev/null | tr -d '\\n'; printf '}\\n'; "
+    "done"
+)
+
+# Polecenie i parser wyniku dla każdego systemu
+ENUMERATOR_BACKENDS = {
+    "Windows": (["powershell", "-NoLogo", "-NoProfile", "-NonInteractive", "-Command", WINDOWS_ENUMERATOR_SCRIPT], "windows"),
+    "Darwin": (["/bin/sh", "-c", MACOS_ENUMERATOR_SCRIPT], "macos")
+}
+
+ENUMERATOR_PARSERS = {
+    "windows": parse_windows_pnp_devices,
+    "macos": parse_macos_profiler_devices,
+    "devices": parse_device_list
+}
+
+
+class EnumeratorWorker:
+    """
+    Długo działający proces pomocniczy do pobierania sparowanych urządzeń.
+    Protokół: żądanie {"id": N, "command": "list_paired"} w jednej linii na stdin,
+    odpowiedź {"id": N, "data": ...} lub {"id": N, "error": "..."} w jednej linii na stdout.
+    Proces jest uruchamiany ponownie, jeśli się zakończy lub przestanie odpowiadać.
+    """
+    
+    def __init__(self, command, parser, timeout=15.0):
+        self.command = command
+        self.parser = parser
+        self.timeout = timeout
+        self.restarts = 0
+        self._process = None
+        self._responses = None
+        self._next_id = 1
+        self._lock = threading.Lock()
+    
+    def _start(self):
+        # Wcześniejsze żądania oznaczają, że proces już kiedyś działał
+        if self._next_id > 1:
+            self.restarts += 1
+            add_log("Restart procesu pomocniczego (restart nr %d)", "WARNING", self.restarts, category="system")
         else:
-            add_log(f"Socket nie jest w stanie połączonym (aktualny stan: {self.socket.state()})", "WARNING")
-        return False
+            add_log("Uruchamianie procesu pomocniczego: %s", "DEBUG", self.command[0], category="system")
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", bufsize=1,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        # Odczyt w osobnych wątkach - readline() na potokach nie ma limitu czasu
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_stdout, args=(self._process, self._responses),
+                         name="enumerator-stdout", daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self._process,),
+                         name="enumerator-stderr", daemon=True).start()
     
-    def send_data(self, data):
-        """Wysyła dane do urządzenia"""
-        if not self.is_connected:
-            add_log("Nie można wysłać danych - brak połączenia", "WARNING")
-            return False
-        
-        try:
-            if isinstance(data, str):
-                # Jeśli to string, zakładamy że to hex
-                if data.startswith("0x"):
-                    data = data[2:]
+    @staticmethod
+    def _read_stdout(process, responses):
+        for line in process.stdout:
+            responses.put(line)
+        responses.put(None)  # Koniec strumienia - proces zakończył działanie
+    
+    @staticmethod
+    def _read_stderr(process):
+        for line in process.stderr:
+            if line.strip():
+                add_log("Proces pomocniczy: %s", "DEBUG", line.rstrip(), category="system")
+    
+    def _read_response(self, request_id):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                line = self._responses.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                raise TimeoutError("Przekroczono czas oczekiwania na odpowiedź procesu pomocniczego")
+            if line is None:
+                raise OSError("Proces pomocniczy zakończył działanie")
+            line = line.strip()
+            if not line:
+                continue
+            response = json.loads(line)
+            # Spóźniona odpowiedź na wcześniejsze żądanie (po przekroczeniu czasu)
+            if response.get('id', request_id) != request_id:
+                continue
+            return response
+    
+    def request(self, command="list_paired"):
+        """Wysyła żądanie i zwraca sparsowaną odpowiedź; przy awarii raz restartuje proces"""
+        with self._lock:
+            last_error = None
+            for attempt in range(2):
+                if self._process is None or self._process.poll() is not None:
+                    self._start()
                 
-                add_log(f"Konwersja danych HEX: {data}", "DEBUG")
-                data = bytes.fromhex(data)
-            
-            if not isinstance(data, (bytes, bytearray)):
-                add_log("Nieprawidłowy typ danych - wymagane bytes lub hex string", "ERROR")
-                return False
+                request_id = self._next_id
+                self._next_id += 1
+                try:
+                    self._process.stdin.write(json.dumps({'id': request_id, 'command': command}) + "\n")
+                    self._process.stdin.flush()
+                    response = self._read_response(request_id)
+                except (OSError, TimeoutError, ValueError) as e:
+                    last_error = e
+                    add_log("Błąd komunikacji z procesem pomocniczym: %s", "WARNING", e, category="system")
+                    self.stop()
+                    continue
+                
+                if 'error' in response:
+                    raise RuntimeError(response['error'])
+                return self.parser(response.get('data'))
             
-            add_log(f"Wysyłanie {len(data)} bajtów: 0x{data.hex().upper()}", "DEBUG")
-            bytes_written = self.socket.write(data)
-            add_log(f"Wysłano {bytes_written} bajtów: 0x{data.hex().upper()}", "INFO")
-            return bytes_written > 0
-        except Exception as e:
-            add_log(f"Błąd podczas wysyłania danych: {str(e)}", "ERROR")
-            add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
-            return False
+            raise RuntimeError(f"Proces pomocniczy nie odpowiada: {last_error}")
     
-    def _on_connected(self):
-        """Handler połączenia"""
-        add_log("Połączono z urządzeniem!", "INFO")
-        self.is_connected = True
-        self.connected.emit()
+    def stop(self):
+        """Zamyka proces pomocniczy"""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=1)
+        except Exception:
+            process.kill()
+            try:
+                process.wait(timeout=1)
+            except Exception:
+                pass
+
+
+def create_enumerator_worker():
+    """
+    Tworzy proces pomocniczy dla bieżącego systemu. Zmienna BT_ENUMERATOR_COMMAND
+    pozwala podać własne polecenie (np. skrypt zastępczy na Linuksie), a
+    BT_ENUMERATOR_PARSER format jego odpowiedzi: windows, macos lub devices (domyślny).
+    """
+    custom_command = os.environ.get("BT_ENUMERATOR_COMMAND")
+    if custom_command:
+        command = shlex.split(custom_command, posix=os.name != "nt")
+        parser_name = os.environ.get("BT_ENUMERATOR_PARSER", "devices")
+    elif platform.system() in ENUMERATOR_BACKENDS:
+        command, parser_name = ENUMERATOR_BACKENDS[platform.system()]
+    else:
+        return None
     
-    def _on_disconnected(self):
-        """Handler rozłączenia"""
-        add_log("Rozłączono z urządzeniem", "INFO")
-        self.is_connected = False
-        self.connected_device_address = None
-        global connected_device_address
-        connected_device_address = None
-        self.disconnected.emit()
+    worker = EnumeratorWorker(command, ENUMERATOR_PARSERS[parser_name])
+    atexit.register(worker.stop)
+    return worker
+
+
+enumerator_worker = None
+
+
+def enumerate_system_paired_devices():
+    """
+    Pobiera sparowane urządzenia z systemu operacyjnego przez proces pomocniczy.
+    Korzysta z niego wyłącznie PairedDeviceCache w wątku odświeżającym.
+    """
+    global enumerator_worker
+    if enumerator_worker is None:
+        enumerator_worker = create_enumerator_worker()
+        if enumerator_worker is None:
+            add_log("Niewspierany system operacyjny: %s", "ERROR", platform.system(), category="system")
+            return []
+    
+    system_devices = enumerator_worker.request("list_paired")
+    add_log("Znaleziono %d sparowanych urządzeń z systemu", "INFO", len(system_devices), category="system")
+    return system_devices
+
+
+# Interwał (s) cyklicznego odświeżania listy sparowanych urządzeń
+PAIRED_REFRESH_INTERVAL = float(os.environ.get("BT_PAIRED_REFRESH_INTERVAL", 60))
+
+
+class PairedDeviceCache:
+    """
+    Pamięć podręczna sparowanych urządzeń systemu. Lista jest odświeżana
+    w wątku w tle co refresh_interval sekund oraz natychmiast po invalidate()
+    (np. po rozparowaniu lub sparowaniu urządzenia). Odczyt zwraca dane z pamięci.
+    """
+    
+    def __init__(self, enumerate_func, refresh_interval=PAIRED_REFRESH_INTERVAL):
+        self._enumerate = enumerate_func
+        self.refresh_interval = refresh_interval
+        self._devices = []
+        self._by_address = {}
+        self.updated_at = None
+        self.last_error = None
+        self.stale = True
+        self.refreshing = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._loaded = threading.Event()
+        self._thread = None
+        self.change_callbacks = []  # Wywoływane po zmianie listy urządzeń
+    
+    def start(self):
+        """Uruchamia wątek odświeżający"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="paired-devices-refresh", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            self.refresh()
+            self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
     
-    def _on_ready_read(self):
-        """Handler odebrania danych"""
+    def refresh(self):
+        """Pobiera listę z systemu i podmienia zawartość pamięci podręcznej"""
+        self.refreshing = True
         try:
-            data = self.socket.readAll().data()
-            hex_data = data.hex().upper()
-            add_log(f"Odebrano dane: 0x{hex_data} ({len(data)} bajtów)", "INFO")
-            
-            # Próba dekodowania ASCII
-            try:
-                ascii_data = data.decode('ascii')
-                if any(32 <= ord(c) <= 126 for c in ascii_data):
-                    printable = ''.join(c if 32 <= ord(c) <= 126 else '.' for c in ascii_data)
-                    add_log(f"ASCII: {printable}", "INFO")
-            except UnicodeDecodeError:
-                pass
-                
-            self.message_received.emit(data)
+            devices = self._enumerate()
+            with self._lock:
+                changed = devices != self._devices
+                self._devices = devices
+                self._by_address = {device['address'].upper(): device for device in devices}
+                self.updated_at = time.time()
+                self.last_error = None
+                self.stale = False
+            if changed:
+                for callback in self.change_callbacks:
+                    callback()
         except Exception as e:
-            add_log(f"Błąd podczas odczytu danych: {str(e)}", "ERROR")
+            self.last_error = str(e)
+            add_log("Nieoczekiwany błąd podczas pobierania sparowanych urządzeń: %s", "ERROR", e, category="system")
+            add_log("Stacktrace:", "DEBUG", exc_info=True, category="system")
+        finally:
+            self.refreshing = False
+            self._loaded.set()
     
-    def _on_socket_error(self, error):
-        """Handler błędu socket'u"""
-        error_messages = {
-            QBluetoothSocket.SocketError.NoSocketError: "Brak błędu",
-            QBluetoothSocket.SocketError.HostNotFoundError: "Nie znaleziono hosta",
-            QBluetoothSocket.SocketError.ServiceNotFoundError: "Nie znaleziono usługi",
-            QBluetoothSocket.SocketError.NetworkError: "Błąd sieci",
-            QBluetoothSocket.SocketError.UnsupportedProtocolError: "Nieobsługiwany protokół",
-            QBluetoothSocket.SocketError.OperationError: "Błąd operacji",
-            QBluetoothSocket.SocketError.RemoteHostClosedError: "Zdalny host zamknął połączenie",
-            QBluetoothSocket.SocketError.MissingPermissionsError: "Brak uprawnień",
-            QBluetoothSocket.SocketError.UnknownSocketError: "Nieznany błąd"
+    def invalidate(self, reason=""):
+        """Oznacza dane jako nieaktualne i zleca natychmiastowe odświeżenie w tle"""
+        self.stale = True
+        add_log("Odświeżanie listy sparowanych urządzeń: %s", "DEBUG", reason or "żądanie", category="system")
+        self._wakeup.set()
+    
+    def wait_loaded(self, timeout):
+        """Czeka na pierwsze pobranie listy (tylko tuż po starcie aplikacji)"""
+        if self._thread is None:
+            return self._loaded.is_set()
+        return self._loaded.wait(timeout)
+    
+    def devices(self):
+        """Zwraca kopię listy urządzeń"""
+        with self._lock:
+            return [dict(device) for device in self._devices]
+    
+    def lookup(self, address):
+        """Zwraca dane sparowanego urządzenia w czasie O(1) lub None"""
+        with self._lock:
+            device = self._by_address.get(address.upper())
+            return dict(device) if device else None
+    
+    def metadata(self):
+        """Informacje o świeżości danych dla odpowiedzi JSON"""
+        return {
+            'updated_at': self.updated_at,
+            'age': round(time.time() - self.updated_at, 1) if self.updated_at else None,
+            'stale': self.stale,
+            'refreshing': self.refreshing,
+            'refresh_interval': self.refresh_interval,
+            'error': self.last_error
         }
-        
-        error_message = error_messages.get(error, f"Nieznany błąd ({error})")
-        self.last_error = error_message
-        self.connection_error = True
-        add_log(f"Błąd socket'u: {error_message}", "ERROR")
-        self.error_occurred.emit(error_message)
+
+
+paired_device_cache = PairedDeviceCache(enumerate_system_paired_devices)
+
+
+def get_system_paired_devices():
+    """Zwraca sparowane urządzenia z pamięci podręcznej z aktualnym stanem połączenia"""
+    system_devices = paired_device_cache.devices()
+    connected_addresses = set(connection_manager.connected_addresses()) if connection_manager else set()
     
-    def _connection_timeout(self, loop):
-        """Handler timeoutu połączenia"""
-        if not self.is_connected and not self.connection_error:
-            add_log("Timeout połączenia", "WARNING")
-            loop.quit()
+    for device in system_devices:
+        if device['address'].upper() in connected_addresses:
+            device['connected'] = True
     
-    def _stop_connection_wait(self, loop, timer):
-        """Zatrzymuje oczekiwanie na połączenie po sukcesie"""
-        timer.stop()
-        loop.quit()
+    # Dodatkowe zabezpieczenie - połączone urządzenia spoza listy sparowanych
+    listed = {device['address'].upper() for device in system_devices}
+    for address in sorted(connected_addresses - listed):
+        system_devices.append({
+            'name': 'Urządzenie Bluetooth',
+            'address': address,
+            'status': 'Connected',
+            'connected': True
+        })
     
-    def _connection_error(self, loop, timer, error):
-        """Zatrzymuje oczekiwanie na połączenie po błędzie"""
-        timer.stop()
-        loop.quit()
+    return system_devices
+
 
 # ========================================
-# POZOSTAŁE FUNKCJE
+# SEKWENCJE KOMEND
 # ========================================
 
-def scan_devices():
-    """Funkcja do skanowania dostępnych urządzeń Bluetooth"""
-    global discovered_devices
-    add_log("Rozpoczynam skanowanie urządzeń Bluetooth...", "INFO")
+# Limity sekwencji: liczba kroków, opóźnienie pojedynczego kroku i liczba zapamiętanych sekwencji
+MAX_SEQUENCE_STEPS = int(os.environ.get("BT_MAX_SEQUENCE_STEPS", 1000))
+MAX_SEQUENCE_DELAY_MS = 3600 * 1000
+MAX_SEQUENCES = 50
+
+
+def parse_hex_payload(value):
+    """Zamienia tekst HEX (z opcjonalnym prefiksem 0x) na bajty; zgłasza ValueError"""
+    data = str(value or '').strip()
+    if data.lower().startswith("0x"):
+        data = data[2:]
+    return bytes.fromhex(data)
+
+
+def parse_sequence_steps(steps):
+    """
+    Sprawdza kroki sekwencji ([{"data": "0x01FF", "delay": 100}, ...]) i zwraca listę
+    krotek (dane, opóźnienie_ms). delay to czas od wysłania kroku do wysłania następnego.
+    """
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("Sekwencja musi zawierać niepustą listę kroków")
+    if len(steps) > MAX_SEQUENCE_STEPS:
+        raise ValueError(f"Sekwencja może mieć najwyżej {MAX_SEQUENCE_STEPS} kroków")
+    
+    parsed = []
+    for number, step in enumerate(steps, 1):
+        if not isinstance(step, dict):
+            raise ValueError(f"Krok {number}: oczekiwano obiektu z polami data i delay")
+        try:
+            payload = parse_hex_payload(step.get('data'))
+            delay = int(step.get('delay') or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"Krok {number}: nieprawidłowe dane HEX lub opóźnienie") from None
+        if not payload:
+            raise ValueError(f"Krok {number}: brak danych do wysłania")
+        if not 0 <= delay <= MAX_SEQUENCE_DELAY_MS:
+            raise ValueError(f"Krok {number}: opóźnienie musi mieścić się w zakresie 0-{MAX_SEQUENCE_DELAY_MS} ms")
+        parsed.append((payload, delay))
+    return parsed
+
+
+class CommandSequence(BackgroundJob):
+    """
+    Sekwencja komend wykonywana przez serwer. Stany: pending -> running ->
+    finished | cancelled | error. Zdarzenie "step" jest publikowane po każdym
+    wysłanym kroku wraz z jego spóźnieniem względem harmonogramu.
+    """
     
-    discovered_devices = []
-    discovery_complete = False
+    DONE_STATES = ("finished", "cancelled", "error")
     
-    try:
-        discovery_agent = QBluetoothDeviceDiscoveryAgent()
-        
-        # Handlery zdarzeń
-        def on_device_discovered(device_info):
-            try:
-                device_data = {
-                    'name': device_info.name() or "Nieznane urządzenie",
-                    'address': device_info.address().toString()
-                }
-                discovered_devices.append(device_data)
-                add_log(f"Znaleziono: {device_data['name']} - {device_data['address']}", "INFO")
-            except Exception as e:
-                add_log(f"Błąd podczas przetwarzania znalezionego urządzenia: {str(e)}", "ERROR")
-        
-        def on_finished():
-            nonlocal discovery_complete
-            discovery_complete = True
-            add_log(f"Skanowanie zakończone. Znaleziono {len(discovered_devices)} urządzeń.", "INFO")
-        
-        def on_error(error):
-            nonlocal discovery_complete
-            discovery_complete = True
-            error_msgs = {
-                QBluetoothDeviceDiscoveryAgent.Error.NoError: "Brak błędu",
-                QBluetoothDeviceDiscoveryAgent.Error.PoweredOffError: "Bluetooth wyłączony",
-                QBluetoothDeviceDiscoveryAgent.Error.InputOutputError: "Błąd wejścia/wyjścia",
-                QBluetoothDeviceDiscoveryAgent.Error.InvalidBluetoothAdapterError: "Nieprawidłowy adapter Bluetooth",
-                QBluetoothDeviceDiscoveryAgent.Error.UnsupportedPlatformError: "Niewspierana platforma",
-                QBluetoothDeviceDiscoveryAgent.Error.UnsupportedDiscoveryMethod: "Niewspierana metoda wykrywania",
-                QBluetoothDeviceDiscoveryAgent.Error.LocationServiceTurnedOffError: "Usługa lokalizacji wyłączona",
-                QBluetoothDeviceDiscoveryAgent.Error.MissingPermissionsError: "Brak uprawnień",
-                QBluetoothDeviceDiscoveryAgent.Error.UnknownError: "Nieznany błąd"
+    def __init__(self, address, steps):
+        super().__init__()
+        self.address = address
+        self.steps = steps
+        self.sent = 0
+        self.max_lateness_ms = 0.0
+        self.origin = None  # time.monotonic() wysłania pierwszego kroku
+        self.deadline_ms = 0  # Termin kolejnego kroku względem origin
+    
+    def to_dict(self):
+        with self._condition:
+            return {
+                'sequence_id': self.id,
+                'address': self.address,
+                'status': self.status,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'error': self.error,
+                'total': len(self.steps),
+                'sent': self.sent,
+                'max_lateness_ms': round(self.max_lateness_ms, 3)
             }
-            error_msg = error_msgs.get(error, f"Nieznany błąd ({error})")
-            add_log(f"Błąd podczas skanowania: {error_msg}", "ERROR")
-        
-        # Sygnały
-        discovery_agent.deviceDiscovered.connect(on_device_discovered)
-        discovery_agent.finished.connect(on_finished)
-        discovery_agent.errorOccurred.connect(on_error)
-        
-        # Skanowanie
-        discovery_agent.start()
-        add_log("Rozpoczęto skanowanie urządzeń Bluetooth", "DEBUG")
+
+
+class SequenceManager(QObject):
+    """
+    Wykonuje sekwencje komend w pętli Qt, bez udziału przeglądarki. Termin każdego
+    kroku jest liczony od początku sekwencji (suma wcześniejszych opóźnień), a timer
+    precyzyjny odlicza tylko czas pozostały do terminu, więc spóźnienia pojedynczych
+    kroków się nie kumulują. Nowa sekwencja dla urządzenia przerywa poprzednią.
+    """
+    
+    def __init__(self, connections):
+        super().__init__()
+        self.connections = connections
+        self.sequences = collections.OrderedDict()
+        self.running = {}  # adres -> (sekwencja, timer); używane tylko w wątku Qt
+        self._lock = threading.Lock()
+    
+    def start(self, address, steps):
+        """Tworzy sekwencję i zleca jej wykonanie - można wywołać z dowolnego wątku"""
+        sequence = CommandSequence(address, steps)
+        with self._lock:
+            self.sequences[sequence.id] = sequence
+            while len(self.sequences) > MAX_SEQUENCES:
+                self.sequences.popitem(last=False)
+        qt_bridge.submit(self._run, sequence)
+        return sequence
+    
+    def get(self, sequence_id):
+        with self._lock:
+            return self.sequences.get(sequence_id)
+    
+    def recent(self):
+        with self._lock:
+            return list(self.sequences.values())
+    
+    def cancel(self, sequence_id):
+        """Przerywa sekwencję (dowolny wątek); zwraca False, jeśli już się zakończyła"""
+        sequence = self.get(sequence_id)
+        if sequence is None or sequence.done:
+            return False
+        sequence.finish("cancelled")
+        qt_bridge.submit(self._stop, sequence)
+        add_log("Przerwano sekwencję komend %s", "INFO", sequence.id, category="bluetooth", address=sequence.address)
+        return True
+    
+    def _run(self, sequence):
+        if sequence.done:
+            return
         
-        # Zakończenie skanowania
-        loop = QEventLoop()
+        previous = self.running.get(sequence.address)
+        if previous is not None:
+            previous[0].finish("cancelled", "Przerwana przez nową sekwencję")
+            self._stop(previous[0])
         
-        # Timer do timeoutu skanowania
-        timer = QTimer()
+        timer = QTimer(self)
         timer.setSingleShot(True)
-        timer.timeout.connect(loop.quit)
-        timer.start(20000)  # 20 sekund na skanowanie
+        timer.setTimerType(Qt.TimerType.PreciseTimer)
+        timer.timeout.connect(lambda: self._step(sequence))
+        self.running[sequence.address] = (sequence, timer)
         
-        # Gdy skanowanie się zakończy, zatrzymaj pętlę
-        discovery_agent.finished.connect(loop.quit)
-        discovery_agent.errorOccurred.connect(loop.quit)
+        add_log("Rozpoczęto sekwencję %s (%d kroków)", "INFO", sequence.id, len(sequence.steps),
+                category="bluetooth", address=sequence.address)
+        sequence.set_status("running")
+        sequence.origin = time.monotonic()
+        self._step(sequence)
+    
+    def _step(self, sequence):
+        """Wysyła bieżący krok i planuje następny względem terminu z harmonogramu"""
+        if sequence.done:
+            self._stop(sequence)
+            return
+        
+        elapsed_ms = (time.monotonic() - sequence.origin) * 1000
+        lateness = max(0.0, elapsed_ms - sequence.deadline_ms)
+        data, delay = sequence.steps[sequence.sent]
+        if not self.connections.send(sequence.address, data):
+            sequence.finish("error", f"Nie udało się wysłać kroku {sequence.sent + 1}")
+            self._stop(sequence)
+            return
         
-        # Uruchom pętlę i czekaj
-        add_log("Oczekiwanie na zakończenie skanowania...", "DEBUG")
-        loop.exec()
+        with sequence._condition:
+            sequence.sent += 1
+            sequence.max_lateness_ms = max(sequence.max_lateness_ms, lateness)
+        sequence.publish("step", {
+            'sequence_id': sequence.id,
+            'index': sequence.sent,
+            'total': len(sequence.steps),
+            'data': data.hex().upper(),
+            'lateness_ms': round(lateness, 3)
+        })
         
-        # Jeśli skanowanie nadal trwa, zatrzymaj je
-        if not discovery_complete:
-            add_log("Timeout skanowania, zatrzymuję...", "WARNING")
-            discovery_agent.stop()
+        if sequence.sent >= len(sequence.steps):
+            sequence.finish("finished")
+            add_log("Zakończono sekwencję %s (maks. spóźnienie kroku: %.1f ms)", "INFO",
+                    sequence.id, sequence.max_lateness_ms, category="bluetooth", address=sequence.address)
+            self._stop(sequence)
+            return
         
-    except Exception as e:
-        add_log(f"Nieoczekiwany błąd podczas skanowania: {str(e)}", "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        sequence.deadline_ms += delay
+        remaining = sequence.deadline_ms - (time.monotonic() - sequence.origin) * 1000
+        self.running[sequence.address][1].start(max(0, round(remaining)))
     
-    return discovered_devices
+    def _stop(self, sequence):
+        entry = self.running.get(sequence.address)
+        if entry is not None and entry[0] is sequence:
+            del self.running[sequence.address]
+            entry[1].stop()
+            entry[1].deleteLater()
 
 
-def get_system_paired_devices():
-    """Pobiera sparowane urządzenia bezpośrednio z systemu operacyjnego"""
-    system_devices = []
+# ========================================
+# ZADANIA CYKLICZNE
+# ========================================
+
+# Limity zadań cyklicznych: najkrótszy i najdłuższy interwał oraz liczba zadań
+MIN_POLL_INTERVAL_MS = int(os.environ.get("BT_MIN_POLL_INTERVAL_MS", 10))
+MAX_POLL_INTERVAL_MS = 24 * 3600 * 1000
+MAX_POLL_JOBS = int(os.environ.get("BT_MAX_POLL_JOBS", 100))
+POLL_MODES = ("rate", "delay")
+
+
+class PollingJob:
+    """
+    Cykliczne wysyłanie tych samych danych do urządzenia (np. zapytania o pomiar).
+    Tryb "rate" trzyma stały rytm - terminy to origin + n * interwał, a tick spóźniony
+    o cały interwał lub więcej pomija zaległe terminy i dolicza je do missed. Tryb
+    "delay" odmierza interwał od faktycznego wykonania poprzedniego ticku. Ticki bez
+    połączenia z urządzeniem są liczone jako skipped. Stan zmienia wątek Qt.
+    """
+    
+    def __init__(self, address, data, interval_ms, mode="rate"):
+        self.id = uuid.uuid4().hex[:12]
+        self.address = address
+        self.data = data
+        self.interval_ms = interval_ms
+        self.mode = mode
+        self.paused = False
+        self.created_at = time.time()
+        self.last_sent_at = None
+        self.sent = 0
+        self.skipped = 0
+        self.failed = 0
+        self.missed = 0
+        self.max_lateness_ms = 0.0
+        self.origin = None  # time.monotonic() startu lub wznowienia
+        self.deadline_ms = 0  # Termin kolejnego ticku względem origin
+        self._lock = threading.Lock()
+    
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'address': self.address,
+                'data': self.data.hex().upper(),
+                'interval_ms': self.interval_ms,
+                'mode': self.mode,
+                'paused': self.paused,
+                'created_at': self.created_at,
+                'last_sent_at': self.last_sent_at,
+                'sent': self.sent,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'missed': self.missed,
+                'max_lateness_ms': round(self.max_lateness_ms, 3)
+            }
+
+
+def parse_polling_job(payload):
+    """Sprawdza parametry zadania cyklicznego i zwraca krotkę (dane, interwał_ms, tryb)"""
     try:
-        # Sprawdź system operacyjny
-        system = platform.system()
+        data = parse_hex_payload(payload.get('data'))
+        interval = int(payload.get('interval_ms') or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Nieprawidłowe dane HEX lub interwał") from None
+    if not data:
+        raise ValueError("Nie podano danych do wysłania")
+    if not MIN_POLL_INTERVAL_MS <= interval <= MAX_POLL_INTERVAL_MS:
+        raise ValueError(f"Interwał musi mieścić się w zakresie {MIN_POLL_INTERVAL_MS}-{MAX_POLL_INTERVAL_MS} ms")
+    mode = payload.get('mode') or "rate"
+    if mode not in POLL_MODES:
+        raise ValueError(f"Nieznany tryb zadania: {mode} (dostępne: {', '.join(POLL_MODES)})")
+    return data, interval, mode
+
+
+class PollingManager(QObject):
+    """
+    Harmonogram zadań cyklicznych w pętli Qt. Każde zadanie ma własny timer
+    precyzyjny nastawiany jednorazowo na czas pozostały do terminu, więc rytm nie
+    zależy od obciążenia serwera HTTP ani od otwartej przeglądarki, a spóźnienia
+    pojedynczych ticków nie przesuwają kolejnych terminów.
+    """
+    
+    def __init__(self, connections):
+        super().__init__()
+        self.connections = connections
+        self.jobs = collections.OrderedDict()
+        self.timers = {}  # id zadania -> QTimer; używane tylko w wątku Qt
+        self._lock = threading.Lock()
+    
+    def create(self, address, data, interval_ms, mode="rate", paused=False):
+        """Tworzy zadanie i zleca jego uruchomienie - można wywołać z dowolnego wątku"""
+        job = PollingJob(address, data, interval_ms, mode)
+        job.paused = paused
+        with self._lock:
+            if len(self.jobs) >= MAX_POLL_JOBS:
+                raise ValueError(f"Osiągnięto limit {MAX_POLL_JOBS} zadań cyklicznych")
+            self.jobs[job.id] = job
+        add_log("Utworzono zadanie cykliczne %s (co %d ms, tryb %s)", "INFO", job.id, interval_ms, mode,
+                category="bluetooth", address=address)
+        if not paused:
+            qt_bridge.submit(self._start, job)
+        return job
+    
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def list_jobs(self, address=None):
+        with self._lock:
+            return [job for job in self.jobs.values() if address is None or job.address == address]
+    
+    def delete(self, job_id):
+        """Usuwa zadanie (dowolny wątek); zwraca usunięte zadanie lub None"""
+        with self._lock:
+            job = self.jobs.pop(job_id, None)
+        if job is not None:
+            qt_bridge.submit(self._stop, job)
+            add_log("Usunięto zadanie cykliczne %s", "INFO", job.id, category="bluetooth", address=job.address)
+        return job
+    
+    def pause(self, job_id):
+        """Wstrzymuje zadanie; zwraca False, jeśli już było wstrzymane"""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        with job._lock:
+            if job.paused:
+                return False
+            job.paused = True
+        qt_bridge.submit(self._stop, job)
+        add_log("Wstrzymano zadanie cykliczne %s", "INFO", job.id, category="bluetooth", address=job.address)
+        return True
+    
+    def resume(self, job_id):
+        """Wznawia zadanie od razu z nowym rytmem; czas wstrzymania nie jest liczony jako missed"""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        with job._lock:
+            if not job.paused:
+                return False
+            job.paused = False
+        qt_bridge.submit(self._start, job)
+        add_log("Wznowiono zadanie cykliczne %s", "INFO", job.id, category="bluetooth", address=job.address)
+        return True
+    
+    def _start(self, job):
+        if job.paused or self.get(job.id) is not job or job.id in self.timers:
+            return
         
-        if system == "Windows":
-            add_log("Pobieranie sparowanych urządzeń z systemu Windows", "INFO")
-            # Użyj komendy PowerShell do pobrania sparowanych urządzeń Bluetooth
-            try:
-                # Zmienione - dodane jawne kodowanie UTF-8
-                command = "powershell -command \"& {Get-PnpDevice -Class Bluetooth | Where-Object { $_.FriendlyName -notlike '*Radio*' } | Select-Object FriendlyName, DeviceID, Status | ConvertTo-Json}\""
-                result = subprocess.run(command, shell=True, capture_output=True, text=True, encoding="utf-8", errors="replace")
-                
-                if result.returncode == 0 and result.stdout and result.stdout.strip():
-                    try:
-                        # Konwersja wyjścia do JSON
-                        devices_raw = json.loads(result.stdout)
-                        
-                        # PowerShell może zwrócić pojedynczy obiekt zamiast tablicy, jeśli jest tylko jedno urządzenie
-                        if not isinstance(devices_raw, list):
-                            devices_raw = [devices_raw]
-                        
-                        # Parse each device and extract MAC address
-                        for device in devices_raw:
-                            # DeviceID format: BTHENUM\{0000110E-0000-1000-8000-00805F9B34FB}_VID&0001000F_PID&0002\7&33B46D3E&0&98:DA:F0:00:A7:01_C00000000
-                            # Wyciągnij adres MAC z DeviceID (ostatnie 17 znaków przed _C00000000)
-                            mac_address = None
-                            
-                            if 'DeviceID' in device and device['DeviceID']:
-                                match = re.search(r'([0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2})', 
-                                                  device['DeviceID'], re.IGNORECASE)
-                                
-                                if match:
-                                    mac_address = match.group(1)
-                            
-                            if mac_address and 'FriendlyName' in device:
-                                device_info = {
-                                    'name': device['FriendlyName'],
-                                    'address': mac_address,
-                                    'status': device.get('Status', 'Unknown'),
-                                    'connected': False  # Domyślnie ustawiane na False
-                                }
-                                
-                                # Sprawdź czy urządzenie jest już podłączone
-                                if bt_client and bt_client.is_connected and bt_client.connected_device_address == mac_address:
-                                    device_info['connected'] = True
-                                
-                                system_devices.append(device_info)
-                    except Exception as e:
-                        add_log(f"Błąd podczas parsowania danych z PowerShell: {str(e)}", "ERROR")
-                else:
-                    # Alternatywna metoda uzyskania urządzeń Bluetooth
-                    add_log("Alternatywne pobieranie sparowanych urządzeń Bluetooth w Windows", "INFO")
-                    # Sprawdź podłączone urządzenie Bluetooth
-                    if bt_client and bt_client.is_connected and bt_client.connected_device_address:
-                        # Dodaj chociaż podłączone urządzenie
-                        device_info = {
-                            'name': 'Urządzenie Bluetooth',
-                            'address': bt_client.connected_device_address,
-                            'status': 'Connected',
-                            'connected': True
-                        }
-                        system_devices.append(device_info)
-            except Exception as e:
-                add_log(f"Błąd podczas pobierania urządzeń przez PowerShell: {str(e)}", "ERROR")
-                add_log(f"Szczegóły błędu: {traceback.format_exc()}", "DEBUG")
-                # Próba alternatywnej metody
-                if bt_client and bt_client.is_connected and bt_client.connected_device_address:
-                    # Dodaj chociaż podłączone urządzenie
-                    device_info = {
-                        'name': 'Urządzenie Bluetooth',
-                        'address': bt_client.connected_device_address,
-                        'status': 'Connected',
-                        'connected': True
-                    }
-                    system_devices.append(device_info)
-                
-        elif system == "Darwin":  # macOS
-            # Implementacja dla macOS
-            add_log("Pobieranie sparowanych urządzeń z systemu macOS", "INFO")
-            command = "system_profiler SPBluetoothDataType -json"
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, encoding="utf-8", errors="replace")
-            
-            if result.returncode == 0 and result.stdout:
-                try:
-                    data = json.loads(result.stdout)
-                    bluetooth_data = data.get('SPBluetoothDataType', [{}])[0]
-                    devices_data = bluetooth_data.get('device_title', {})
-                    
-                    for device_name, device_info in devices_data.items():
-                        if 'device_address' in device_info:
-                            mac_address = device_info['device_address']
-                            
-                            device_data = {
-                                'name': device_name,
-                                'address': mac_address,
-                                'status': 'Connected' if device_info.get('device_isconnected', False) else 'Not Connected',
-                                'connected': device_info.get('device_isconnected', False)
-                            }
-                            
-                            system_devices.append(device_data)
-                except Exception as e:
-                    add_log(f"Błąd podczas parsowania danych JSON z system_profiler: {str(e)}", "ERROR")
-            else:
-                add_log(f"Błąd wykonania system_profiler: {result.stderr}", "ERROR")
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.TimerType.PreciseTimer)
+        timer.timeout.connect(lambda: self._tick(job))
+        self.timers[job.id] = timer
+        
+        job.origin = time.monotonic()
+        job.deadline_ms = 0
+        self._tick(job)
+    
+    def _tick(self, job):
+        """Wysyła dane zadania i planuje kolejny tick"""
+        timer = self.timers.get(job.id)
+        if timer is None or job.paused:
+            return
+        
+        elapsed_ms = (time.monotonic() - job.origin) * 1000
+        lateness = max(0.0, elapsed_ms - job.deadline_ms)
+        missed = int(lateness // job.interval_ms) if job.mode == "rate" else 0
         
+        client = self.connections.get_session(job.address)
+        if client is None or not client.is_connected:
+            outcome = "skipped"
+        elif self.connections.send(job.address, job.data):
+            outcome = "sent"
         else:
-            add_log(f"Niewspierany system operacyjny: {system}", "ERROR")
-        
-        # Dodatkowe zabezpieczenie - jeśli lista jest pusta, ale mamy podłączone urządzenie
-        if not system_devices and bt_client and bt_client.is_connected and bt_client.connected_device_address:
-            # Dodaj chociaż podłączone urządzenie
-            device_info = {
-                'name': 'Urządzenie Bluetooth',
-                'address': bt_client.connected_device_address,
-                'status': 'Connected',
-                'connected': True
-            }
-            system_devices.append(device_info)
+            outcome = "failed"
         
-        add_log(f"Znaleziono {len(system_devices)} sparowanych urządzeń z systemu", "INFO")
+        with job._lock:
+            setattr(job, outcome, getattr(job, outcome) + 1)
+            if outcome == "sent":
+                job.last_sent_at = time.time()
+            job.missed += missed
+            job.max_lateness_ms = max(job.max_lateness_ms, lateness)
+        if missed:
+            add_log("Zadanie cykliczne %s: pominięto %d zaległych ticków", "WARNING", job.id, missed,
+                    category="bluetooth", address=job.address)
         
-    except Exception as e:
-        add_log(f"Nieoczekiwany błąd podczas pobierania sparowanych urządzeń: {str(e)}", "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
-        
-        # Dodatkowe zabezpieczenie - jeśli wystąpił błąd, ale mamy podłączone urządzenie
-        if bt_client and bt_client.is_connected and bt_client.connected_device_address:
-            # Dodaj chociaż podłączone urządzenie
-            device_info = {
-                'name': 'Urządzenie Bluetooth',
-                'address': bt_client.connected_device_address,
-                'status': 'Connected',
-                'connected': True
+        if job.mode == "rate":
+            job.deadline_ms += (missed + 1) * job.interval_ms
+        else:
+            job.deadline_ms = elapsed_ms + job.interval_ms
+        remaining = job.deadline_ms - (time.monotonic() - job.origin) * 1000
+        timer.start(max(0, round(remaining)))
+    
+    def _stop(self, job):
+        timer = self.timers.pop(job.id, None)
+        if timer is not None:
+            timer.stop()
+            timer.deleteLater()
+
+
+# ========================================
+# PRZESYŁANIE DANYCH BINARNYCH
+# ========================================
+
+# Rozmiar porcji czytanej z treści żądania, czas bez postępu w opróżnianiu kolejki
+# nadawczej, po którym transfer jest przerywany, oraz liczba zapamiętanych transferów
+UPLOAD_CHUNK_BYTES = int(os.environ.get("BT_UPLOAD_CHUNK_BYTES", 16384))
+UPLOAD_STALL_TIMEOUT = float(os.environ.get("BT_UPLOAD_STALL_TIMEOUT", 10))
+UPLOAD_PROGRESS_INTERVAL = 0.25
+MAX_UPLOADS = 20
+
+
+class UploadInterrupted(Exception):
+    """Transfer przerwany - można go wznowić od UploadTransfer.offset"""
+
+
+class UploadTransfer(BackgroundJob):
+    """
+    Wznawialny transfer danych binarnych do urządzenia. Stany: receiving ->
+    interrupted -> receiving ... -> complete | error. Suma SHA-256 jest liczona
+    przyrostowo, a przed każdą porcją zapisywany jest punkt kontrolny (przesunięcie,
+    stan sumy). Po utracie połączenia transfer cofa się do ostatniego punktu, którego
+    dane na pewno opuściły kolejkę nadawczą - porzucone w niej bajty zostaną
+    przesłane ponownie przy wznowieniu.
+    """
+    
+    DONE_STATES = ("complete", "error")
+    
+    def __init__(self, address, total=None, expected_sha256=None):
+        super().__init__()
+        self.address = address
+        self.total = total
+        self.expected_sha256 = expected_sha256
+        self.offset = 0  # Bajty przyjęte do kolejki nadawczej
+        self.confirmed = 0  # Bajty na pewno zapisane do socketu (dolne oszacowanie)
+        self.stalls = 0  # Ile razy transfer czekał na opróżnienie kolejki
+        self.active = False  # Czy trwa żądanie zasilające transfer
+        self.sha256 = hashlib.sha256()
+        self.checkpoints = collections.deque()  # (przesunięcie, kopia sumy) niepotwierdzonych porcji
+        self.drained = threading.Event()
+        self._last_progress = 0.0
+    
+    def accept(self, chunk, depth):
+        """Rozlicza porcję przyjętą do kolejki; depth - głębokość kolejki po jej dodaniu"""
+        with self._condition:
+            self.checkpoints.append((self.offset, self.sha256.copy()))
+            self.sha256.update(chunk)
+            self.offset += len(chunk)
+        self.confirm(depth)
+    
+    def confirm(self, depth):
+        """Przesuwa potwierdzone miejsce: co najmniej offset - bajty wciąż w kolejce"""
+        with self._condition:
+            self.confirmed = max(self.confirmed, self.offset - depth)
+            while len(self.checkpoints) > 1 and self.checkpoints[1][0] <= self.confirmed:
+                self.checkpoints.popleft()
+    
+    def rollback(self):
+        """Cofa transfer do ostatniego potwierdzonego punktu kontrolnego; zwraca cofnięte bajty"""
+        with self._condition:
+            if self.confirmed >= self.offset or not self.checkpoints:
+                self.checkpoints.clear()
+                return 0
+            offset, sha256 = self.checkpoints[0]
+            lost = self.offset - offset
+            self.offset, self.confirmed, self.sha256 = offset, offset, sha256
+            self.checkpoints.clear()
+            return lost
+    
+    def report_progress(self, force=False):
+        """Publikuje zdarzenie progress nie częściej niż co UPLOAD_PROGRESS_INTERVAL"""
+        now = time.monotonic()
+        if force or now - self._last_progress >= UPLOAD_PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.publish("progress", self.to_dict())
+    
+    def to_dict(self):
+        with self._condition:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            return {
+                'upload_id': self.id,
+                'address': self.address,
+                'status': self.status,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'error': self.error,
+                'offset': self.offset,
+                'confirmed': self.confirmed,
+                'total': self.total,
+                'percent': round(100 * self.offset / self.total, 1) if self.total else None,
+                'bytes_per_second': round(self.offset / elapsed) if elapsed > 0 else None,
+                'stalls': self.stalls,
+                'sha256': self.sha256.hexdigest() if self.status == "complete" else None,
+                'expected_sha256': self.expected_sha256
             }
-            system_devices.append(device_info)
+
+
+class UploadRegistry:
+    """Ostatnie transfery binarne (do wznawiania i podglądu postępu)"""
     
-    return system_devices
+    def __init__(self):
+        self.uploads = collections.OrderedDict()
+        self._lock = threading.Lock()
+    
+    def create(self, address, total=None, expected_sha256=None):
+        upload = UploadTransfer(address, total, expected_sha256)
+        with self._lock:
+            self.uploads[upload.id] = upload
+            while len(self.uploads) > MAX_UPLOADS:
+                self.uploads.popitem(last=False)
+        return upload
+    
+    def get(self, upload_id):
+        with self._lock:
+            return self.uploads.get(upload_id)
+    
+    def recent(self):
+        with self._lock:
+            return list(self.uploads.values())
+
+
+upload_registry = UploadRegistry()
+
+
+def _queue_upload_chunk(upload, chunk):
+    """Wstawia porcję do kolejki nadawczej, czekając na miejsce; zwraca głębokość kolejki"""
+    deadline = time.monotonic() + UPLOAD_STALL_TIMEOUT
+    stalled = False
+    while True:
+        # Zdarzenie jest czyszczone przed sprawdzeniem kolejki, więc opróżnienie
+        # po sprawdzeniu zawsze obudzi oczekiwanie
+        upload.drained.clear()
+        state, depth = qt_call(connection_manager.queue_chunk, upload.address, chunk)
+        if state == "queued":
+            return depth
+        if state == "disconnected":
+            raise UploadInterrupted("Brak połączenia z urządzeniem")
+        
+        upload.confirm(depth)
+        if not stalled:
+            stalled = True
+            with upload._condition:
+                upload.stalls += 1
+        if time.monotonic() >= deadline:
+            raise UploadInterrupted(f"Kolejka nadawcza nie opróżniła się w {UPLOAD_STALL_TIMEOUT:g} s")
+        upload.drained.wait(0.5)
+
+
+def _wait_for_upload_drain(upload):
+    """Czeka, aż wszystkie dane transferu zostaną zapisane do socketu"""
+    deadline = time.monotonic() + UPLOAD_STALL_TIMEOUT
+    while True:
+        depth = qt_call(connection_manager.transmit_depth, upload.address)
+        if depth is None:
+            raise UploadInterrupted("Połączenie zostało zamknięte przed wysłaniem danych")
+        upload.confirm(depth)
+        if depth == 0:
+            return
+        if time.monotonic() >= deadline:
+            raise UploadInterrupted(f"Kolejka nadawcza nie opróżniła się w {UPLOAD_STALL_TIMEOUT:g} s")
+        time.sleep(0.02)
+
 
-class QtThread(QThread):
-    """Klasa do obsługi wątku Qt"""
-    def run(self):
-        """Główna pętla wątku Qt"""
-        add_log("Uruchomiono wątek Qt", "INFO")
-        # Ten wątek nie posiada własnej pętli zdarzeń Qt, korzystamy z głównej pętli
+def run_upload(upload, stream):
+    """
+    Przekazuje treść żądania do kolejki nadawczej porcjami (wątek Flask), bez
+    wczytywania całości do pamięci. Powyżej górnego progu kolejki czeka na jej
+    opróżnienie (drain_callbacks), a po ostatniej porcji - na zapis wszystkiego do
+    socketu. Przerwanie zgłasza UploadInterrupted, nadmiar danych - ValueError.
+    """
+    # Porcja nie większa niż różnica progów - inaczej mogłaby się nie zmieścić nawet
+    # w kolejce opróżnionej do dolnego progu
+    chunk_size = max(1, min(UPLOAD_CHUNK_BYTES, TX_HIGH_WATERMARK - TX_LOW_WATERMARK))
+    qt_call(connection_manager.watch_drain, upload.address, upload.drained.set)
+    try:
         while True:
             try:
-                QCoreApplication.processEvents()
-                time.sleep(0.01)  # Małe opóźnienie, aby nie obciążać CPU
+                chunk = stream.read(chunk_size)
             except Exception as e:
-                add_log(f"Błąd w pętli zdarzeń Qt: {str(e)}", "ERROR")
-                time.sleep(1)  # Większe opóźnienie w przypadku błędu
+                raise UploadInterrupted(f"Przerwano odczyt treści żądania: {e}") from None
+            if not chunk:
+                break
+            if upload.total is not None and upload.offset + len(chunk) > upload.total:
+                raise ValueError(f"Dane przekraczają zadeklarowany rozmiar {upload.total} B")
+            upload.accept(chunk, _queue_upload_chunk(upload, chunk))
+            upload.report_progress()
+        _wait_for_upload_drain(upload)
+    except UploadInterrupted:
+        lost = upload.rollback()
+        if lost:
+            add_log("Transfer %s: %d B porzuconych w kolejce nadawczej zostanie wysłanych ponownie",
+                    "WARNING", upload.id, lost, category="bluetooth", address=upload.address)
+        raise
+    finally:
+        qt_call(connection_manager.watch_drain, upload.address, upload.drained.set, False)
+
+
+# ========================================
+# KANAŁ STATUSU
+# ========================================
+
+# Maksymalna liczba zaległych zdarzeń subskrybenta - po przekroczeniu
+# subskrybent zamiast nich otrzymuje nową migawkę stanu
+STATUS_SUBSCRIBER_QUEUE = int(os.environ.get("BT_STATUS_SUBSCRIBER_QUEUE", 100))
+
+
+class StatusSubscription:
+    """Kolejka zdarzeń statusu jednego subskrybenta"""
+    
+    def __init__(self, channel):
+        self.channel = channel
+        self.events = collections.deque()
+        self.resync = True  # Pierwsza odpowiedź to zawsze migawka stanu
+    
+    def get(self, timeout):
+        """Czeka na zdarzenia; zwraca (zdarzenia, czy_wysłać_migawkę)"""
+        with self.channel._condition:
+            self.channel._condition.wait_for(lambda: self.events or self.resync, timeout)
+            events = list(self.events)
+            self.events.clear()
+            resync, self.resync = self.resync, False
+            return events, resync
+    
+    def close(self):
+        self.channel.unsubscribe(self)
+
+
+class StatusChannel:
+    """
+    Kanał zdarzeń stanu aplikacji dla przeglądarek: zmiany połączeń, listy
+    sparowanych urządzeń i wyników skanowania. Zastępuje odpytywanie
+    /connection_status i /get_paired_devices - nowy subskrybent dostaje
+    migawkę stanu, a potem tylko zmiany. Publikacja nie czeka na subskrybentów.
+    """
+    
+    def __init__(self, capacity=STATUS_SUBSCRIBER_QUEUE):
+        self.capacity = capacity
+        self.subscribers = set()
+        self._condition = threading.Condition()
+    
+    def subscribe(self):
+        subscription = StatusSubscription(self)
+        with self._condition:
+            self.subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._condition:
+            self.subscribers.discard(subscription)
+    
+    def publish(self, event_type, data):
+        """Dodaje zdarzenie do kolejek wszystkich subskrybentów"""
+        with self._condition:
+            if not self.subscribers:
+                return
+            for subscription in self.subscribers:
+                if len(subscription.events) >= self.capacity:
+                    # Zaległe zdarzenia zastąpi aktualna migawka
+                    subscription.events.clear()
+                    subscription.resync = True
+                else:
+                    subscription.events.append((event_type, data))
+            self._condition.notify_all()
+
+
+status_channel = StatusChannel()
+
+
+def status_snapshot():
+    """Pełny stan dla nowego subskrybenta kanału statusu"""
+    return {
+        'connected': connection_manager.connected_addresses() if connection_manager else [],
+        'sessions': connection_manager.sessions_info() if connection_manager else [],
+        'paired': get_system_paired_devices(),
+        'paired_cache': paired_device_cache.metadata(),
+        'discovered': device_cache.devices()
+    }
+
+
+def _publish_paired_devices():
+    status_channel.publish("paired", {
+        'devices': get_system_paired_devices(),
+        'cache': paired_device_cache.metadata()
+    })
+
+
+def _publish_discovered_device(device, is_new):
+    if device is None:
+        status_channel.publish("discovered", {'cleared': True})
+    else:
+        status_channel.publish("discovered", {'device': device, 'new': is_new})
+
+
+paired_device_cache.change_callbacks.append(_publish_paired_devices)
+device_cache.change_callbacks.append(_publish_discovered_device)
+
+
+# ========================================
+# MOST MIĘDZY WĄTKAMI FLASK I QT
+# ========================================
+
+# Maksymalny czas (s) oczekiwania wątku Flask na wynik operacji w wątku Qt
+QT_CALL_TIMEOUT = float(os.environ.get("BT_QT_CALL_TIMEOUT", 30))
+
+
+class QtBridge(QObject):
+    """
+    Kanał poleceń z wątków Flask do głównej pętli zdarzeń Qt. Obiekty Qt (socket,
+    agent wykrywania, adapter) wolno wywoływać tylko z wątku, w którym żyją, dlatego
+    operacje są zlecane jako Future i wykonywane przez kolejkowane wywołanie
+    w wątku głównym. Wynik wraca do wątku Flask bez odpytywania.
+    """
+    
+    _invoke_requested = Signal(object)
+    
+    def __init__(self):
+        super().__init__()
+        self._invoke_requested.connect(self._invoke)
+    
+    def in_qt_thread(self):
+        return QThread.currentThread() == self.thread()
+    
+    def submit(self, func, *args, **kwargs):
+        """Zleca wykonanie funkcji w wątku Qt i zwraca Future z jej wynikiem"""
+        future = concurrent.futures.Future()
+        invocation = (future, func, args, kwargs)
+        if self.in_qt_thread():
+            self._invoke(invocation)
+        else:
+            self._invoke_requested.emit(invocation)
+        return future
+    
+    def call(self, func, *args, timeout=QT_CALL_TIMEOUT, **kwargs):
+        """Wykonuje funkcję w wątku Qt i czeka na wynik"""
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Jeśli wywołanie jeszcze nie wystartowało, nie wykonuj go już
+            future.cancel()
+            raise
+    
+    def _invoke(self, invocation):
+        future, func, args, kwargs = invocation
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            add_log("Błąd operacji w wątku Qt (%s): %s", "ERROR", getattr(func, '__name__', func), e)
+            future.set_exception(e)
+
+
+def qt_call(func, *args, **kwargs):
+    """Wykonuje funkcję w wątku Qt (przez most, jeśli działa) i zwraca jej wynik"""
+    if qt_bridge is None:
+        return func(*args, **kwargs)
+    return qt_bridge.call(func, *args, **kwargs)
 
 
 # Inicjalizacja klienta Bluetooth
 def init_bluetooth():
     """Inicjalizuje klienta Bluetooth"""
-    global bt_client
+    global scan_manager, connection_manager, sequence_manager, polling_manager
     
     try:
         # Sprawdź, czy Bluetooth jest dostępny
@@ -810,15 +4185,25 @@ def init_bluetooth():
             add_log("Bluetooth jest wyłączony. Proszę włączyć Bluetooth i spróbować ponownie.", "ERROR")
             return False
         
-        add_log(f"Lokalne urządzenie Bluetooth: {local_device.name()} ({local_device.address().toString()})", "INFO")
+        add_log("Lokalne urządzenie Bluetooth: %s (%s)", "INFO", local_device.name(), local_device.address().toString())
+        
+        # Sesje z urządzeniami są tworzone przy pierwszym połączeniu z danym adresem
+        connection_manager = ConnectionManager()
+        scan_manager = ScanManager()
+        sequence_manager = SequenceManager(connection_manager)
+        polling_manager = PollingManager(connection_manager)
+        
+        # Zapis ruchu do pliku przechwycenia - tylko na wyraźne żądanie (BT_CAPTURE_FILE)
+        if CAPTURE_FILE:
+            start_capture(CAPTURE_FILE)
         
-        # Utwórz klienta Bluetooth
-        bt_client = BluetoothConsoleClient()
+        # Lista sparowanych urządzeń jest pobierana i odświeżana w tle
+        paired_device_cache.start()
         add_log("Klient Bluetooth zainicjalizowany pomyślnie", "INFO")
         return True
     except Exception as e:
-        add_log(f"Błąd podczas inicjalizacji Bluetooth: {str(e)}", "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log("Błąd podczas inicjalizacji Bluetooth: %s", "ERROR", e)
+        add_log("Stacktrace:", "DEBUG", exc_info=True)
         return False
 
 
@@ -831,184 +4216,890 @@ def init_bluetooth():
 def index():
     """Strona główna aplikacji"""
     # Sprawdź status Bluetooth przy każdym odświeżeniu strony
-    bluetooth_status = "Dostępny" if bt_client and bt_client.is_connected else "Niepołączony"
-    add_log(f"Odświeżono stronę główną, status Bluetooth: {bluetooth_status}", "DEBUG")
+    bluetooth_status = "Dostępny" if connection_manager and connection_manager.connected_addresses() else "Niepołączony"
+    add_log("Odświeżono stronę główną, status Bluetooth: %s", "DEBUG", bluetooth_status, category="http")
     return render_template('main.html', 
-                          logs=logs, 
-                          devices=discovered_devices, 
+                          devices=device_cache.devices(), 
                           bluetooth_status=bluetooth_status)
 
 
 @app.route('/scan', methods=['POST'])
 def scan():
-    """Trasa do skanowania urządzeń"""
-    add_log("Otrzymano żądanie skanowania urządzeń", "DEBUG")
-    scan_devices()
-    return redirect(url_for('index'))
+    """
+    Trasa do skanowania urządzeń - uruchamia skanowanie w tle i od razu zwraca
+    identyfikator zadania. Wyniki są dostępne jako strumień SSE.
+    """
+    add_log("Otrzymano żądanie skanowania urządzeń", "DEBUG", category="http")
+    if not scan_manager:
+        add_log("Bluetooth nie został zainicjalizowany", "ERROR", category="http")
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    job, created = scan_manager.start_scan()
+    
+    # Zwykły formularz HTML (bez JavaScript) wraca na stronę główną
+    if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'text/html':
+        return redirect(url_for('index'))
+    
+    return jsonify({
+        'status': 'success',
+        'job_id': job.id,
+        'created': created,
+        'events_url': url_for('scan_events', job_id=job.id)
+    }), 202
+
+
+@app.route('/scan/<job_id>')
+def scan_job_status(job_id):
+    """Trasa do sprawdzania stanu zadania skanowania"""
+    job = scan_manager.get_job(job_id) if scan_manager else None
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono zadania skanowania'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+
+@app.route('/scan/<job_id>/events')
+def scan_events(job_id):
+    """Strumień SSE ze znalezionymi urządzeniami - zdarzenia są wysyłane na bieżąco"""
+    job = scan_manager.get_job(job_id) if scan_manager else None
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono zadania skanowania'}), 404
+    return job_event_stream(job)
 
 
 @app.route('/connect', methods=['POST'])
 def connect():
-    """Trasa do łączenia z urządzeniem"""
+    """
+    Trasa do łączenia z urządzeniem - rozpoczyna operację łączenia w tle i od razu
+    zwraca jej identyfikator. Przebieg i wynik są dostępne pod status_url i events_url.
+    """
     address = request.form.get('address')
-    add_log(f"Otrzymano żądanie połączenia z adresem: {address}", "DEBUG")
+    add_log("Otrzymano żądanie połączenia z adresem: %s", "DEBUG", address, category="http")
+    wants_json = request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json'
     
-    connection_success = False
-    device_info = {
-        'name': 'Nieznane urządzenie',
-        'address': address,
-        'connected': False,
-        'type': 'other'
-    }
+    if not address:
+        add_log("Nie podano adresu MAC", "WARNING", category="http")
+        if wants_json:
+            return jsonify({'status': 'error', 'message': 'Nie podano adresu MAC'}), 400
+        return redirect(url_for('index'))
     
-    if address:
-        if bt_client:
-            # Próba połączenia
-            connection_success = bt_client.connect_to_device(address)
-            
-            # Jeśli połączenie się powiodło, dodaj urządzenie do lokalnej bazy
-            if connection_success:
-                # Ustaw status połączenia
-                device_info['connected'] = True
-                
-                # Próba pobrania nazwy urządzenia z systemu
-                try:
-                    system_devices = get_system_paired_devices()
-                    matching_device = next((dev for dev in system_devices if dev['address'] == address), None)
-                    
-                    if matching_device:
-                        device_info['name'] = matching_device.get('name', 'Nieznane urządzenie')
-                        # Można też pobrać inne dostępne informacje
-                except Exception as e:
-                    add_log(f"Błąd podczas pobierania informacji o urządzeniu: {str(e)}", "ERROR")
-                
-                # Dodaj skrypt do strony, który doda urządzenie do localStorage po załadowaniu
-                connect_script = f"""
-                <script>
-                    document.addEventListener('DOMContentLoaded', function() {{
-                        // Wyślij zdarzenie deviceConnected
-                        window.dispatchEvent(new CustomEvent('deviceConnected', {{
-                            detail: {{
-                                device: {{
-                                    name: "{device_info['name']}",
-                                    address: "{device_info['address']}",
-                                    connected: true,
-                                    type: "{device_info['type']}"
-                                }}
-                            }}
-                        }}));
-                    }});
-                </script>
-                """
-                # Przekieruj na stronę główną z dodatkowym skryptem
-                return render_template('main.html', 
-                              logs=logs, 
-                              devices=discovered_devices, 
-                              bluetooth_status="Dostępny" if bt_client.is_connected else "Niepołączony",
-                              connect_script=connect_script)
-        else:
-            add_log("Bluetooth nie został zainicjalizowany", "ERROR")
-    else:
-        add_log("Nie podano adresu MAC", "WARNING")
+    if not connection_manager:
+        add_log("Bluetooth nie został zainicjalizowany", "ERROR", category="http")
+        if wants_json:
+            return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+        return redirect(url_for('index'))
+    
+    operation, created = connection_manager.start_connect(address)
     
-    # Jeśli doszliśmy tutaj, przekieruj na stronę główną bez skryptu
+    if wants_json:
+        return connect_operation_response(operation, created), 202
+    
+    # Zwykły formularz HTML - bez czekania na wynik; stan połączenia strona otrzyma z kanału statusu
     return redirect(url_for('index'))
 
 
+def connect_operation_response(operation, created):
+    """Odpowiedź JSON z operacją łączenia i adresami do śledzenia jej przebiegu"""
+    return jsonify({
+        'status': 'success',
+        'operation_id': operation.id,
+        'created': created,
+        'operation': operation.to_dict(),
+        'status_url': url_for('connect_operation_status', operation_id=operation.id),
+        'events_url': url_for('connect_events', operation_id=operation.id)
+    })
+
+
+@app.route('/connect/<operation_id>')
+def connect_operation_status(operation_id):
+    """Trasa do sprawdzania stanu operacji łączenia"""
+    operation = connection_manager.get_operation(operation_id) if connection_manager else None
+    if operation is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono operacji łączenia'}), 404
+    return jsonify({'status': 'success', 'operation': operation.to_dict()})
+
+
+@app.route('/connect/<operation_id>/events')
+def connect_events(operation_id):
+    """Strumień SSE z przebiegiem operacji łączenia (connecting, connected, failed)"""
+    operation = connection_manager.get_operation(operation_id) if connection_manager else None
+    if operation is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono operacji łączenia'}), 404
+    return job_event_stream(operation)
+
+
 @app.route('/disconnect', methods=['POST'])
 def disconnect():
-    """Trasa do rozłączania urządzenia"""
-    add_log("Otrzymano żądanie rozłączenia", "DEBUG")
-    disconnect_success = False
-    
-    if bt_client and bt_client.is_connected:
-        disconnect_success = bt_client.disconnect()
-    else:
-        add_log("Brak aktywnego połączenia", "WARNING")
+    """
+    Trasa do rozłączania urządzenia o podanym adresie. Bez adresu rozłącza
+    wszystkie połączone urządzenia. Pole policy (soft, recreate, reset) zmienia
+    domyślną politykę rozłączania (BT_DISCONNECT_POLICY).
+    """
+    address = request.form.get('address')
+    policy = request.form.get('policy') or None
+    add_log("Otrzymano żądanie rozłączenia: %s", "DEBUG", address or "wszystkie", category="http")
     
-    # Dodatkowe bezpośrednie wywołanie resetowania Bluetooth
-    if disconnect_success:
-        add_log("Próba dodatkowego resetowania Bluetooth po rozłączeniu", "INFO")
-        # Dokonujemy dodatkowego resetowania jako zabezpieczenie
-        reset_bluetooth()
+    if policy is not None and policy not in DISCONNECT_POLICIES:
+        add_log("Nieznana polityka rozłączania: %s", "WARNING", policy, category="http")
+        policy = None
     
+    disconnect_devices(address, policy)
     return redirect(url_for('index'))
 
 
+def disconnect_devices(address=None, policy=None):
+    """
+    Rozłącza wskazane urządzenie lub wszystkie połączone. Zwraca słownik z listą
+    rozłączonych, niepołączonych oraz błędami rozłączania (adres -> komunikat).
+    """
+    result = {'disconnected': [], 'not_connected': [], 'errors': {}}
+    connected = connection_manager.connected_addresses() if connection_manager else []
+    targets = [ConnectionManager.normalize(address)] if address else connected
+    
+    if not targets:
+        add_log("Brak aktywnego połączenia", "WARNING", category="http")
+    for target in targets:
+        if target not in connected:
+            add_log("Brak aktywnego połączenia", "WARNING", category="http", address=target)
+            result['not_connected'].append(target)
+            continue
+        try:
+            qt_call(connection_manager.disconnect, target, policy)
+            result['disconnected'].append(target)
+        except Exception as e:
+            add_log("Błąd podczas rozłączania: %s", "ERROR", e, category="http", address=target)
+            result['errors'][target] = str(e)
+    return result
+
+
 @app.route('/unpair', methods=['POST'])
 def unpair():
     """Trasa do rozparowywania urządzenia"""
     address = request.form.get('address')
-    add_log(f"Otrzymano żądanie rozparowania urządzenia o adresie: {address}", "DEBUG")
+    add_log("Otrzymano żądanie rozparowania urządzenia o adresie: %s", "DEBUG", address, category="http")
     if address:
-        if bt_client:
-            bt_client.unpair_device(address)
+        if connection_manager:
+            if unpair_device(address):
+                paired_device_cache.invalidate(f"rozparowano {address}")
         else:
-            add_log("Bluetooth nie został zainicjalizowany", "ERROR")
+            add_log("Bluetooth nie został zainicjalizowany", "ERROR", category="http")
     else:
-        add_log("Nie podano adresu MAC", "WARNING")
+        add_log("Nie podano adresu MAC", "WARNING", category="http")
     return redirect(url_for('index'))
 
 
 @app.route('/send', methods=['POST'])
 def send():
-    """Trasa do wysyłania danych"""
+    """
+    Trasa do wysyłania danych do urządzenia (pole address jest opcjonalne przy jednym
+    połączeniu). Treść application/octet-stream jest przesyłana jako transfer binarny.
+    """
+    if request.mimetype == 'application/octet-stream':
+        return send_binary()
     data = request.form.get('data')
-    add_log(f"Otrzymano żądanie wysłania danych: {data}", "DEBUG")
+    add_log("Otrzymano żądanie wysłania danych: %s", "DEBUG", data, category="http")
     if data:
-        if bt_client and bt_client.is_connected:
-            bt_client.send_data(data)
-        else:
-            add_log("Brak aktywnego połączenia", "WARNING")
+        try:
+            if not connection_manager:
+                raise ValueError("Brak aktywnego połączenia")
+            address = connection_manager.resolve_address(request.form.get('address'))
+            qt_call(connection_manager.send, address, data)
+        except ValueError as e:
+            add_log(str(e), "WARNING", category="http")
+        except Exception as e:
+            add_log("Błąd podczas wysyłania danych: %s", "ERROR", e, category="http")
     else:
-        add_log("Nie podano danych do wysłania", "WARNING")
+        add_log("Nie podano danych do wysłania", "WARNING", category="http")
     return redirect(url_for('index'))
 
 
+def send_binary():
+    """
+    Transfer binarny (POST /send z treścią application/octet-stream). Parametry
+    zapytania: address, length (pełny rozmiar; domyślnie Content-Length), sha256
+    (lub nagłówek X-Content-SHA256) oraz upload_id i offset przy wznawianiu -
+    offset musi być równy offset zwróconemu dla przerwanego transferu. Suma
+    kontrolna potwierdza, że serwer otrzymał i przekazał dokładnie zamierzone dane.
+    """
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    expected = (request.headers.get('X-Content-SHA256') or request.args.get('sha256') or '').strip().lower() or None
+    if expected and not re.fullmatch(r"[0-9a-f]{64}", expected):
+        return jsonify({'status': 'error', 'message': 'Nieprawidłowa suma SHA-256'}), 400
+    try:
+        offset = int(request.args.get('offset', 0))
+        length = request.args.get('length', type=int)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Nieprawidłowe przesunięcie'}), 400
+    
+    upload_id = request.args.get('upload_id')
+    if upload_id:
+        upload = upload_registry.get(upload_id)
+        if upload is None:
+            return jsonify({'status': 'error', 'message': 'Nie znaleziono transferu'}), 404
+        if upload.done:
+            return jsonify({'status': 'error', 'message': 'Transfer już się zakończył', 'upload': upload.to_dict()}), 409
+        if offset != upload.offset:
+            return jsonify({'status': 'error', 'upload': upload.to_dict(),
+                            'message': f'Transfer należy wznowić od przesunięcia {upload.offset}'}), 409
+        if expected:
+            upload.expected_sha256 = expected
+    else:
+        try:
+            address = connection_manager.resolve_address(request.args.get('address'))
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 409
+        if offset:
+            return jsonify({'status': 'error', 'message': 'Przesunięcie wymaga upload_id'}), 400
+        total = length if length is not None else request.content_length
+        upload = upload_registry.create(address, total, expected)
+    
+    with upload._condition:
+        if upload.active:
+            return jsonify({'status': 'error', 'message': 'Transfer jest już w toku', 'upload': upload.to_dict()}), 409
+        upload.active = True
+    
+    links = {'status_url': url_for('api_upload_status', upload_id=upload.id),
+             'events_url': url_for('api_upload_events', upload_id=upload.id)}
+    add_log("Transfer %s: od %d B, rozmiar %s", "INFO", upload.id, upload.offset, upload.total,
+            category="http", address=upload.address)
+    upload.error = None
+    upload.set_status("receiving")
+    try:
+        run_upload(upload, request.stream)
+    except UploadInterrupted as e:
+        upload.error = str(e)
+        upload.set_status("interrupted")
+        add_log("Transfer %s przerwany przy %d B: %s", "WARNING", upload.id, upload.offset, e,
+                category="bluetooth", address=upload.address)
+        return jsonify({'status': 'error', 'message': str(e), 'upload': upload.to_dict(), **links}), 409
+    except ValueError as e:
+        upload.finish("error", str(e))
+        return jsonify({'status': 'error', 'message': str(e), 'upload': upload.to_dict(), **links}), 400
+    finally:
+        with upload._condition:
+            upload.active = False
+    
+    if upload.total is not None and upload.offset < upload.total:
+        upload.error = f"Odebrano {upload.offset} z {upload.total} B"
+        upload.set_status("interrupted")
+        return jsonify({'status': 'error', 'message': upload.error, 'upload': upload.to_dict(), **links}), 409
+    
+    digest = upload.sha256.hexdigest()
+    if upload.expected_sha256 and digest != upload.expected_sha256:
+        upload.finish("error", f"Suma SHA-256 {digest} nie zgadza się z oczekiwaną")
+        add_log("Transfer %s: niezgodna suma kontrolna", "ERROR", upload.id, category="bluetooth", address=upload.address)
+        return jsonify({'status': 'error', 'message': upload.error, 'upload': upload.to_dict(), **links}), 422
+    upload.error = None
+    upload.finish("complete")
+    add_log("Transfer %s zakończony: %d B, SHA-256 %s", "INFO", upload.id, upload.offset, digest,
+            category="bluetooth", address=upload.address)
+    return jsonify({'status': 'success', 'upload': upload.to_dict(), **links})
+
+
 @app.route('/status', methods=['POST'])
 def status():
     """Trasa do sprawdzania statusu połączenia"""
-    add_log("Otrzymano żądanie sprawdzenia statusu", "DEBUG")
-    if bt_client:
-        status_text = "Połączony" if bt_client.is_connected else "Niepołączony"
-        add_log(f"Status: {status_text}", "INFO")
+    add_log("Otrzymano żądanie sprawdzenia statusu", "DEBUG", category="http")
+    if connection_manager:
+        sessions = connection_manager.sessions_info()
+        if not sessions:
+            add_log("Status: Niepołączony", "INFO", category="http")
+        for session in sessions:
+            status_text = "Połączony" if session['connected'] else "Niepołączony"
+            add_log("Status: %s", "INFO", status_text, category="http", address=session['address'])
     else:
-        add_log("Bluetooth nie został zainicjalizowany", "ERROR")
+        add_log("Bluetooth nie został zainicjalizowany", "ERROR", category="http")
     return redirect(url_for('index'))
 
 
 @app.route('/clear_logs', methods=['POST'])
 def clear_logs():
     """Trasa do czyszczenia logów"""
-    global logs
-    add_log("Otrzymano żądanie wyczyszczenia logów", "DEBUG")
-    logs = []
-    add_log("Logi wyczyszczone", "INFO")
+    add_log("Otrzymano żądanie wyczyszczenia logów", "DEBUG", category="http")
+    log_store.clear()
+    add_log("Logi wyczyszczone", "INFO", category="http")
     return redirect(url_for('index'))
 
 
+# ========================================
+# API V1 - AKCJE W FORMACIE JSON
+# ========================================
+# Odpowiedniki tras formularzy (/connect, /disconnect, /unpair, /send, /status,
+# /clear_logs) zwracające wynik w jednym żądaniu, bez renderowania strony.
+# Dane można przesłać jako JSON lub formularz.
+
+@app.route('/api/v1/connect', methods=['POST'])
+def api_connect():
+    """
+    Rozpoczyna łączenie ({"address": ..}) i zwraca 202 z operacją do śledzenia.
+    Z "wait": true czeka na wynik i zwraca końcowy stan operacji.
+    """
+    payload = request.get_json(silent=True) or request.form
+    address = payload.get('address')
+    add_log("API: żądanie połączenia z adresem: %s", "DEBUG", address, category="http")
+    if not address:
+        return jsonify({'status': 'error', 'message': 'Nie podano adresu MAC'}), 400
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    operation, created = connection_manager.start_connect(address)
+    if str(payload.get('wait', '')).lower() not in ("1", "true", "yes", "on"):
+        return connect_operation_response(operation, created), 202
+    
+    operation.wait(CONNECT_TIMEOUT_MS / 1000 + 5)
+    connected = operation.status == "connected"
+    return jsonify({
+        'status': 'success' if connected else 'error',
+        'message': None if connected else (operation.error or 'Nie udało się połączyć'),
+        'operation': operation.to_dict()
+    }), 200 if connected else 502
+
+
+@app.route('/api/v1/disconnect', methods=['POST'])
+def api_disconnect():
+    """Rozłącza urządzenie ({"address": .., "policy": "soft"}); bez adresu - wszystkie"""
+    payload = request.get_json(silent=True) or request.form
+    address = payload.get('address') or None
+    policy = payload.get('policy') or None
+    add_log("API: żądanie rozłączenia: %s", "DEBUG", address or "wszystkie", category="http")
+    if policy is not None and policy not in DISCONNECT_POLICIES:
+        return jsonify({'status': 'error', 'message': f'Nieznana polityka rozłączania: {policy}'}), 400
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    result = disconnect_devices(address, policy)
+    if result['errors']:
+        return jsonify({'status': 'error', 'message': 'Błąd podczas rozłączania', **result}), 500
+    if address and not result['disconnected']:
+        return jsonify({'status': 'error', 'message': 'Brak aktywnego połączenia', **result}), 409
+    return jsonify({'status': 'success', **result})
+
+
+@app.route('/api/v1/unpair', methods=['POST'])
+def api_unpair():
+    """Rozparowuje urządzenie ({"address": ..})"""
+    payload = request.get_json(silent=True) or request.form
+    address = payload.get('address')
+    add_log("API: żądanie rozparowania urządzenia o adresie: %s", "DEBUG", address, category="http")
+    if not address:
+        return jsonify({'status': 'error', 'message': 'Nie podano adresu MAC'}), 400
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    if not unpair_device(address):
+        return jsonify({'status': 'error', 'message': 'Nie udało się rozparować urządzenia - sprawdź logi',
+                        'address': address}), 500
+    paired_device_cache.invalidate(f"rozparowano {address}")
+    return jsonify({'status': 'success', 'address': ConnectionManager.normalize(address)})
+
+
+@app.route('/api/v1/send', methods=['POST'])
+def api_send():
+    """
+    Wysyła dane HEX ({"data": "0x01FF", "address": ..}); adres jest opcjonalny
+    przy jednym połączeniu. Sukces oznacza przyjęcie danych do kolejki nadawczej.
+    """
+    payload = request.get_json(silent=True) or request.form
+    data = payload.get('data')
+    add_log("API: żądanie wysłania danych: %s", "DEBUG", data, category="http")
+    if not data:
+        return jsonify({'status': 'error', 'message': 'Nie podano danych do wysłania'}), 400
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    try:
+        address = connection_manager.resolve_address(payload.get('address'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    try:
+        queued = qt_call(connection_manager.send, address, data)
+    except Exception as e:
+        add_log("Błąd podczas wysyłania danych: %s", "ERROR", e, category="http", address=address)
+        return jsonify({'status': 'error', 'message': str(e), 'address': address}), 500
+    
+    if not queued:
+        return jsonify({'status': 'error', 'address': address,
+                        'message': 'Nie wysłano danych - brak połączenia, pełna kolejka lub nieprawidłowy HEX'}), 409
+    return jsonify({'status': 'success', 'address': address})
+
+
+@app.route('/api/v1/status', methods=['GET', 'POST'])
+def api_status():
+    """Zwraca stan wszystkich sesji i listę połączonych urządzeń"""
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    connected = connection_manager.connected_addresses()
+    return jsonify({
+        'status': 'success',
+        'connected': bool(connected),
+        'addresses': connected,
+        'sessions': connection_manager.sessions_info()
+    })
+
+
+@app.route('/api/v1/clear_logs', methods=['POST'])
+def api_clear_logs():
+    """Czyści bufor logów serwera"""
+    log_store.clear()
+    add_log("Logi wyczyszczone", "INFO", category="http")
+    return jsonify({'status': 'success', 'first_seq': log_store.first_seq})
+
+
+@app.route('/api/v1/sequences', methods=['POST'])
+def api_start_sequence():
+    """
+    Uruchamia sekwencję komend na serwerze:
+    {"address": .., "steps": [{"data": "0x01", "delay": 100}, {"data": "0x02"}]}.
+    Zwraca 202 z sekwencją; przebieg jest dostępny pod status_url i events_url.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not sequence_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    try:
+        steps = parse_sequence_steps(payload.get('steps'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    try:
+        address = connection_manager.resolve_address(payload.get('address'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    
+    sequence = sequence_manager.start(address, steps)
+    add_log("API: sekwencja %s, kroków: %d", "DEBUG", sequence.id, len(steps), category="http", address=address)
+    return jsonify({
+        'status': 'success',
+        'sequence': sequence.to_dict(),
+        'status_url': url_for('api_sequence_status', sequence_id=sequence.id),
+        'events_url': url_for('api_sequence_events', sequence_id=sequence.id)
+    }), 202
+
+
+@app.route('/api/v1/sequences')
+def api_list_sequences():
+    """Zwraca ostatnie sekwencje komend"""
+    sequences = sequence_manager.recent() if sequence_manager else []
+    return jsonify({'status': 'success', 'sequences': [sequence.to_dict() for sequence in sequences]})
+
+
+@app.route('/api/v1/sequences/<sequence_id>')
+def api_sequence_status(sequence_id):
+    """Zwraca stan sekwencji komend"""
+    sequence = sequence_manager.get(sequence_id) if sequence_manager else None
+    if sequence is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono sekwencji'}), 404
+    return jsonify({'status': 'success', 'sequence': sequence.to_dict()})
+
+
+@app.route('/api/v1/sequences/<sequence_id>/events')
+def api_sequence_events(sequence_id):
+    """Strumień SSE z przebiegiem sekwencji (running, step, finished, cancelled, error)"""
+    sequence = sequence_manager.get(sequence_id) if sequence_manager else None
+    if sequence is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono sekwencji'}), 404
+    return job_event_stream(sequence)
+
+
+@app.route('/api/v1/sequences/<sequence_id>/cancel', methods=['POST'])
+def api_cancel_sequence(sequence_id):
+    """Przerywa sekwencję komend"""
+    sequence = sequence_manager.get(sequence_id) if sequence_manager else None
+    if sequence is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono sekwencji'}), 404
+    if not sequence_manager.cancel(sequence_id):
+        return jsonify({'status': 'error', 'message': 'Sekwencja już się zakończyła',
+                        'sequence': sequence.to_dict()}), 409
+    return jsonify({'status': 'success', 'sequence': sequence.to_dict()})
+
+
+# Kody HTTP dla błędów transakcji
+TRANSACTION_ERROR_CODES = ((TimeoutError, 504), (ConnectionError, 409), (BufferError, 503), (ValueError, 400))
+
+
+def parse_transaction_request(item, defaults):
+    """Zamienia żądanie JSON na krotkę (dane, dopasowanie, limit_ms); zgłasza ValueError"""
+    try:
+        data = parse_hex_payload(item.get('data'))
+        timeout_ms = item.get('timeout_ms', defaults.get('timeout_ms'))
+        timeout_ms = TRANSACT_TIMEOUT_MS if timeout_ms is None else int(timeout_ms)
+    except (TypeError, ValueError):
+        raise ValueError("Nieprawidłowe dane HEX lub limit czasu") from None
+    if not data:
+        raise ValueError("Nie podano danych do wysłania")
+    if not 1 <= timeout_ms <= MAX_TRANSACT_TIMEOUT_MS:
+        raise ValueError(f"Limit czasu musi mieścić się w zakresie 1-{MAX_TRANSACT_TIMEOUT_MS} ms")
+    return data, create_reply_matcher(item.get('match', defaults.get('match'))), timeout_ms
+
+
+def transaction_result(future, data, timeout_ms):
+    """Czeka na wynik transakcji; zwraca (słownik wyniku, kod HTTP)"""
+    try:
+        # Termin pilnuje timer w wątku Qt - tu tylko zapas na wypadek jego zablokowania
+        return {'status': 'success', **future.result(timeout=timeout_ms / 1000 + QT_CALL_TIMEOUT)}, 200
+    except Exception as e:
+        code = next((code for error, code in TRANSACTION_ERROR_CODES if isinstance(e, error)), 502)
+        return {'status': 'error', 'request': data.hex().upper(), 'message': str(e) or 'Brak odpowiedzi'}, code
+
+
+@app.route('/api/transact', methods=['POST'])
+def api_transact():
+    """
+    Wysyła żądanie i czeka na pasującą odpowiedź: {"address": .., "data": "0x01",
+    "match": {"type": "prefix", "prefix": "0x81"}, "timeout_ms": 500}. Lista
+    "requests" wysyła kilka żądań naraz (pipelining); "match" i "timeout_ms"
+    z poziomu głównego są wtedy wartościami domyślnymi dla każdego żądania.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    batch = 'requests' in payload
+    items = payload.get('requests') if batch else [payload]
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return jsonify({'status': 'error', 'message': 'Pole requests musi być niepustą listą obiektów'}), 400
+    if len(items) > MAX_PENDING_TRANSACTIONS:
+        return jsonify({'status': 'error', 'message': f'Najwyżej {MAX_PENDING_TRANSACTIONS} żądań naraz'}), 400
+    try:
+        requests = [parse_transaction_request(item, payload) for item in items]
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    try:
+        address = connection_manager.resolve_address(payload.get('address'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    
+    add_log("API: transakcje: %d", "DEBUG", len(requests), category="http", address=address)
+    futures = qt_call(connection_manager.transact, address, requests)
+    results = [transaction_result(future, data, timeout_ms)
+               for future, (data, _, timeout_ms) in zip(futures, requests)]
+    
+    if not batch:
+        result, code = results[0]
+        return jsonify({**result, 'address': address}), code
+    failed = [code for _, code in results if code != 200]
+    return jsonify({
+        'status': 'error' if failed else 'success',
+        'address': address,
+        'completed': len(results) - len(failed),
+        'failed': len(failed),
+        'results': [result for result, _ in results]
+    }), failed[0] if failed else 200
+
+
+@app.route('/api/v1/jobs', methods=['POST'])
+def api_create_job():
+    """
+    Tworzy zadanie cykliczne: {"address": .., "data": "0x01", "interval_ms": 1000,
+    "mode": "rate" | "delay", "paused": false}. Adres jest opcjonalny przy jednym połączeniu.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not polling_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    try:
+        data, interval, mode = parse_polling_job(payload)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    try:
+        address = connection_manager.resolve_address(payload.get('address'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    try:
+        job = polling_manager.create(address, data, interval, mode, paused=bool(payload.get('paused')))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    return jsonify({'status': 'success', 'job': job.to_dict(),
+                    'job_url': url_for('api_job_status', job_id=job.id)}), 201
+
+
+@app.route('/api/v1/jobs')
+def api_list_jobs():
+    """Zwraca zadania cykliczne (opcjonalnie tylko dla ?address=)"""
+    address = request.args.get('address')
+    if address:
+        address = ConnectionManager.normalize(address)
+    jobs = polling_manager.list_jobs(address) if polling_manager else []
+    return jsonify({'status': 'success', 'jobs': [job.to_dict() for job in jobs]})
+
+
+@app.route('/api/v1/jobs/<job_id>', methods=['GET', 'DELETE'])
+def api_job_status(job_id):
+    """Zwraca stan zadania cyklicznego lub je usuwa (DELETE)"""
+    job = polling_manager.get(job_id) if polling_manager else None
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono zadania'}), 404
+    if request.method == 'DELETE':
+        polling_manager.delete(job_id)
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+
+@app.route('/api/v1/jobs/<job_id>/<action>', methods=['POST'])
+def api_job_action(job_id, action):
+    """Wstrzymuje (pause) lub wznawia (resume) zadanie cykliczne"""
+    if action not in ("pause", "resume"):
+        return jsonify({'status': 'error', 'message': f'Nieznana akcja: {action}'}), 404
+    job = polling_manager.get(job_id) if polling_manager else None
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono zadania'}), 404
+    changed = polling_manager.pause(job_id) if action == "pause" else polling_manager.resume(job_id)
+    if not changed:
+        message = 'Zadanie jest już wstrzymane' if action == "pause" else 'Zadanie nie jest wstrzymane'
+        return jsonify({'status': 'error', 'message': message, 'job': job.to_dict()}), 409
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+
+@app.route('/api/v1/uploads')
+def api_list_uploads():
+    """Zwraca ostatnie transfery binarne"""
+    return jsonify({'status': 'success', 'uploads': [upload.to_dict() for upload in upload_registry.recent()]})
+
+
+@app.route('/api/v1/uploads/<upload_id>')
+def api_upload_status(upload_id):
+    """Zwraca postęp transferu binarnego (offset to miejsce wznowienia)"""
+    upload = upload_registry.get(upload_id)
+    if upload is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono transferu'}), 404
+    return jsonify({'status': 'success', 'upload': upload.to_dict()})
+
+
+@app.route('/api/v1/uploads/<upload_id>/events')
+def api_upload_events(upload_id):
+    """Strumień SSE z postępem transferu (receiving, progress, interrupted, complete, error)"""
+    upload = upload_registry.get(upload_id)
+    if upload is None:
+        return jsonify({'status': 'error', 'message': 'Nie znaleziono transferu'}), 404
+    return job_event_stream(upload)
+
+
+# Trasa do przyrostowego pobierania logów
+@app.route('/logs')
+def get_logs():
+    """
+    Zwraca wpisy logów nowsze niż podany numer sekwencyjny (?since=N).
+    Trasa celowo nie loguje własnych wywołań, bo jest odpytywana cyklicznie.
+    """
+    since = request.args.get('since', default=0, type=int)
+    limit = request.args.get('limit', default=None, type=int)
+    latest_seq = log_store.last_seq
+    entries = log_store.since(since, limit)
+    
+    # Kursor dla następnego zapytania; min() obsługuje restart serwera,
+    # po którym klient może mieć kursor większy niż aktualna numeracja
+    next_seq = entries[-1].seq if entries else min(since, latest_seq)
+    
+    return jsonify({
+        'status': 'success',
+        'logs': [entry.to_dict() for entry in entries],
+        'last_seq': next_seq,
+        # Klient nie zdążył odebrać części wpisów, zanim zostały nadpisane
+        'truncated': since + 1 < log_store.first_seq
+    })
+
+
+def _parse_time_param(value):
+    """Parsuje czas z parametru zapytania: sekundy epoki lub format ISO 8601"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+# Trasa do zapytań o logi z filtrowaniem po stronie serwera
+@app.route('/api/logs/query')
+def query_logs():
+    """
+    Zwraca stronę logów przefiltrowanych po poziomie (?level=ERROR,WARNING),
+    tekście (?q=), przedziale czasu (?from=, ?to=) i kursorze (?before=).
+    """
+    try:
+        levels = [level.strip().upper() for level in request.args.get('level', '').split(',') if level.strip()]
+        limit = min(max(request.args.get('limit', default=100, type=int), 1), 1000)
+        
+        page = log_store.query(
+            levels=levels or None,
+            text=request.args.get('q') or None,
+            time_from=_parse_time_param(request.args.get('from')),
+            time_to=_parse_time_param(request.args.get('to')),
+            before=request.args.get('before', default=None, type=int),
+            limit=limit,
+            category=request.args.get('category') or None,
+            address=request.args.get('address') or None
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'logs': [entry.to_dict() for entry in page['entries']],
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more'],
+            'last_seq': log_store.last_seq,
+            'counts': log_store.level_counts()
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Nieprawidłowy parametr zapytania: {str(e)}",
+            'logs': []
+        }), 400
+
+
+# Trasa do odczytu i zmiany progów logowania w czasie działania
+@app.route('/api/logs/levels', methods=['GET', 'POST'])
+def log_levels():
+    """
+    GET zwraca aktualne progi logowania dla kategorii.
+    POST ({"level": "INFO", "category": "bluetooth"}) zmienia próg kategorii.
+    """
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or request.form
+        try:
+            set_log_level(payload.get('level', ''), payload.get('category') or "*")
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        add_log("Zmieniono próg logów kategorii %s na %s", "INFO",
+                payload.get('category') or "*", payload.get('level', '').upper(), category="http")
+    
+    names = {weight: name for name, weight in LOG_LEVELS.items()}
+    return jsonify({
+        'status': 'success',
+        'levels': {category: names.get(weight, weight) for category, weight in log_thresholds.items()}
+    })
+
+
+# Trasa do konfiguracji logowania odbieranych danych
+@app.route('/api/logs/receive', methods=['GET', 'POST'])
+def receive_logging():
+    """
+    GET zwraca ustawienia logowania odbioru.
+    POST ({"mode": "summary", "interval": 1.0, "sample_every": 100}) zmienia je
+    dla bieżącego i kolejnych połączeń.
+    """
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or request.form
+        try:
+            mode = payload.get('mode') or None
+            if mode is not None and mode not in ReceiveLogger.MODES:
+                raise ValueError(f"Nieznany tryb logowania odbioru: {mode}")
+            interval = float(payload['interval']) if payload.get('interval') not in (None, '') else None
+            sample_every = int(payload['sample_every']) if payload.get('sample_every') not in (None, '') else None
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        for key, value in (('mode', mode), ('interval', interval), ('sample_every', sample_every)):
+            if value is not None:
+                receive_log_settings[key] = value
+        if connection_manager:
+            # Liczniki okna zmienia _on_ready_read w wątku Qt - konfiguracja też musi tam trafić
+            for client in connection_manager.clients():
+                qt_call(client.rx_logger.configure, mode, interval, sample_every)
+        add_log("Zmieniono tryb logowania odbioru: %s", "INFO", receive_log_settings['mode'], category="http")
+    
+    return jsonify({
+        'status': 'success',
+        'defaults': receive_log_settings,
+        'current': {client.target_address: qt_call(client.rx_logger.settings)
+                    for client in connection_manager.clients()} if connection_manager else None
+    })
+
+
+@app.route('/api/rx/framing', methods=['GET', 'POST'])
+def receive_framing():
+    """
+    GET zwraca ustawienia ramkowania odbioru.
+    POST ({"mode": "delimiter", "delimiter": "0D0A"}, {"mode": "length", "length_bytes": 2,
+    "byteorder": "little"}, {"mode": "cobs"}, {"mode": "fixed", "frame_size": 8}) zmienia je
+    dla bieżących i kolejnych połączeń, a z polem address - tylko dla jednego urządzenia.
+    """
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or request.form
+        settings = {}
+        try:
+            for key, convert in (('mode', str), ('delimiter', str), ('length_bytes', int),
+                                 ('byteorder', str), ('frame_size', int), ('max_frame', int)):
+                if payload.get(key) not in (None, ''):
+                    settings[key] = convert(payload[key])
+            # Walidacja przed zmianą ustawień połączeń
+            create_frame_decoder(**{**rx_framing_settings, **settings})
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        address = payload.get('address')
+        if address:
+            if not connection_manager or not connection_manager.get_session(address):
+                return jsonify({'status': 'error', 'message': f'Brak sesji urządzenia {address}'}), 404
+            clients = [connection_manager.get_session(address)]
+        else:
+            rx_framing_settings.update(settings)
+            clients = connection_manager.clients() if connection_manager else []
+        for client in clients:
+            qt_call(client.configure_framing, **settings)
+        add_log("Zmieniono ramkowanie odbioru: %s", "INFO", settings.get('mode', rx_framing_settings['mode']),
+                category="http", address=address)
+    
+    return jsonify({
+        'status': 'success',
+        'defaults': rx_framing_settings,
+        'current': {client.target_address: client.framer.settings()
+                    for client in connection_manager.clients()} if connection_manager else None
+    })
+
+
+@app.route('/api/capture', methods=['GET', 'POST'])
+def traffic_capture():
+    """
+    GET zwraca stan zapisu ruchu do pliku przechwycenia. POST {"enabled": true,
+    "path": "capture.btcap"} włącza zapis (dopisując do istniejącego pliku),
+    a {"enabled": false} go wyłącza. Plik można odtworzyć BluetoothCaptureReplay.py.
+    """
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or request.form
+        enabled = str(payload.get('enabled', 'true')).lower() in ("1", "true", "on", "yes")
+        if enabled:
+            path = payload.get('path') or CAPTURE_FILE or "capture.btcap"
+            try:
+                start_capture(path)
+            except (OSError, ValueError) as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 400
+        else:
+            stopped = stop_capture()
+            return jsonify({'status': 'success', 'enabled': False, 'capture': stopped})
+    
+    recorder = capture_recorder
+    return jsonify({'status': 'success', 'enabled': recorder is not None,
+                    'capture': recorder.stats() if recorder else None})
+
+
+# Trasa do podglądu stanu kolejki logów
+@app.route('/api/logs/sinks')
+def log_sinks():
+    """Zwraca stan kolejki logów i liczbę odrzuconych wpisów"""
+    return jsonify({
+        'status': 'success',
+        **log_dispatcher.stats()
+    })
+
+
 # Nowa trasa do pobierania sparowanych urządzeń
 @app.route('/get_paired_devices')
 def get_paired_devices():
     """Trasa do pobierania listy sparowanych urządzeń"""
-    add_log("Otrzymano żądanie pobrania sparowanych urządzeń", "DEBUG")
+    add_log("Otrzymano żądanie pobrania sparowanych urządzeń", "DEBUG", category="http")
     try:
-        # Pobierz urządzenia z systemu
-        system_devices = get_system_paired_devices()
+        # Wymuszenie odświeżenia (?refresh=1) nie blokuje - lista zostanie pobrana w tle
+        if request.args.get('refresh'):
+            paired_device_cache.invalidate("żądanie użytkownika")
         
-        # Dodaj informacje o aktualnie podłączonym urządzeniu
-        if bt_client and bt_client.is_connected and bt_client.connected_device_address:
-            for device in system_devices:
-                if device['address'] == bt_client.connected_device_address:
-                    device['connected'] = True
+        # Tylko pierwsze żądanie po starcie czeka na pobranie listy z systemu
+        paired_device_cache.wait_loaded(timeout=10)
         
         return jsonify({
             'status': 'success',
-            'devices': system_devices
+            'devices': get_system_paired_devices(),
+            'cache': paired_device_cache.metadata()
         })
     except Exception as e:
-        add_log(f"Błąd podczas pobierania sparowanych urządzeń: {str(e)}", "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log("Błąd podczas pobierania sparowanych urządzeń: %s", "ERROR", e, category="http")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="http")
         return jsonify({
             'status': 'error',
             'message': str(e),
@@ -1019,13 +5110,96 @@ def get_paired_devices():
 # Nowa trasa do sprawdzania statusu połączenia dla AJAX
 @app.route('/connection_status')
 def connection_status():
-    """Trasa do sprawdzania statusu połączenia dla AJAX"""
-    is_connected = bt_client and bt_client.is_connected
-    address = bt_client.connected_device_address if bt_client and bt_client.is_connected else None
+    """
+    Trasa do sprawdzania statusu połączenia dla AJAX. Z parametrem ?address= zwraca
+    stan wskazanego urządzenia; bez niego - pierwsze połączone urządzenie i listę wszystkich.
+    """
+    connected = connection_manager.connected_addresses() if connection_manager else []
+    address = request.args.get('address')
+    
+    if address:
+        address = ConnectionManager.normalize(address)
+        return jsonify({
+            'connected': address in connected,
+            'address': address
+        })
+    
+    return jsonify({
+        'connected': bool(connected),
+        'address': connected[0] if connected else None,
+        'addresses': connected,
+        'sessions': connection_manager.sessions_info() if connection_manager else []
+    })
+
+
+@app.route('/api/status/events')
+def status_events():
+    """
+    Strumień SSE stanu aplikacji. Pierwsze zdarzenie (snapshot) zawiera połączenia,
+    sparowane i wykryte urządzenia; kolejne przychodzą tylko przy zmianach:
+    connection (połączenie lub rozłączenie), paired (nowa lista sparowanych)
+    i discovered (nowe lub przemianowane urządzenie ze skanowania).
+    """
+    subscription = status_channel.subscribe()
+    
+    def generate():
+        try:
+            while True:
+                events, resync = subscription.get(timeout=15)
+                if resync:
+                    yield sse_event("snapshot", status_snapshot())
+                for event_type, data in events:
+                    yield sse_event(event_type, data)
+                if not events and not resync:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/connections')
+def list_connections():
+    """Zwraca wszystkie sesje Bluetooth i ich stan"""
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    return jsonify({
+        'status': 'success',
+        'sessions': connection_manager.sessions_info(),
+        'connected': connection_manager.connected_addresses(),
+        'limit': MAX_CONNECTIONS
+    })
+
+
+@app.route('/api/connections/send', methods=['POST'])
+def send_to_many():
+    """
+    Wysyła te same dane do wielu urządzeń naraz.
+    JSON: {"data": "0x01FF", "addresses": ["AA:BB:..", ...]} - bez addresses do wszystkich połączonych.
+    """
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    payload = request.get_json(silent=True) or {}
+    data = payload.get('data')
+    if not data:
+        return jsonify({'status': 'error', 'message': 'Nie podano danych do wysłania'}), 400
+    
+    addresses = [ConnectionManager.normalize(a) for a in payload.get('addresses') or connection_manager.connected_addresses()]
+    if not addresses:
+        return jsonify({'status': 'error', 'message': 'Brak aktywnego połączenia'}), 409
+    
+    add_log("Wysyłanie danych do %d urządzeń: %s", "DEBUG", len(addresses), data, category="http")
+    try:
+        results = qt_call(connection_manager.send_many, addresses, data)
+    except Exception as e:
+        add_log("Błąd podczas wysyłania danych: %s", "ERROR", e, category="http")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
     
     return jsonify({
-        'connected': is_connected,
-        'address': address
+        'status': 'success' if all(results.values()) else 'error',
+        'results': results
     })
 
 
@@ -1033,15 +5207,17 @@ def connection_status():
 @app.route('/get_discovered_devices')
 def get_discovered_devices():
     """Trasa do pobierania listy urządzeń znalezionych podczas skanowania"""
-    add_log("Otrzymano żądanie pobrania wyników skanowania", "DEBUG")
+    add_log("Otrzymano żądanie pobrania wyników skanowania", "DEBUG", category="http")
     try:
+        devices = device_cache.devices()
         return jsonify({
             'status': 'success',
-            'devices': discovered_devices,
-            'count': len(discovered_devices)
+            'devices': devices,
+            'count': len(devices),
+            'ttl': device_cache.ttl
         })
     except Exception as e:
-        add_log(f"Błąd podczas pobierania wyników skanowania: {str(e)}", "ERROR")
+        add_log("Błąd podczas pobierania wyników skanowania: %s", "ERROR", e, category="http")
         return jsonify({
             'status': 'error',
             'message': str(e),
@@ -1050,30 +5226,173 @@ def get_discovered_devices():
         }), 500
 
 
+@app.route('/api/connections/<address>/reconnect', methods=['GET', 'POST'])
+def reconnect_settings(address):
+    """
+    GET zwraca stan automatycznego ponownego łączenia urządzenia (404 bez sesji).
+    POST ({"enabled": true, "max_attempts": 10}) włącza je lub wyłącza; sesja jest
+    tworzona tylko przy włączaniu.
+    """
+    if not connection_manager:
+        return jsonify({'status': 'error', 'message': 'Bluetooth nie został zainicjalizowany'}), 503
+    
+    enabled = max_attempts = None
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or request.form
+        try:
+            if payload.get('enabled') is not None:
+                enabled = str(payload['enabled']).lower() in ("1", "true", "yes", "on")
+            if payload.get('max_attempts') not in (None, ''):
+                max_attempts = int(payload['max_attempts'])
+                if max_attempts < 1:
+                    raise ValueError("max_attempts musi być dodatnie")
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        if enabled and not ConnectionManager.is_valid_address(address):
+            return jsonify({'status': 'error', 'message': f'Nieprawidłowy adres MAC: {address}'}), 400
+        add_log("Automatyczne ponowne łączenie: %s", "INFO", enabled, category="http", address=address)
+        try:
+            reconnect = qt_call(connection_manager.configure_reconnect, address, enabled, max_attempts)
+        except RuntimeError as e:
+            # Limit sesji bez żadnej nieaktywnej do zwolnienia
+            return jsonify({'status': 'error', 'message': str(e)}), 409
+    else:
+        reconnect = qt_call(connection_manager.reconnect_info, address)
+    
+    if reconnect is None:
+        return jsonify({'status': 'error', 'message': f'Brak sesji urządzenia {address}'}), 404
+    return jsonify({'status': 'success', 'address': ConnectionManager.normalize(address), 'reconnect': reconnect})
+
+
+@app.route('/api/connections/<address>/rx')
+def receive_history(address):
+    """Ramki odebrane od urządzenia z historii połączenia, nowsze niż since"""
+    client = connection_manager.get_session(address) if connection_manager else None
+    if not client:
+        return jsonify({'status': 'error', 'message': f'Brak sesji urządzenia {address}'}), 404
+    
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'since musi być liczbą'}), 400
+    return jsonify({
+        'status': 'success',
+        'address': ConnectionManager.normalize(address),
+        **client.rx_stream.stats(),
+        'frames': [receive_frame_dict(frame) for frame in client.rx_stream.since(since)]
+    })
+
+
+@app.route('/api/connections/<address>/rx/events')
+def receive_events(address):
+    """
+    Strumień SSE ramek odbieranych od urządzenia. Każda ramka ma id równe jej
+    numerowi seq, więc EventSource po zerwaniu połączenia wznawia strumień od
+    ostatnio otrzymanej ramki (nagłówek Last-Event-ID). Parametr last_seq
+    pozwala pobrać ramki z historii przy pierwszym połączeniu (0 - cała historia).
+    Zdarzenie "dropped" informuje o ramkach utraconych przez wolnego odbiorcę.
+    """
+    client = connection_manager.get_session(address) if connection_manager else None
+    if not client:
+        return jsonify({'status': 'error', 'message': f'Brak sesji urządzenia {address}'}), 404
+    
+    stream = client.rx_stream
+    last_seq = request.headers.get('Last-Event-ID') or request.args.get('last_seq')
+    try:
+        last_seq = int(last_seq) if last_seq not in (None, '') else None
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'last_seq musi być liczbą'}), 400
+    if last_seq is not None and last_seq > stream.last_seq:
+        # Numer z poprzedniej sesji urządzenia - nowa historia zaczyna się od 1
+        last_seq = 0
+    subscription = stream.subscribe(last_seq)
+    
+    def generate():
+        try:
+            while True:
+                frames, dropped, closed = subscription.get(timeout=15)
+                if dropped:
+                    yield sse_event("dropped", {'count': dropped})
+                for frame in frames:
+                    yield sse_event("frame", receive_frame_dict(frame), frame[0])
+                if closed:
+                    yield sse_event("closed", {'address': client.target_address})
+                    break
+                if not frames and not dropped:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def adapter_status():
+    """Stan adaptera i ostatniego resetu (wątek Qt)"""
+    local_device = QBluetoothLocalDevice()
+    valid = local_device.isValid()
+    return {
+        'valid': valid,
+        'name': local_device.name() if valid else None,
+        'address': local_device.address().toString() if valid else None,
+        'host_mode': local_device.hostMode().name if valid else None,
+        'reset': adapter_reset.to_dict() if adapter_reset else None
+    }
+
+
+@app.route('/api/adapter')
+def get_adapter_status():
+    """Zwraca stan adaptera Bluetooth"""
+    try:
+        return jsonify({'status': 'success', 'adapter': qt_call(adapter_status)})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/adapter/reset', methods=['POST'])
+def reset_adapter():
+    """
+    Rozpoczyna reset adaptera (rozłącza wszystkie urządzenia) i od razu zwraca 202.
+    Z parametrem wait=1 czeka na wynik resetu.
+    """
+    add_log("Otrzymano żądanie resetu adaptera", "DEBUG", category="http")
+    try:
+        future = qt_call(start_adapter_reset)
+        if request.values.get('wait'):
+            max_wait = (ADAPTER_POWER_OFF_TIMEOUT_MS + 3 * ADAPTER_POWER_ON_TIMEOUT_MS) / 1000 + 1
+            success = future.result(timeout=max_wait)
+            return jsonify({
+                'status': 'success' if success else 'error',
+                'adapter': qt_call(adapter_status)
+            }), 200 if success else 500
+        return jsonify({'status': 'success', 'adapter': qt_call(adapter_status)}), 202
+    except Exception as e:
+        add_log("Błąd podczas resetowania Bluetooth: %s", "ERROR", e, category="http")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 # Trasa do symulacji połączenia (tylko do testów)
 @app.route('/simulate_connection', methods=['POST'])
 def simulate_connection():
     """Trasa do symulacji połączenia (tylko do testów)"""
-    add_log("Otrzymano żądanie symulacji połączenia", "DEBUG")
-    
-    # Symulujemy połączenie
-    global bt_client
+    add_log("Otrzymano żądanie symulacji połączenia", "DEBUG", category="http")
     
-    if bt_client:
-        # Tylko symulujemy połączenie - ustawiamy flagę bez faktycznego łączenia
-        bt_client.is_connected = True
-        
-        # Ustawiamy przykładowy adres MAC podłączonego urządzenia
-        bt_client.connected_device_address = "00:11:22:33:44:55"
-        global connected_device_address
-        connected_device_address = "00:11:22:33:44:55"
-        
-        # Emitujemy sygnał połączenia
-        bt_client.connected.emit()
+    if connection_manager:
+        def simulate():
+            # Tylko symulujemy połączenie - ustawiamy flagę bez faktycznego łączenia
+            client = connection_manager.session_for("00:11:22:33:44:55")
+            client.is_connected = True
+            
+            # Ustawiamy przykładowy adres MAC podłączonego urządzenia
+            client.connected_device_address = "00:11:22:33:44:55"
+            
+            # Emitujemy sygnał połączenia
+            client.connected.emit()
         
-        add_log("Zasymulowano połączenie z urządzeniem", "INFO")
+        qt_call(simulate)
+        add_log("Zasymulowano połączenie z urządzeniem", "INFO", category="http")
     else:
-        add_log("Bluetooth nie został zainicjalizowany", "ERROR")
+        add_log("Bluetooth nie został zainicjalizowany", "ERROR", category="http")
     
     return redirect(url_for('index'))
 
@@ -1094,7 +5413,7 @@ def media_play_pause():
             # Windows implementation
             success = windows_send_media_key(0xB3)  # VK_MEDIA_PLAY_PAUSE
             if success:
-                add_log("Windows: Media Play/Pause wykonane pomyślnie", "INFO")
+                add_log("Windows: Media Play/Pause wykonane pomyślnie", "INFO", category="media")
                 return jsonify({"success": True, "message": "Media play/pause command sent (Windows)"})
             else:
                 return jsonify({"success": False, "message": "Failed to send Windows media command"})
@@ -1103,8 +5422,8 @@ def media_play_pause():
     
     except Exception as e:
         error_message = f"Błąd podczas wysyłania komendy play/pause: {str(e)}"
-        add_log(error_message, "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log(error_message, "ERROR", category="media")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="media")
         return jsonify({"success": False, "message": error_message})
 
 @app.route('/api/media/volume_up', methods=['POST'])
@@ -1118,7 +5437,7 @@ def media_volume_up():
         if current_os == "Windows":
             success = windows_send_media_key(0xAF)  # VK_VOLUME_UP
             if success:
-                add_log("Windows: Głośność zwiększona", "INFO")
+                add_log("Windows: Głośność zwiększona", "INFO", category="media")
                 return jsonify({"success": True, "message": "Volume up command sent (Windows)"})
             else:
                 return jsonify({"success": False, "message": "Failed to send Windows volume up command"})
@@ -1127,8 +5446,8 @@ def media_volume_up():
     
     except Exception as e:
         error_message = f"Błąd podczas wysyłania komendy volume up: {str(e)}"
-        add_log(error_message, "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log(error_message, "ERROR", category="media")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="media")
         return jsonify({"success": False, "message": error_message})
 
 @app.route('/api/media/volume_down', methods=['POST'])
@@ -1142,7 +5461,7 @@ def media_volume_down():
         if current_os == "Windows":
             success = windows_send_media_key(0xAE)  # VK_VOLUME_DOWN
             if success:
-                add_log("Windows: Głośność zmniejszona", "INFO")
+                add_log("Windows: Głośność zmniejszona", "INFO", category="media")
                 return jsonify({"success": True, "message": "Volume down command sent (Windows)"})
             else:
                 return jsonify({"success": False, "message": "Failed to send Windows volume down command"})
@@ -1151,8 +5470,8 @@ def media_volume_down():
     
     except Exception as e:
         error_message = f"Błąd podczas wysyłania komendy volume down: {str(e)}"
-        add_log(error_message, "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log(error_message, "ERROR", category="media")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="media")
         return jsonify({"success": False, "message": error_message})
 
 @app.route('/api/media/previous', methods=['POST'])
@@ -1166,7 +5485,7 @@ def media_previous():
         if current_os == "Windows":
             success = windows_send_media_key(0xB1)  # VK_MEDIA_PREV_TRACK
             if success:
-                add_log("Windows: Poprzedni utwór", "INFO")
+                add_log("Windows: Poprzedni utwór", "INFO", category="media")
                 return jsonify({"success": True, "message": "Previous track command sent (Windows)"})
             else:
                 return jsonify({"success": False, "message": "Failed to send Windows previous track command"})
@@ -1175,8 +5494,8 @@ def media_previous():
     
     except Exception as e:
         error_message = f"Błąd podczas wysyłania komendy previous track: {str(e)}"
-        add_log(error_message, "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log(error_message, "ERROR", category="media")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="media")
         return jsonify({"success": False, "message": error_message})
 
 @app.route('/api/media/next', methods=['POST'])
@@ -1190,7 +5509,7 @@ def media_next():
         if current_os == "Windows":
             success = windows_send_media_key(0xB0)  # VK_MEDIA_NEXT_TRACK
             if success:
-                add_log("Windows: Następny utwór", "INFO")
+                add_log("Windows: Następny utwór", "INFO", category="media")
                 return jsonify({"success": True, "message": "Next track command sent (Windows)"})
             else:
                 return jsonify({"success": False, "message": "Failed to send Windows next track command"})
@@ -1199,8 +5518,8 @@ def media_next():
     
     except Exception as e:
         error_message = f"Błąd podczas wysyłania komendy next track: {str(e)}"
-        add_log(error_message, "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log(error_message, "ERROR", category="media")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="media")
         return jsonify({"success": False, "message": error_message})
 
 @app.route('/api/media/stop', methods=['POST'])
@@ -1214,7 +5533,7 @@ def media_stop():
         if current_os == "Windows":
             success = windows_send_media_key(0xB2)  # VK_MEDIA_STOP
             if success:
-                add_log("Windows: Media zatrzymane", "INFO")
+                add_log("Windows: Media zatrzymane", "INFO", category="media")
                 return jsonify({"success": True, "message": "Stop command sent (Windows)"})
             else:
                 return jsonify({"success": False, "message": "Failed to send Windows stop command"})
@@ -1223,8 +5542,8 @@ def media_stop():
     
     except Exception as e:
         error_message = f"Błąd podczas wysyłania komendy stop: {str(e)}"
-        add_log(error_message, "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log(error_message, "ERROR", category="media")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="media")
         return jsonify({"success": False, "message": error_message})
 
 @app.route('/api/media/mute', methods=['POST'])
@@ -1238,7 +5557,7 @@ def media_mute():
         if current_os == "Windows":
             success = windows_send_media_key(0xAD)  # VK_VOLUME_MUTE
             if success:
-                add_log("Windows: Dźwięk wyciszony/przywrócony", "INFO")
+                add_log("Windows: Dźwięk wyciszony/przywrócony", "INFO", category="media")
                 return jsonify({"success": True, "message": "Mute command sent (Windows)"})
             else:
                 return jsonify({"success": False, "message": "Failed to send Windows mute command"})
@@ -1247,8 +5566,8 @@ def media_mute():
     
     except Exception as e:
         error_message = f"Błąd podczas wysyłania komendy mute: {str(e)}"
-        add_log(error_message, "ERROR")
-        add_log(f"Stacktrace: {traceback.format_exc()}", "DEBUG")
+        add_log(error_message, "ERROR", category="media")
+        add_log("Stacktrace:", "DEBUG", exc_info=True, category="media")
         return jsonify({"success": False, "message": error_message})
 
 # ========================================
@@ -1290,27 +5609,24 @@ def start_flask_server():
 if __name__ == "__main__":
     # Wyświetl informacje o systemie przy starcie
     current_os = get_current_os()
-    add_log(f"Uruchamianie na systemie: {current_os}", "INFO")
+    add_log("Uruchamianie na systemie: %s", "INFO", current_os)
     
     if current_os != "Windows":
-        add_log(f"Ostrzeżenie: System {current_os} nie jest w pełni obsługiwany", "WARNING")
+        add_log("Ostrzeżenie: System %s nie jest w pełni obsługiwany", "WARNING", current_os)
         add_log("Funkcje sterowania mediami działają tylko na Windows", "WARNING")
     
     # Inicjalizacja Qt
     qt_app = QCoreApplication(sys.argv)
+    qt_bridge = QtBridge()
     
     # Inicjalizacja Bluetooth
     if init_bluetooth():
-        # Uruchom wątek Qt
-        qt_thread = QtThread()
-        qt_thread.start()
-        
         # Uruchom Flask w osobnym wątku
         flask_thread = threading.Thread(target=start_flask_server)
         flask_thread.daemon = True
         flask_thread.start()
         
-        # Uruchom główną pętlę Qt
+        # Uruchom główną pętlę Qt - obsługuje sygnały socketu i polecenia z QtBridge
         add_log("Uruchamiam główną pętlę Qt", "INFO")
         sys.exit(qt_app.exec())
     else:
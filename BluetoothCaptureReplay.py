@@ -0,0 +1,249 @@
+"""
+Odtwarzanie pliku przechwycenia ruchu (BT_CAPTURE_FILE lub POST /api/capture) bez
+sprzętu Bluetooth. Zapisane zdarzenia jednego urządzenia trafiają do klienta
+BluetoothConsoleClient przez socket podstawiony w miejsce QBluetoothSocket, więc
+ramkowanie, strumień odbioru i transakcje działają tak jak przy prawdziwym połączeniu.
+
+Przykłady:
+  python BluetoothCaptureReplay.py capture.btcap --list
+  python BluetoothCaptureReplay.py capture.btcap --speed 0 --framing delimiter --delimiter 0D0A
+  python BluetoothCaptureReplay.py capture.btcap --from 2024-05-01T12:00:00 --send
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal, QByteArray
+from PySide6.QtBluetooth import QBluetoothSocket
+
+from BluetoothAPI import (BluetoothConsoleClient, CaptureReader, CAPTURE_KINDS, CAPTURE_RX, CAPTURE_TX,
+                          CAPTURE_CONNECT, CAPTURE_DISCONNECT, CAPTURE_ERROR, CAPTURE_ERROR_CODE,
+                          FRAMING_MODES, HexDump)
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%H:%M:%S.%f")[:-3]
+
+
+def parse_time(value):
+    """Chwila jako sekundy od epoki lub data ISO (np. 2024-05-01T12:00:00)"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class ReplaySocket(QObject):
+    """Socket z sygnałami QBluetoothSocket, którego zdarzenia wywołuje odtwarzanie"""
+
+    connected = Signal()
+    disconnected = Signal()
+    readyRead = Signal()
+    errorOccurred = Signal(object)
+    bytesWritten = Signal(int)
+
+    def __init__(self):
+        super().__init__()
+        self._state = QBluetoothSocket.SocketState.UnconnectedState
+        self._buffer = b""
+        self.written = 0
+
+    def state(self):
+        return self._state
+
+    def connectToService(self, address, port):
+        self._state = QBluetoothSocket.SocketState.ConnectingState
+
+    def disconnectFromService(self):
+        self.go_down()
+
+    def abort(self):
+        self._state = QBluetoothSocket.SocketState.UnconnectedState
+
+    def errorString(self):
+        return ""
+
+    def write(self, data):
+        # Wysłane dane "docierają" od razu - potwierdzenie w kolejnym przebiegu pętli Qt
+        size = len(data)
+        self.written += size
+        print(f"  -> socket {size} B: {HexDump(bytes(data))}")
+        QTimer.singleShot(0, lambda: self.bytesWritten.emit(size))
+        return size
+
+    def readAll(self):
+        data, self._buffer = self._buffer, b""
+        return QByteArray(data)
+
+    def deliver(self, data):
+        self._buffer += data
+        self.readyRead.emit()
+
+    def bring_up(self):
+        self._state = QBluetoothSocket.SocketState.ConnectedState
+        self.connected.emit()
+
+    def go_down(self):
+        if self._state != QBluetoothSocket.SocketState.UnconnectedState:
+            self._state = QBluetoothSocket.SocketState.UnconnectedState
+            self.disconnected.emit()
+
+    def fail(self, code):
+        self.errorOccurred.emit(QBluetoothSocket.SocketError(code))
+
+
+class ReplayClient(BluetoothConsoleClient):
+    """Klient korzystający z socketu odtwarzania zamiast RFCOMM"""
+
+    def _new_socket(self):
+        return ReplaySocket()
+
+
+class CaptureReplay:
+    """
+    Odtwarza rekordy jednego urządzenia z zachowaniem odstępów czasu (podzielonych
+    przez speed; speed 0 - bez czekania). Każdy rekord jest planowany dopiero po
+    obsłużeniu poprzedniego, więc plik jest czytany stopniowo przez mmap.
+    """
+
+    def __init__(self, records, address, speed=1.0, send_tx=False):
+        self.records = records
+        self.speed = speed
+        self.send_tx = send_tx
+        self.played = 0
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.frames = 0
+
+        self.client = ReplayClient(address)
+        self.client.message_received.connect(self._on_frame)
+        self._origin = None  # (znacznik czasu pierwszego rekordu, time.monotonic() startu)
+        self._current = None
+
+    def start(self):
+        self._schedule_next()
+
+    def _schedule_next(self):
+        record = next(self.records, None)
+        if record is None:
+            QTimer.singleShot(50, self._finish)
+            return
+        if self._origin is None:
+            self._origin = (record.timestamp, time.monotonic())
+            # Zapis zaczęty w trakcie połączenia - połącz od razu
+            if record.kind != CAPTURE_CONNECT:
+                self.client.socket.bring_up()
+
+        delay = 0.0
+        if self.speed > 0:
+            due = (record.timestamp - self._origin[0]) / self.speed
+            delay = due - (time.monotonic() - self._origin[1])
+        self._current = record
+        QTimer.singleShot(max(0, round(delay * 1000)), self._play)
+
+    def _play(self):
+        record = self._current
+        socket = self.client.socket
+        self.played += 1
+        print(f"[{format_time(record.timestamp)}] {CAPTURE_KINDS.get(record.kind, record.kind):<10} "
+              f"{len(record.payload)} B")
+
+        if record.kind == CAPTURE_RX:
+            self.rx_bytes += len(record.payload)
+            socket.deliver(record.payload)
+        elif record.kind == CAPTURE_TX:
+            print(f"  zapisane TX: {HexDump(record.payload)}")
+            if self.send_tx:
+                self.tx_bytes += len(record.payload)
+                if self.client.send_data(record.payload):
+                    # Bez czekania na okno łączenia zapisów - kolejny rekord (np. rozłączenie)
+                    # mógłby porzucić dane jeszcze nieprzekazane do socketu
+                    self.client.tx.flush()
+        elif record.kind == CAPTURE_CONNECT:
+            socket.bring_up()
+        elif record.kind == CAPTURE_DISCONNECT:
+            socket.go_down()
+        elif record.kind == CAPTURE_ERROR:
+            (code,) = CAPTURE_ERROR_CODE.unpack_from(record.payload)
+            print(f"  błąd: {record.payload[CAPTURE_ERROR_CODE.size:].decode(errors='replace')}")
+            socket.fail(code)
+
+        self._schedule_next()
+
+    def _on_frame(self, frame):
+        self.frames += 1
+        print(f"  ramka #{self.frames} ({len(frame)} B): {HexDump(frame)}")
+
+    def _finish(self):
+        framer = self.client.framer
+        print(f"Odtworzono {self.played} rekordów: odebrano {self.rx_bytes} B, ramek: {self.frames}, "
+              f"porzucono {framer.dropped_bytes} B (ramkowanie: {framer.mode})")
+        if self.send_tx:
+            written = self.client.socket.written
+            print(f"Wysłano do socketu {written} z {self.tx_bytes} B zapisanych TX")
+            if written != self.tx_bytes:
+                print("Ostrzeżenie: socket nie otrzymał wszystkich zapisanych danych TX")
+        QCoreApplication.quit()
+
+
+def list_records(records):
+    count = 0
+    for record in records:
+        count += 1
+        payload = record.payload
+        preview = HexDump(payload[:32])
+        print(f"{format_time(record.timestamp)} {CAPTURE_KINDS.get(record.kind, record.kind):<10} "
+              f"{record.address} {len(payload):>6} B  {preview}{'...' if len(payload) > 32 else ''}")
+    print(f"Rekordów: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odtwarzanie pliku przechwycenia ruchu Bluetooth")
+    parser.add_argument("capture", help="plik przechwycenia")
+    parser.add_argument("--address", help="urządzenie do odtworzenia (domyślnie pierwsze w zapisie)")
+    parser.add_argument("--from", dest="start", type=parse_time, help="początek (s od epoki lub data ISO)")
+    parser.add_argument("--to", dest="end", type=parse_time, help="koniec (s od epoki lub data ISO)")
+    parser.add_argument("--speed", type=float, default=1.0, help="mnożnik tempa; 0 - bez czekania")
+    parser.add_argument("--send", action="store_true", help="wysyłaj zapisane TX przez kolejkę nadawczą klienta")
+    parser.add_argument("--framing", choices=FRAMING_MODES, help="tryb ramkowania odbioru (domyślnie BT_RX_FRAMING)")
+    parser.add_argument("--delimiter", help="separator ramek HEX dla trybu delimiter")
+    parser.add_argument("--list", action="store_true", help="tylko wypisz rekordy")
+    args = parser.parse_args()
+
+    try:
+        reader = CaptureReader(args.capture)
+    except (OSError, ValueError) as e:
+        print(f"Błąd: {e}")
+        return 1
+
+    with reader:
+        if args.list:
+            list_records(reader.records(args.start, args.end))
+            return 0
+
+        address = args.address.upper() if args.address else None
+        if address is None:
+            first = next(reader.records(args.start, args.end), None)
+            if first is None:
+                print("Brak rekordów do odtworzenia")
+                return 1
+            address = first.address
+        records = (record for record in reader.records(args.start, args.end) if record.address == address)
+
+        app = QCoreApplication(sys.argv)
+        replay = CaptureReplay(records, address, args.speed, args.send)
+        framing = {key: value for key, value in (('mode', args.framing), ('delimiter', args.delimiter)) if value}
+        if framing:
+            try:
+                replay.client.configure_framing(**framing)
+            except ValueError as e:
+                print(f"Błąd: {e}")
+                return 1
+
+        print(f"Odtwarzanie {args.capture} dla {address} (tempo: {args.speed or 'bez czekania'})")
+        QTimer.singleShot(0, replay.start)
+        return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,84 @@ from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal, QEventLoop
 from PySide6.QtBluetooth import (QBluetoothDeviceDiscoveryAgent,
                                 QBluetoothSocket, QBluetoothServiceInfo, QBluetoothAddress, QBluetoothLocalDevice)
 
+# Tablica do zamiany bajtów niedrukowalnych na '.' w podglądzie ASCII
+PRINTABLE_TABLE = bytes(b if 32 <= b <= 126 else ord('.') for b in range(256))
+NON_PRINTABLE_BYTES = bytes(b for b in range(256) if not 32 <= b <= 126)
+
+
+class ReceiveLogger:
+    """
+    Wypisywanie odebranych danych w jednym z trybów:
+    - "full": zrzut HEX i podgląd ASCII każdego fragmentu
+    - "summary": podsumowanie ruchu co interval sekund, opcjonalnie
+      ze zrzutem co sample_every-tego fragmentu
+    - "off": brak wypisywania
+    Okno podsumowania zaczyna się od pierwszego fragmentu i jest zamykane przez
+    timer po interval sekundach, także gdy kolejne dane już nie nadchodzą.
+    """
+    
+    MODES = ("full", "summary", "off")
+    
+    def __init__(self, mode="full", interval=1.0, sample_every=0, parent=None):
+        self.mode = mode
+        self.interval = interval
+        self.sample_every = sample_every
+        self.total_chunks = 0
+        self._window_bytes = 0
+        self._window_chunks = 0
+        self._window_start = None
+        self._timer = QTimer(parent)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+    
+    def configure(self, mode=None, interval=None, sample_every=None):
+        """Zmienia tryb wypisywania; zaległe podsumowanie jest wypisywane przed zmianą"""
+        self.flush()
+        if mode is not None:
+            self.mode = mode
+        if interval is not None:
+            self.interval = max(interval, 0.1)
+        if sample_every is not None:
+            self.sample_every = max(sample_every, 0)
+    
+    def record(self, data):
+        """Rejestruje odebrany fragment danych"""
+        self.total_chunks += 1
+        
+        if self.mode == "full":
+            self._dump(data)
+        if self.mode != "summary":
+            return
+        
+        if not self._window_chunks:
+            self._window_start = time.monotonic()
+            self._timer.start(round(self.interval * 1000))
+        self._window_bytes += len(data)
+        self._window_chunks += 1
+        if self.sample_every and self.total_chunks % self.sample_every == 0:
+            self._dump(data)
+    
+    def _dump(self, data):
+        print(f"Odebrano dane: 0x{data.hex().upper()} ({len(data)} bajtów)")
+        if data.translate(None, NON_PRINTABLE_BYTES):
+            print(f"ASCII: {data.translate(PRINTABLE_TABLE).decode('ascii')}")
+    
+    def flush(self):
+        """Wypisuje podsumowanie bieżącego okna i rozpoczyna nowe"""
+        self._timer.stop()
+        if self._window_chunks:
+            elapsed = max(time.monotonic() - self._window_start, 1e-6)
+            print(f"Odebrano {self._window_bytes} bajtów w {self._window_chunks} fragmentach "
+                  f"w ciągu {elapsed:.1f} s ({self._window_bytes / elapsed:.0f} B/s)")
+        self._reset_window()
+    
+    def _reset_window(self):
+        self._timer.stop()
+        self._window_bytes = 0
+        self._window_chunks = 0
+        self._window_start = None
+
+
 class BluetoothConsoleClient(QObject):
     """Klasa obsługująca komunikację Bluetooth w aplikacji konsolowej"""
     
@@ -23,6 +101,9 @@ class BluetoothConsoleClient(QObject):
         self.is_connected = False
         self.connection_error = False
         self.last_error = ""
+        
+        # Wypisywanie odbieranych danych
+        self.rx_logger = ReceiveLogger(parent=self)
     
     def _create_socket(self):
         """Tworzy nowy socket Bluetooth"""
@@ -235,6 +316,7 @@ class BluetoothConsoleClient(QObject):
     
     def _on_disconnected(self):
         """Handler rozłączenia"""
+        self.rx_logger.flush()
         print("Rozłączono z urządzeniem")
         self.is_connected = False
         self.disconnected.emit()
@@ -242,18 +324,7 @@ class BluetoothConsoleClient(QObject):
     def _on_ready_read(self):
         """Handler odebrania danych"""
         data = self.socket.readAll().data()
-        hex_data = data.hex().upper()
-        print(f"Odebrano dane: 0x{hex_data} ({len(data)} bajtów)")
-        
-        # Próba dekodowania ASCII
-        try:
-            ascii_data = data.decode('ascii')
-            if any(32 <= ord(c) <= 126 for c in ascii_data):
-                printable = ''.join(c if 32 <= ord(c) <= 126 else '.' for c in ascii_data)
-                print(f"ASCII: {printable}")
-        except UnicodeDecodeError:
-            pass
-            
+        self.rx_logger.record(data)
         self.message_received.emit(data)
     
     def _on_socket_error(self, error):
@@ -362,6 +433,7 @@ def interactive_console(bt_client):
     print("  send <hex> - wyślij dane (format hex, np. 01A2FF)")
     print("  scan - skanuj dostępne urządzenia")
     print("  status - sprawdź status połączenia")
+    print("  rxlog <full|summary|off> [interwał] [co N] - tryb wypisywania odebranych danych")
     print("  exit - zakończ program")
     
     while True:
@@ -416,6 +488,20 @@ def interactive_console(bt_client):
                 else:
                     print("Status: Niepołączony")
 
+            elif command.startswith("rxlog "):
+                # Najpierw sprawdź wszystkie argumenty - błędne nie mogą zmienić części ustawień
+                parts = command.split()
+                try:
+                    if parts[1] not in ReceiveLogger.MODES or len(parts) > 4:
+                        raise ValueError(parts[1])
+                    interval = float(parts[2]) if len(parts) > 2 else None
+                    sample_every = int(parts[3]) if len(parts) > 3 else None
+                except ValueError:
+                    print("Użycie: rxlog <full|summary|off> [interwał] [co N]")
+                    continue
+                bt_client.rx_logger.configure(parts[1], interval, sample_every)
+                print(f"Tryb wypisywania odebranych danych: {parts[1]}")
+
             elif command == "help":
                 print("\nDostępne komendy:")
                 print("  connect <adres MAC> - połącz z urządzeniem")
@@ -424,6 +510,7 @@ def interactive_console(bt_client):
                 print("  send <hex> - wyślij dane (format hex, np. 01A2FF)")
                 print("  scan - skanuj dostępne urządzenia")
                 print("  status - sprawdź status połączenia")
+                print("  rxlog <full|summary|off> [interwał] [co N] - tryb wypisywania odebranych danych")
                 print("  exit - zakończ program")
                     
             else:
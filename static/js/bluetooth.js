@@ -47,9 +47,6 @@ document.addEventListener('DOMContentLoaded', function() {
     // Inicjalizacja pierwszego pola komend
     addCommandField();
     
-    // Sprawdź czy mamy aktywną sekwencję komend do kontynuowania
-    checkActiveSequence();
-    
     /**
      * Dodaje nowe pole do wprowadzania komend
      */
@@ -224,108 +221,26 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     /**
-     * Rozpoczyna wykonanie sekwencji komend
+     * Uruchamia sekwencję komend na serwerze - kroki są wysyłane w pętli Qt
+     * z dokładnym odmierzaniem opóźnień, bez udziału przeglądarki
      * @param {Array} commands - Tablica obiektów komend z polami data i delay
      */
     function executeCommandSequence(commands) {
         if (!commands || commands.length === 0) return;
         
-        // Zapisz całą sekwencję do localStorage
-        const sequence = {
-            commands: commands,
-            currentIndex: 0,
-            totalCommands: commands.length
-        };
-        
-        // Zapisz sekwencję do localStorage
-        localStorage.setItem('activeCommandSequence', JSON.stringify(sequence));
-        
-        // Wyślij pierwszą komendę
-        executeNextCommand();
-    }
-    
-    /**
-     * Wykonuje następną komendę z aktywnej sekwencji
-     */
-    function executeNextCommand() {
-        const sequenceJSON = localStorage.getItem('activeCommandSequence');
-        if (!sequenceJSON) return;
-        
-        const sequence = JSON.parse(sequenceJSON);
-        
-        // Sprawdź czy mamy jeszcze komendy do wykonania
-        if (sequence.currentIndex >= sequence.commands.length) {
-            addToLog('Sekwencja komend zakończona');
-            localStorage.removeItem('activeCommandSequence');
-            return;
-        }
-        
-        // Pobierz aktualną komendę
-        const currentCommand = sequence.commands[sequence.currentIndex];
-        addToLog(`Wykonuję komendę ${sequence.currentIndex + 1}/${sequence.totalCommands}: ${currentCommand.data}`);
-        
-        // Zaktualizuj index w sekwencji
-        sequence.currentIndex++;
-        localStorage.setItem('activeCommandSequence', JSON.stringify(sequence));
-        
-        // Wyślij aktualną komendę
-        sendCommand(currentCommand.data, currentCommand.delay);
-    }
-    
-    /**
-     * Wysyła komendę i ustawia timer na następną (jeśli jest)
-     * @param {string} data - Dane do wysłania
-     * @param {number} delay - Opóźnienie przed następną komendą
-     */
-    function sendCommand(data, delay) {
-        // Przygotuj formularz do wysłania danych
-        const form = document.createElement('form');
-        form.method = 'POST';
-        form.action = '/send';
-        form.id = 'command-form';
-        
-        const dataInput = document.createElement('input');
-        dataInput.type = 'hidden';
-        dataInput.name = 'data';
-        dataInput.value = data;
-        
-        const delayInput = document.createElement('input');
-        delayInput.type = 'hidden';
-        delayInput.name = 'continue_sequence';
-        delayInput.value = 'true';
-        
-        form.appendChild(dataInput);
-        form.appendChild(delayInput);
-        document.body.appendChild(form);
-        
-        // Dodaj flagę, że jest to część sekwencji i ustawiliśmy już timer
-        localStorage.setItem('commandWithTimer', 'true');
-        localStorage.setItem('commandDelay', delay.toString());
-        
-        setTimeout(() => {
-            form.submit();
-        }, 100); // Krótkie opóźnienie aby logi mogły się zaktualizować
-    }
-    
-    /**
-     * Sprawdza czy jest aktywna sekwencja komend i czy powinniśmy kontynuować
-     */
-    function checkActiveSequence() {
-        const shouldContinue = localStorage.getItem('commandWithTimer');
-        
-        if (shouldContinue) {
-            // Pobierz opóźnienie do następnej komendy
-            const delay = parseInt(localStorage.getItem('commandDelay') || '0');
-            
-            // Usuń flagi
-            localStorage.removeItem('commandWithTimer');
-            localStorage.removeItem('commandDelay');
-            
-            // Ustawienie timera na wykonanie następnej komendy
-            setTimeout(() => {
-                executeNextCommand();
-            }, delay);
-        }
+        window.runCommandSequence(commands, null, step => {
+            addToLog(`Wysłano komendę ${step.index}/${step.total}: 0x${step.data}`);
+        })
+        .then(sequence => {
+            if (sequence.status === 'finished') {
+                addToLog('Sekwencja komend zakończona');
+            } else {
+                addToLog(`Sekwencja komend przerwana: ${sequence.error || sequence.status}`);
+            }
+        })
+        .catch(error => {
+            addToLog(`Błąd sekwencji komend: ${error.message}`);
+        });
     }
     
     /**
@@ -416,4 +331,190 @@ document.addEventListener('DOMContentLoaded', function() {
         // i ma parzystą liczbę znaków (pełne bajty)
         return /^[0-9A-Fa-f]+$/.test(hexString) && hexString.length % 2 === 0;
     }
-});
\ No newline at end of file
+});
+
+/**
+ * Wywołuje akcję API v1 (connect, disconnect, unpair, send, status, clear_logs)
+ * i zwraca odpowiedź JSON - bez przesyłania formularza i przeładowania strony.
+ * @param {string} action - Nazwa akcji
+ * @param {Object} payload - Dane żądania
+ * @returns {Promise<Object>} - Odpowiedź serwera; przy błędzie Promise jest odrzucany
+ */
+window.bluetoothAction = function(action, payload = {}) {
+    return fetch(`/api/v1/${action}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload)
+    })
+    .then(response => response.json().then(data => {
+        if (!response.ok || data.status !== 'success') {
+            const error = new Error(data.message || `Server error: ${response.status}`);
+            error.response = data;
+            throw error;
+        }
+        return data;
+    }));
+};
+
+/**
+ * Uruchamia sekwencję komend na serwerze i śledzi jej przebieg przez strumień SSE.
+ * Nowa sekwencja dla tego samego urządzenia przerywa poprzednią.
+ * @param {Array} commands - Kroki [{data: '0x01', delay: 100}, ...] (delay - ms do następnego kroku)
+ * @param {string|null} address - Adres MAC urządzenia (null - jedyne połączone)
+ * @param {Function} onStep - Opcjonalnie wywoływana po każdym wysłanym kroku
+ * @returns {Promise<Object>} - Końcowy stan sekwencji (status: finished, cancelled lub error)
+ */
+window.runCommandSequence = function(commands, address, onStep) {
+    return window.bluetoothAction('sequences', { address: address, steps: commands })
+    .then(data => new Promise((resolve, reject) => {
+        const source = new EventSource(data.events_url);
+        
+        source.addEventListener('step', function(e) {
+            if (onStep) {
+                onStep(JSON.parse(e.data));
+            }
+        });
+        
+        ['finished', 'cancelled'].forEach(eventType => {
+            source.addEventListener(eventType, function(e) {
+                source.close();
+                resolve(JSON.parse(e.data));
+            });
+        });
+        
+        // Zdarzenie error jest też zgłaszane przez EventSource przy zerwaniu połączenia (bez danych)
+        source.addEventListener('error', function(e) {
+            if (e.data) {
+                source.close();
+                resolve(JSON.parse(e.data));
+            } else if (source.readyState === EventSource.CLOSED) {
+                fetch(data.status_url)
+                    .then(response => response.json())
+                    .then(result => resolve(result.sequence))
+                    .catch(reject);
+            }
+        });
+    }));
+};
+
+/**
+ * Anuluje sekwencję komend wykonywaną przez serwer
+ * @param {string} sequenceId - Identyfikator sekwencji
+ * @returns {Promise<Object>} - Odpowiedź serwera
+ */
+window.cancelCommandSequence = function(sequenceId) {
+    return window.bluetoothAction(`sequences/${encodeURIComponent(sequenceId)}/cancel`);
+};
+
+/**
+ * Rozpoczyna łączenie z urządzeniem w tle i śledzi operację przez strumień SSE.
+ * Równoległe wywołania dla tego samego adresu korzystają z jednej próby połączenia.
+ * @param {string} address - Adres MAC urządzenia
+ * @returns {Promise<Object>} - Końcowy stan operacji (status: connected lub failed)
+ */
+window.connectToDeviceAsync = function(address) {
+    return window.bluetoothAction('connect', { address: address })
+    .then(data => new Promise((resolve, reject) => {
+        const source = new EventSource(data.events_url);
+        
+        ['connected', 'failed'].forEach(eventType => {
+            source.addEventListener(eventType, function(e) {
+                source.close();
+                resolve(JSON.parse(e.data));
+            });
+        });
+        
+        source.onerror = function() {
+            // Po zerwaniu strumienia pobierz stan operacji bezpośrednio
+            if (source.readyState === EventSource.CLOSED) {
+                fetch(data.status_url)
+                    .then(response => response.json())
+                    .then(result => resolve(result.operation))
+                    .catch(reject);
+            }
+        };
+    }));
+};
+
+/**
+ * Kanał statusu (SSE /api/status/events) współdzielony przez wszystkie moduły.
+ * Po podłączeniu serwer wysyła migawkę stanu (snapshot), a potem tylko zmiany:
+ * connection, paired i discovered. Po zerwaniu połączenia EventSource łączy się
+ * ponownie i otrzymuje nową migawkę, więc stan nie wymaga odpytywania.
+ */
+window.bluetoothStatus = (function() {
+    const handlers = [];
+    let snapshot = null;
+    let source = null;
+    
+    function dispatch(type, data) {
+        handlers.forEach(handler => {
+            try {
+                handler(type, data);
+            } catch (error) {
+                console.error(`Błąd obsługi zdarzenia statusu ${type}:`, error);
+            }
+        });
+    }
+    
+    // Migawka jest aktualizowana zdarzeniami, aby późniejszy subskrybent dostał bieżący stan
+    function applyToSnapshot(type, data) {
+        if (!snapshot) return;
+        if (type === 'connection') {
+            snapshot.connected = data.addresses;
+            snapshot.sessions = snapshot.sessions.filter(session => session.address !== data.address);
+            if (data.session) {
+                snapshot.sessions.push(data.session);
+            }
+        } else if (type === 'paired') {
+            snapshot.paired = data.devices;
+            snapshot.paired_cache = data.cache;
+        } else if (type === 'discovered') {
+            if (data.cleared) {
+                snapshot.discovered = [];
+            } else {
+                snapshot.discovered = snapshot.discovered.filter(device => device.address !== data.device.address);
+                snapshot.discovered.push(data.device);
+            }
+        }
+    }
+    
+    function open() {
+        source = new EventSource('/api/status/events');
+        
+        source.addEventListener('snapshot', function(e) {
+            snapshot = JSON.parse(e.data);
+            dispatch('snapshot', snapshot);
+        });
+        
+        ['connection', 'paired', 'discovered'].forEach(type => {
+            source.addEventListener(type, function(e) {
+                const data = JSON.parse(e.data);
+                applyToSnapshot(type, data);
+                dispatch(type, data);
+            });
+        });
+        
+        source.onerror = function() {
+            console.warn('Kanał statusu przerwany - ponowne łączenie...');
+        };
+    }
+    
+    return {
+        /**
+         * Rejestruje funkcję handler(type, data); jeśli migawka jest już znana,
+         * handler od razu otrzymuje ją jako zdarzenie snapshot
+         */
+        subscribe(handler) {
+            handlers.push(handler);
+            if (!source) {
+                open();
+            } else if (snapshot) {
+                handler('snapshot', snapshot);
+            }
+        },
+        get snapshot() {
+            return snapshot;
+        }
+    };
+})();
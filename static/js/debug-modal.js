@@ -28,8 +28,29 @@ document.addEventListener('DOMContentLoaded', function() {
   let debugLogFilterText = document.getElementById('debug-log-filter-text');
   let applyDebugLogFilters = document.getElementById('apply-debug-log-filters');
   let clearDebugLogFilters = document.getElementById('clear-debug-log-filters');
+  let debugLogFilterLevel = document.getElementById('debug-log-filter-level');
   let refreshDebugLogs = document.getElementById('refresh-debug-logs');
   
+  // Lista wirtualna logów - renderowane są tylko widoczne wiersze
+  const DEBUG_LOG_ROW_HEIGHT = 20;
+  const DEBUG_LOG_OVERSCAN = 10;
+  const DEBUG_LOG_PAGE_SIZE = 200;
+  const DEBUG_LOG_POLL_INTERVAL = 2000;
+  
+  const debugLogState = {
+    items: [],
+    query: new URLSearchParams(),
+    filtered: false,
+    textFilter: '',
+    nextCursor: null,
+    hasMore: false,
+    lastSeq: 0,
+    loading: false,
+    scheduled: false,
+    generation: 0,
+    pollTimer: null
+  };
+  
   // Auto-inicjalizacja komponentów interfejsu
   initDebugToolsUI();
   
@@ -79,11 +100,13 @@ document.addEventListener('DOMContentLoaded', function() {
       addTestDeviceBtn.addEventListener('click', addTestDevice);
     }
     
+    // Przewijanie listy wirtualnej
+    if (typeof logViewer !== 'undefined' && logViewer) {
+      logViewer.addEventListener('scroll', onDebugLogScroll);
+    }
+    
     // Inicjalizuj filtry logów debug
     initDebugLogFilters();
-    
-    // Załaduj logi do podglądu debugowania
-    refreshDebugLogsContent();
   }
   
   /**
@@ -98,6 +121,7 @@ document.addEventListener('DOMContentLoaded', function() {
     debugLogFilterTimeFrom = document.getElementById('debug-log-filter-time-from');
     debugLogFilterTimeTo = document.getElementById('debug-log-filter-time-to');
     debugLogFilterText = document.getElementById('debug-log-filter-text');
+    debugLogFilterLevel = document.getElementById('debug-log-filter-level');
     applyDebugLogFilters = document.getElementById('apply-debug-log-filters');
     clearDebugLogFilters = document.getElementById('clear-debug-log-filters');
     
@@ -131,7 +155,8 @@ document.addEventListener('DOMContentLoaded', function() {
           'debug-log-filter-date-to', 
           'debug-log-filter-time-from',
           'debug-log-filter-time-to',
-          'debug-log-filter-text'
+          'debug-log-filter-text',
+          'debug-log-filter-level'
         ];
         
         filterFields.forEach(id => {
@@ -214,6 +239,7 @@ document.addEventListener('DOMContentLoaded', function() {
       const timeFrom = debugLogFilterTimeFrom?.value;
       const timeTo = debugLogFilterTimeTo?.value;
       const text = debugLogFilterText?.value;
+      const level = debugLogFilterLevel?.value;
       
       const activeFilters = [];
       
@@ -241,6 +267,10 @@ document.addEventListener('DOMContentLoaded', function() {
         activeFilters.push(`Tekst: "${text}"`);
       }
       
+      if (level) {
+        activeFilters.push(`Poziom: ${level}`);
+      }
+      
       // Aktualizuj widok podsumowania
       if (activeFilters.length > 0) {
         // Dodaj informację o logice AND
@@ -266,6 +296,11 @@ document.addEventListener('DOMContentLoaded', function() {
       debugModal.style.display = 'block';
       refreshDebugLogsContent();
       
+      // Dopisuj nowe logi, dopóki modal jest otwarty
+      if (!debugLogState.pollTimer) {
+        debugLogState.pollTimer = setInterval(pollNewDebugLogs, DEBUG_LOG_POLL_INTERVAL);
+      }
+      
       // Ponownie zainicjalizuj filtry po otwarciu modalu
       setTimeout(() => {
         initDebugLogFilters();
@@ -280,279 +315,309 @@ document.addEventListener('DOMContentLoaded', function() {
     if (typeof debugModal !== 'undefined' && debugModal) {
       debugModal.style.display = 'none';
     }
+    
+    if (debugLogState.pollTimer) {
+      clearInterval(debugLogState.pollTimer);
+      debugLogState.pollTimer = null;
+    }
   }
   
   /**
-   * Odświeża logi w modalnym oknie debugowania z opcjonalnym filtrowaniem
-   * @param {boolean} applyFilters - Czy zastosować filtry
+   * Buduje parametry zapytania /api/logs/query na podstawie pól filtrów
+   * @param {boolean} applyFilters - Czy uwzględnić filtry
+   * @returns {URLSearchParams} Parametry zapytania
    */
-  function refreshDebugLogsContent(applyFilters = false) {
-    console.log('Odświeżanie logów debug, z filtrami:', applyFilters);
+  function buildDebugLogQuery(applyFilters) {
+    const params = new URLSearchParams();
+    params.set('limit', DEBUG_LOG_PAGE_SIZE);
     
-    if (typeof logViewer === 'undefined' || !logViewer) {
-      console.warn('Brak logViewer');
-      return;
+    if (!applyFilters) {
+      return params;
     }
     
-    // Pobierz logi z oryginalnego kontenera .log-container
-    const originalLogContainer = document.querySelector('.log-container');
-    if (!originalLogContainer) {
-      console.warn('Brak originalLogContainer');
-      return;
+    let dateFromFilter = debugLogFilterDateFrom?.value || '';
+    let dateToFilter = debugLogFilterDateTo?.value || '';
+    let timeFromFilter = debugLogFilterTimeFrom?.value || '';
+    let timeToFilter = debugLogFilterTimeTo?.value || '';
+    const textFilter = debugLogFilterText?.value || '';
+    const levelFilter = debugLogFilterLevel?.value || '';
+    
+    // Automatycznie ustaw "Do daty" na dzisiejszą datę zamiast kopiować "Od daty"
+    if (dateFromFilter && !dateToFilter) {
+      dateToFilter = getTodaysDateDebug();
     }
     
-    const logEntries = originalLogContainer.querySelectorAll('.log-entry');
+    // Sam czas bez daty dotyczy dzisiejszego dnia
+    if ((timeFromFilter || timeToFilter) && !dateFromFilter && !dateToFilter) {
+      dateFromFilter = getTodaysDateDebug();
+      dateToFilter = dateFromFilter;
+    }
     
-    if (logEntries.length === 0) {
-      logViewer.innerHTML = '<div class="log-entry">Brak logów do wyświetlenia.</div>';
-      return;
+    // Zamiana daty i godziny na sekundy epoki (czas lokalny przeglądarki)
+    if (dateFromFilter) {
+      const from = new Date(`${dateFromFilter}T${timeFromFilter || '00:00'}:00`);
+      params.set('from', from.getTime() / 1000);
     }
     
-    console.log(`Znaleziono ${logEntries.length} logów do przetworzenia`);
+    if (dateToFilter) {
+      const to = new Date(`${dateToFilter}T${timeToFilter || '23:59'}:59.999`);
+      params.set('to', to.getTime() / 1000);
+    }
     
-    // Konwertuj logi na tablicę z tekstem
-    let logsArray = Array.from(logEntries).map(entry => entry.textContent);
+    if (textFilter) {
+      params.set('q', textFilter);
+    }
     
-    // Przygotuj filtry jeśli są wymagane
-    let dateFromFilter = '';
-    let dateToFilter = '';
-    let timeFromFilter = '';
-    let timeToFilter = '';
-    let textFilter = '';
+    if (levelFilter) {
+      params.set('level', levelFilter);
+    }
     
-    if (applyFilters) {
-      console.log('Stosowanie filtrów debug...');
-      
-      // Pobierz wartości filtrów
-      dateFromFilter = debugLogFilterDateFrom?.value || '';
-      dateToFilter = debugLogFilterDateTo?.value || '';
-      timeFromFilter = debugLogFilterTimeFrom?.value || '';
-      timeToFilter = debugLogFilterTimeTo?.value || '';
-      textFilter = debugLogFilterText?.value?.toLowerCase() || '';
-      
-      console.log('Wartości filtrów debug:', {
-        dateFromFilter,
-        dateToFilter,
-        timeFromFilter,
-        timeToFilter,
-        textFilter
-      });
-      
-      // Automatycznie ustaw "Do daty" na dzisiejszą datę zamiast kopiować "Od daty"
-      if (dateFromFilter && !dateToFilter) {
-        dateToFilter = getTodaysDateDebug();
-        console.log('Automatycznie ustawiono datę "do" debug na dzisiejszą datę podczas filtrowania');
-      }
-      
-      // Domyślnie ustaw zakres godzin na cały dzień jeśli tylko jedna wartość jest ustawiona
-      if (timeFromFilter && !timeToFilter) {
-        timeToFilter = '23:59';
-      }
-      
-      if (!timeFromFilter && timeToFilter) {
-        timeFromFilter = '00:00';
-      }
+    return params;
+  }
+  
+  /**
+   * Odświeża logi w modalnym oknie debugowania z opcjonalnym filtrowaniem
+   * Filtrowanie odbywa się po stronie serwera, modal pobiera tylko kolejne strony wyników
+   * @param {boolean} applyFilters - Czy zastosować filtry
+   */
+  function refreshDebugLogsContent(applyFilters = false) {
+    console.log('Odświeżanie logów debug, z filtrami:', applyFilters);
+    
+    if (typeof logViewer === 'undefined' || !logViewer) {
+      console.warn('Brak logViewer');
+      return;
     }
     
-    // Filtrowanie logów
-    let filteredLogs = logsArray.slice();
-    let foundMatches = false;
+    debugLogState.query = buildDebugLogQuery(applyFilters);
+    debugLogState.filtered = applyFilters && Array.from(debugLogState.query.keys()).some(key => key !== 'limit');
+    debugLogState.textFilter = applyFilters ? (debugLogFilterText?.value?.toLowerCase() || '') : '';
+    debugLogState.items = [];
+    debugLogState.nextCursor = null;
+    debugLogState.hasMore = false;
+    debugLogState.lastSeq = 0;
+    debugLogState.generation += 1;
+    
+    logViewer.scrollTop = 0;
+    loadDebugLogsPage();
+  }
+  
+  /**
+   * Pobiera kolejną stronę logów z serwera i dokleja ją do listy
+   */
+  function loadDebugLogsPage() {
+    if (debugLogState.loading) return;
+    debugLogState.loading = true;
+    
+    const generation = debugLogState.generation;
+    const params = new URLSearchParams(debugLogState.query);
+    if (debugLogState.nextCursor !== null) {
+      params.set('before', debugLogState.nextCursor);
+    }
     
-    if (applyFilters && (dateFromFilter || dateToFilter || timeFromFilter || timeToFilter || textFilter)) {
-      console.log('Filtrowanie logów debug z warunkami AND...');
-      console.log('Aktywne filtry debug:', { dateFromFilter, dateToFilter, timeFromFilter, timeToFilter, textFilter });
-      
-      filteredLogs = logsArray.filter(log => {
-        console.log('Sprawdzanie logu debug:', log);
-        
-        // Logi mogą mieć różne formaty, spróbuj wyciągnąć datę i czas
-        // Format może być np. [YYYY-MM-DD] [HH:MM:SS] lub inne
-        const dateMatch = log.match(/\[(\d{4}-\d{2}-\d{2})\]/) || log.match(/(\d{4}-\d{2}-\d{2})/);
-        const timestampMatch = log.match(/\[([\d:]+)\]/) || log.match(/([\d:]+)/);
-        
-        const logDate = dateMatch ? dateMatch[1] : null;
-        const logTime = timestampMatch ? timestampMatch[1] : null;
-        const logText = log.toLowerCase();
+    fetch(`/api/logs/query?${params.toString()}`)
+      .then(response => response.json())
+      .then(data => {
+        // Odpowiedź na nieaktualne zapytanie (zmieniono filtry w międzyczasie)
+        if (generation !== debugLogState.generation) return;
         
-        console.log('Wyciągnięte dane debug:', { logDate, logTime, logText: logText.substring(0, 50) + '...' });
-        
-        // WARUNEK AND #1: Filtrowanie po dacie "od"
-        if (dateFromFilter) {
-          if (!logDate || logDate < dateFromFilter) {
-            console.log(`Debug odrzucono - data ${logDate} jest wcześniejsza niż ${dateFromFilter}`);
-            return false;
-          }
-          console.log(`Debug data "od" OK: ${logDate} >= ${dateFromFilter}`);
+        if (data.status !== 'success') {
+          console.error('Błąd pobierania logów:', data.message);
+          renderDebugLogMessage(data.message || 'Nie udało się pobrać logów.');
+          return;
         }
         
-        // WARUNEK AND #2: Filtrowanie po dacie "do"
-        if (dateToFilter) {
-          if (!logDate || logDate > dateToFilter) {
-            console.log(`Debug odrzucono - data ${logDate} jest późniejsza niż ${dateToFilter}`);
-            return false;
-          }
-          console.log(`Debug data "do" OK: ${logDate} <= ${dateToFilter}`);
+        if (debugLogState.items.length === 0) {
+          debugLogState.lastSeq = data.last_seq;
         }
         
-        // WARUNEK AND #3 & #4: Filtrowanie po czasie
-        if (timeFromFilter || timeToFilter) {
-          if (!logTime) {
-            // Jeśli nie ma czasu w logu, ale filtry czasu są aktywne, odrzuć tylko jeśli oba filtry są ustawione
-            if (timeFromFilter && timeToFilter) {
-              console.log('Debug odrzucono - brak czasu w logu, ale oba filtry czasu są aktywne');
-              return false;
-            }
-            // Jeśli tylko jeden filtr czasu jest aktywny, pozwól przejść logom bez czasu
-            console.log('Debug - brak czasu w logu, ale tylko jeden filtr czasu aktywny - pozwalamy przejść');
-          } else {
-            const logTimeParts = logTime.split(':');
-            if (logTimeParts.length >= 2) {
-              const logHours = parseInt(logTimeParts[0]);
-              const logMinutes = parseInt(logTimeParts[1]);
-              const logTimeMinutes = logHours * 60 + logMinutes;
-              
-              // WARUNEK AND #3: Czas "od"
-              if (timeFromFilter) {
-                const fromTimeParts = timeFromFilter.split(':');
-                if (fromTimeParts.length >= 2) {
-                  const fromHours = parseInt(fromTimeParts[0]);
-                  const fromMinutes = parseInt(fromTimeParts[1]);
-                  const fromTimeMinutes = fromHours * 60 + fromMinutes;
-                  
-                  if (logTimeMinutes < fromTimeMinutes) {
-                    console.log(`Debug odrzucono - czas ${logTime} jest wcześniejszy niż ${timeFromFilter}`);
-                    return false;
-                  }
-                  console.log(`Debug czas "od" OK: ${logTime} >= ${timeFromFilter}`);
-                }
-              }
-              
-              // WARUNEK AND #4: Czas "do"
-              if (timeToFilter) {
-                const toTimeParts = timeToFilter.split(':');
-                if (toTimeParts.length >= 2) {
-                  const toHours = parseInt(toTimeParts[0]);
-                  const toMinutes = parseInt(toTimeParts[1]);
-                  const toTimeMinutes = toHours * 60 + toMinutes;
-                  
-                  if (logTimeMinutes > toTimeMinutes) {
-                    console.log(`Debug odrzucono - czas ${logTime} jest późniejszy niż ${timeToFilter}`);
-                    return false;
-                  }
-                  console.log(`Debug czas "do" OK: ${logTime} <= ${timeToFilter}`);
-                }
-              }
-            }
-          }
-        }
-        
-        // WARUNEK AND #5: Filtrowanie po tekście
-        if (textFilter) {
-          if (!logText.includes(textFilter)) {
-            console.log(`Debug odrzucono - tekst nie zawiera "${textFilter}"`);
-            return false;
-          }
-          console.log(`Debug tekst OK: zawiera "${textFilter}"`);
-        }
+        debugLogState.items = debugLogState.items.concat(data.logs);
+        debugLogState.nextCursor = data.next_cursor;
+        debugLogState.hasMore = data.has_more;
         
-        // Wszystkie warunki AND zostały spełnione
-        console.log('Debug log przeszedł przez wszystkie filtry AND');
-        return true;
+        updateDebugFilterResultsInfo();
+        renderDebugLogs();
+      })
+      .catch(error => {
+        console.error('Błąd podczas pobierania logów:', error);
+        renderDebugLogMessage('Nie udało się pobrać logów.');
+      })
+      .finally(() => {
+        debugLogState.loading = false;
       });
-      
-      foundMatches = filteredLogs.length > 0;
-      console.log(`Po filtrowaniu AND debug zostało ${filteredLogs.length} logów z ${logsArray.length}`);
-      
-      // Dodaj informację o liczbie przefiltrowanych logów do podsumowania
-      const filterSummary = document.querySelector('.debug-filter-summary');
-      if (filterSummary && filteredLogs.length < logsArray.length) {
-        const filterInfo = document.createElement('div');
-        filterInfo.className = 'filter-results-info';
-        filterInfo.style.cssText = 'margin-top: 5px; font-size: 11px; color: #3498db; font-weight: bold;';
-        filterInfo.textContent = `Debug: Pokazano ${filteredLogs.length} z ${logsArray.length} logów`;
+  }
+  
+  /**
+   * Dopisuje na początku listy logi, które pojawiły się od ostatniego pobrania
+   * Działa tylko bez aktywnych filtrów - z filtrami trzeba odświeżyć widok
+   */
+  function pollNewDebugLogs() {
+    if (debugLogState.filtered || debugLogState.loading) return;
+    
+    const generation = debugLogState.generation;
+    fetch(`/logs?since=${debugLogState.lastSeq}`)
+      .then(response => response.json())
+      .then(data => {
+        if (generation !== debugLogState.generation || data.status !== 'success') return;
         
-        // Usuń poprzednią informację jeśli istnieje
-        const existingInfo = filterSummary.querySelector('.filter-results-info');
-        if (existingInfo) {
-          existingInfo.remove();
+        if (data.logs.length > 0) {
+          // Utrzymaj pozycję przewijania, jeśli użytkownik przegląda starsze logi
+          const keepOffset = logViewer.scrollTop > 0;
+          debugLogState.items = data.logs.slice().reverse().concat(debugLogState.items);
+          if (keepOffset) {
+            logViewer.scrollTop += data.logs.length * DEBUG_LOG_ROW_HEIGHT;
+          }
+          renderDebugLogs();
         }
         
-        filterSummary.appendChild(filterInfo);
-      }
+        debugLogState.lastSeq = data.last_seq;
+      })
+      .catch(error => {
+        console.warn('Nie udało się pobrać nowych logów:', error);
+      });
+  }
+  
+  /**
+   * Zwraca klasę koloru dla wpisu logu
+   * @param {Object} entry - Wpis logu z serwera
+   * @returns {string} Nazwa klasy CSS
+   */
+  function getDebugLogClass(entry) {
+    if (entry.level === 'ERROR') return 'error';
+    if (entry.level === 'WARNING') return 'warning';
+    
+    const logContent = entry.text.toLowerCase();
+    if (logContent.includes('success') || logContent.includes('sukces') || logContent.includes('pomyślnie')) {
+      return 'success';
     }
+    return 'info';
+  }
+  
+  /**
+   * Renderuje tylko wiersze widoczne w oknie przewijania (lista wirtualna)
+   */
+  function renderDebugLogs() {
+    const items = debugLogState.items;
     
-    // Wyczyść podgląd logów
-    logViewer.innerHTML = '';
+    if (items.length === 0) {
+      renderDebugLogMessage(debugLogState.filtered ? 'Brak logów pasujących do filtrów.' : 'Brak logów do wyświetlenia.');
+      return;
+    }
     
-    // Dodaj każdy log do podglądu (od najnowszego)
-    if (filteredLogs.length > 0) {
-      filteredLogs.forEach(logText => {
-        const logElement = document.createElement('div');
-        logElement.className = 'log-entry';
-        
-        // Pokoloruj logi w zależności od typu
-        const logContent = logText.toLowerCase();
-        if (logContent.includes('error') || logContent.includes('błąd')) {
-          logElement.classList.add('error');
-        } else if (logContent.includes('warning') || logContent.includes('ostrzeżenie')) {
-          logElement.classList.add('warning');
-        } else if (logContent.includes('success') || logContent.includes('sukces')) {
-          logElement.classList.add('success');
-        } else {
-          logElement.classList.add('info');
-        }
-        
-        // Jeśli filtrujemy i mamy tekst filtrowania, podświetl dopasowania
-        if (applyFilters && textFilter && logText.toLowerCase().includes(textFilter)) {
-          logElement.classList.add('highlight');
-          
-          // Podświetl dopasowany tekst
-          const regex = new RegExp('(' + textFilter.replace(/[-\/\\^$*+?.()|[\]{}]/g, '\\$&') + ')', 'gi');
-          const highlightedText = logText.replace(regex, '<span class="highlight-text">$1</span>');
-          logElement.innerHTML = highlightedText;
-        } else {
-          logElement.textContent = logText;
-        }
-        
-        logViewer.appendChild(logElement);
-      });
-    } else {
-      // Pokaż komunikat jeśli nie ma logów lub nie znaleziono dopasowań
-      const noLogsMsg = document.createElement('div');
-      noLogsMsg.className = 'log-entry no-logs-message';
+    // Kontener o pełnej wysokości listy, aby pasek przewijania odpowiadał wszystkim wpisom
+    let spacer = logViewer.querySelector('.virtual-log-spacer');
+    if (!spacer) {
+      logViewer.innerHTML = '';
+      spacer = document.createElement('div');
+      spacer.className = 'virtual-log-spacer';
+      logViewer.appendChild(spacer);
+    }
+    spacer.style.height = `${items.length * DEBUG_LOG_ROW_HEIGHT}px`;
+    
+    const viewportHeight = logViewer.clientHeight || 300;
+    const first = Math.max(0, Math.floor(logViewer.scrollTop / DEBUG_LOG_ROW_HEIGHT) - DEBUG_LOG_OVERSCAN);
+    const last = Math.min(items.length, Math.ceil((logViewer.scrollTop + viewportHeight) / DEBUG_LOG_ROW_HEIGHT) + DEBUG_LOG_OVERSCAN);
+    
+    const fragment = document.createDocumentFragment();
+    const textFilter = debugLogState.textFilter;
+    const regex = textFilter
+      ? new RegExp('(' + textFilter.replace(/[-\/\\^$*+?.()|[\]{}]/g, '\\$&') + ')', 'gi')
+      : null;
+    
+    for (let i = first; i < last; i++) {
+      const entry = items[i];
+      const logElement = document.createElement('div');
+      logElement.className = `log-entry virtual-log-row ${getDebugLogClass(entry)}`;
+      logElement.style.top = `${i * DEBUG_LOG_ROW_HEIGHT}px`;
+      logElement.title = entry.text;
       
-      if (applyFilters && !foundMatches) {
-        noLogsMsg.textContent = 'Brak logów pasujących do filtrów.';
+      // Jeśli filtrujemy po tekście, podświetl dopasowania
+      if (regex) {
+        logElement.classList.add('highlight');
+        const safeText = entry.text.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+        logElement.innerHTML = safeText.replace(regex, '<span class="highlight-text">$1</span>');
       } else {
-        noLogsMsg.textContent = 'Brak logów do wyświetlenia.';
+        logElement.textContent = entry.text;
       }
       
-      logViewer.appendChild(noLogsMsg);
+      fragment.appendChild(logElement);
+    }
+    
+    spacer.innerHTML = '';
+    spacer.appendChild(fragment);
+  }
+  
+  /**
+   * Wyświetla komunikat zamiast listy logów
+   * @param {string} message - Treść komunikatu
+   */
+  function renderDebugLogMessage(message) {
+    logViewer.innerHTML = '';
+    const noLogsMsg = document.createElement('div');
+    noLogsMsg.className = 'log-entry no-logs-message';
+    noLogsMsg.textContent = message;
+    logViewer.appendChild(noLogsMsg);
+  }
+  
+  /**
+   * Obsługa przewijania listy logów - renderuje widoczne wiersze i doczytuje kolejne strony
+   */
+  function onDebugLogScroll() {
+    if (debugLogState.items.length === 0) return;
+    
+    if (!debugLogState.scheduled) {
+      debugLogState.scheduled = true;
+      requestAnimationFrame(() => {
+        debugLogState.scheduled = false;
+        renderDebugLogs();
+      });
+    }
+    
+    const nearBottom = logViewer.scrollTop + logViewer.clientHeight >= logViewer.scrollHeight - DEBUG_LOG_ROW_HEIGHT * 10;
+    if (nearBottom && debugLogState.hasMore) {
+      loadDebugLogsPage();
     }
   }
   
+  /**
+   * Aktualizuje informację o liczbie pokazanych logów w podsumowaniu filtrów
+   */
+  function updateDebugFilterResultsInfo() {
+    const filterSummary = document.querySelector('.debug-filter-summary');
+    if (!filterSummary) return;
+    
+    const existingInfo = filterSummary.querySelector('.filter-results-info');
+    if (existingInfo) {
+      existingInfo.remove();
+    }
+    
+    if (!debugLogState.filtered) return;
+    
+    const filterInfo = document.createElement('div');
+    filterInfo.className = 'filter-results-info';
+    filterInfo.style.cssText = 'margin-top: 5px; font-size: 11px; color: #3498db; font-weight: bold;';
+    filterInfo.textContent = `Debug: Pokazano ${debugLogState.items.length}${debugLogState.hasMore ? '+' : ''} pasujących logów`;
+    filterSummary.appendChild(filterInfo);
+  }
+  
   /**
    * Czyści logi z podglądu debugowania i głównego kontenera logów
    */
   function clearDebugLogs() {
     if (typeof logViewer === 'undefined' || !logViewer) return;
     
-    // Pobierz formularz czyszczenia logów i wyślij go
-    const clearLogsForm = document.querySelector('#hidden-clear-logs-form') || document.querySelector('form[action="/clear_logs"]');
-    if (clearLogsForm) {
-      clearLogsForm.submit();
-      
-      // Dodaj opóźnienie, aby formularz miał czas na zadziałanie
-      setTimeout(() => {
-        refreshDebugLogsContent();
-      }, 500);
-    } else {
-      // Jeśli formularza nie ma, spróbuj wyczyścić bezpośrednio
-      const originalLogContainer = document.querySelector('.log-container');
-      if (originalLogContainer) {
-        originalLogContainer.innerHTML = '<p>Brak logów.</p>';
+    // Wyczyść logi na serwerze bez przeładowania strony
+    window.bluetoothAction('clear_logs')
+      .then(() => {
         refreshDebugLogsContent();
-      }
+      })
+      .catch(error => {
+        console.error('Błąd podczas czyszczenia logów:', error);
+      });
+    
+    // Wyczyść również logi przeglądarki
+    const originalLogContainer = document.querySelector('.log-container');
+    if (originalLogContainer) {
+      originalLogContainer.innerHTML = '';
     }
   }
   
@@ -8,6 +8,7 @@
  * - Dodawanie, edycja i usuwanie przycisków
  * - Wykonywanie sekwencji komend
  * - Filtrowanie logów urządzenia z logiką AND
+ * - Podgląd danych odbieranych z urządzenia na żywo (strumień SSE)
  * - Połączenie, rozłączenie i rozparowanie urządzeń
  * - System media controls: play/pause, volume up, volume down, previous, next, stop, mute
  */
@@ -54,6 +55,10 @@ document.addEventListener('DOMContentLoaded', function() {
   let deviceLogContent = document.getElementById('device-log-content');
   let clearDeviceLogs = document.getElementById('clear-device-logs');
   
+  // Live receive elements
+  let deviceRxContent = document.getElementById('device-rx-content');
+  let deviceRxStatus = document.getElementById('device-rx-status');
+  
   // Log filtering elements
   let logFilterDateFrom = document.getElementById('log-filter-date-from');
   let logFilterDateTo = document.getElementById('log-filter-date-to');
@@ -69,6 +74,8 @@ document.addEventListener('DOMContentLoaded', function() {
   
   let currentDevice = null; // Aktualnie wybrane
   let activeContextMenu = null; // Aktywne menu kontekstowe dla przycisków
+  let receiveStream = null; // EventSource z danymi odbieranymi od urządzenia
+  const MAX_RX_ENTRIES = 200; // Limit ramek wyświetlanych w zakładce Odbiór
   
   // System Audio Context for media controls
   let audioContext = null;
@@ -109,9 +116,6 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize log filters
     initLogFilters();
     
-    // Check for active command sequence
-    checkAndContinueCommandSequence();
-    
     // Update the button function dropdown with system control options
     updateButtonFunctionOptions();
     
@@ -772,6 +776,14 @@ document.addEventListener('DOMContentLoaded', function() {
     loadDeviceButtons(device.address);
     loadDeviceLogs(device.address);
     
+    // Live received data - the server keeps a session only for connected devices
+    // Dane odbierane na żywo - serwer ma sesję tylko dla połączonych urządzeń
+    if (device.connected) {
+      startReceiveStream(device.address);
+    } else {
+      stopReceiveStream('Urządzenie nie jest połączone');
+    }
+    
     // Show modal and position it
     deviceDetailsModal.style.display = 'block';
     positionModal();
@@ -849,6 +861,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     hideButtonForm();
+    stopReceiveStream();
     currentDevice = null;
   }
 
@@ -865,19 +878,33 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log(`Łączenie z urządzeniem: ${address}`);
     addDeviceLog(address, 'Łączenie z urządzeniem...');
     
-    // Create and submit form
-    const form = document.createElement('form');
-    form.method = 'POST';
-    form.action = '/connect';
-    
-    const addressInput = document.createElement('input');
-    addressInput.type = 'hidden';
-    addressInput.name = 'address';
-    addressInput.value = address;
-    
-    form.appendChild(addressInput);
-    document.body.appendChild(form);
-    form.submit();
+    // Connect in the background - no page reload
+    // Łączenie w tle - bez przeładowania strony
+    window.connectToDeviceAsync(address)
+      .then(operation => {
+        if (operation.status !== 'connected') {
+          addDeviceLog(address, `Nie udało się połączyć: ${operation.error || 'nieznany błąd'}`);
+          return;
+        }
+        
+        addDeviceLog(address, 'Połączono z urządzeniem');
+        window.dispatchEvent(new CustomEvent('deviceConnected', {
+          detail: { device: operation.device }
+        }));
+        
+        if (currentDevice && currentDevice.address === address) {
+          currentDevice.connected = true;
+          modalDeviceStatus.textContent = 'Połączone';
+          modalDeviceStatus.classList.add('connected');
+          modalConnectBtn.style.display = 'none';
+          modalDisconnectBtn.style.display = 'block';
+          updateControlSection(true);
+          startReceiveStream(address);
+        }
+      })
+      .catch(error => {
+        addDeviceLog(address, `Błąd podczas łączenia: ${error.message}`);
+      });
   }
   
   /**
@@ -887,19 +914,32 @@ document.addEventListener('DOMContentLoaded', function() {
   function disconnectDeviceFromModal() {
     if (!currentDevice) {
       console.warn('Brak currentDevice do rozłączenia');
-      return;
-    }
-    
-    console.log(`Rozłączanie urządzenia: ${currentDevice.address}`);
-    addDeviceLog(currentDevice.address, 'Rozłączanie urządzenia...');
-    
-    // Create and submit form
-    const form = document.createElement('form');
-    form.method = 'POST';
-    form.action = '/disconnect';
-    
-    document.body.appendChild(form);
-    form.submit();
+      return Promise.resolve();
+    }
+    
+    const address = currentDevice.address;
+    console.log(`Rozłączanie urządzenia: ${address}`);
+    addDeviceLog(address, 'Rozłączanie urządzenia...');
+    
+    // Disconnect through the API - no page reload
+    // Rozłączenie przez API - bez przeładowania strony
+    return window.bluetoothAction('disconnect', { address: address })
+      .then(() => {
+        addDeviceLog(address, 'Rozłączono urządzenie');
+        
+        if (currentDevice && currentDevice.address === address) {
+          currentDevice.connected = false;
+          modalDeviceStatus.textContent = 'Niepołączone';
+          modalDeviceStatus.classList.remove('connected');
+          modalConnectBtn.style.display = 'block';
+          modalDisconnectBtn.style.display = 'none';
+          updateControlSection(false);
+          stopReceiveStream('Urządzenie nie jest połączone');
+        }
+      })
+      .catch(error => {
+        addDeviceLog(address, `Błąd podczas rozłączania: ${error.message}`);
+      });
   }
   
   /**
@@ -913,12 +953,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // If connected, disconnect first
     if (currentDevice && currentDevice.connected) {
-      disconnectDeviceFromModal();
-      
-      // Delay unpair request
-      setTimeout(() => {
-        sendUnpairRequest(address);
-      }, 500);
+      disconnectDeviceFromModal().then(() => sendUnpairRequest(address));
     } else {
       // If not connected, unpair immediately
       sendUnpairRequest(address);
@@ -933,19 +968,14 @@ document.addEventListener('DOMContentLoaded', function() {
   function sendUnpairRequest(address) {
     console.log(`Wysyłanie żądania rozparowania: ${address}`);
     
-    // Create and submit form
-    const form = document.createElement('form');
-    form.method = 'POST';
-    form.action = '/unpair';
-    
-    const addressInput = document.createElement('input');
-    addressInput.type = 'hidden';
-    addressInput.name = 'address';
-    addressInput.value = address;
-    
-    form.appendChild(addressInput);
-    document.body.appendChild(form);
-    form.submit();
+    window.bluetoothAction('unpair', { address: address })
+      .then(() => {
+        addDeviceLog(address, 'Rozparowano urządzenie');
+        hideDeviceModal();
+      })
+      .catch(error => {
+        addDeviceLog(address, `Nie udało się rozparować urządzenia: ${error.message}`);
+      });
   }
 
   // ========================================
@@ -1903,8 +1933,9 @@ document.addEventListener('DOMContentLoaded', function() {
   // ========================================
   
   /**
-   * Starts execution of a command sequence
-   * Rozpoczyna wykonywanie sekwencji komend
+   * Starts execution of a command sequence on the server
+   * Uruchamia sekwencję komend na serwerze - opóźnienia odmierza pętla Qt,
+   * więc przeładowanie lub zamknięcie strony nie przerywa sekwencji
    * @param {Array} commands - Array of command objects
    * @param {string} address - Device MAC address
    */
@@ -1915,123 +1946,132 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     console.log(`Rozpoczynanie sekwencji ${commands.length} komend dla ${address}`);
-    
-    // Add log
     addDeviceLog(address, `Uruchamiam sekwencję ${commands.length} komend`);
     
-    // Save sequence to localStorage
-    const sequence = {
-      commands: commands,
-      currentIndex: 0,
-      totalCommands: commands.length,
-      deviceAddress: address
-    };
-    
-    localStorage.setItem('activeCommandSequence', JSON.stringify(sequence));
-    
-    // Execute first command
-    executeNextCommand();
+    window.runCommandSequence(commands, address, step => {
+      addDeviceLog(address, `Wysłano komendę ${step.index}/${step.total}: 0x${step.data}`);
+    })
+    .then(sequence => {
+      if (sequence.status === 'finished') {
+        addDeviceLog(address, 'Sekwencja komend zakończona');
+      } else {
+        addDeviceLog(address, `Sekwencja komend przerwana: ${sequence.error || sequence.status}`);
+      }
+    })
+    .catch(error => {
+      addDeviceLog(address, `Błąd sekwencji komend: ${error.message}`);
+    });
   }
+
+  // ========================================
+  // LIVE RECEIVE - Podgląd odbieranych danych
+  // ========================================
   
   /**
-   * Executes the next command in the active sequence
-   * Wykonuje następną komendę w aktywnej sekwencji
+   * Opens the live stream of frames received from the device
+   * Otwiera strumień ramek odbieranych od urządzenia. Po zerwaniu połączenia
+   * EventSource wznawia go sam od ostatniej ramki (Last-Event-ID)
+   * @param {string} address - Device MAC address
    */
-  function executeNextCommand() {
-    const sequenceJSON = localStorage.getItem('activeCommandSequence');
-    if (!sequenceJSON) {
-      console.log('Brak aktywnej sekwencji komend');
-      return;
-      }
+  function startReceiveStream(address) {
+    stopReceiveStream();
+    if (!deviceRxContent) return;
     
-    const sequence = JSON.parse(sequenceJSON);
+    deviceRxContent.innerHTML = '';
+    setReceiveStatus('Łączenie ze strumieniem...');
     
-    // Check if commands left
-    if (sequence.currentIndex >= sequence.commands.length) {
-      // Add log
-      addDeviceLog(sequence.deviceAddress, 'Sekwencja komend zakończona');
-      localStorage.removeItem('activeCommandSequence');
-      console.log('Sekwencja komend zakończona');
-      return;
-    }
+    // last_seq=0 - start with the history kept by the server
+    // last_seq=0 - zacznij od historii przechowywanej przez serwer
+    const source = new EventSource(`/api/connections/${encodeURIComponent(address)}/rx/events?last_seq=0`);
+    receiveStream = source;
     
-    // Get current command
-    const currentCommand = sequence.commands[sequence.currentIndex];
-    console.log(`Wykonywanie komendy ${sequence.currentIndex + 1}/${sequence.totalCommands}: ${currentCommand.data}`);
-    addDeviceLog(sequence.deviceAddress, `Wykonuję komendę ${sequence.currentIndex + 1}/${sequence.totalCommands}: ${currentCommand.data}`);
+    source.onopen = function() {
+      setReceiveStatus('Odbiór na żywo');
+    };
     
-    // Update index
-    sequence.currentIndex++;
-    localStorage.setItem('activeCommandSequence', JSON.stringify(sequence));
+    source.addEventListener('frame', function(event) {
+      appendReceivedFrame(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('dropped', function(event) {
+      const data = JSON.parse(event.data);
+      appendReceiveNotice(`Pominięto ${data.count} ramek (zbyt wolny odbiór)`);
+    });
+    
+    source.addEventListener('closed', function() {
+      source.close();
+      setReceiveStatus('Sesja urządzenia została zamknięta');
+    });
     
-    // Send command
-    sendCommand(currentCommand.data, currentCommand.delay, sequence.deviceAddress);
+    source.onerror = function() {
+      if (source.readyState === EventSource.CLOSED) {
+        setReceiveStatus('Strumień niedostępny');
+      } else {
+        setReceiveStatus('Ponowne łączenie ze strumieniem...');
+      }
+    };
   }
   
   /**
-   * Sends a command and sets timer for next command
-   * Wysyła komendę i ustawia timer na następną
-   * @param {string} data - Command data
-   * @param {number} delay - Delay before next command
-   * @param {string} address - Device MAC address
+   * Closes the live receive stream
+   * Zamyka strumień odbieranych danych
+   * @param {string} message - Optional status to show
    */
-  function sendCommand(data, delay, address) {
-    console.log(`Wysyłanie komendy: ${data} z opóźnieniem ${delay}ms`);
-    
-    // Prepare form
-    const form = document.createElement('form');
-    form.method = 'POST';
-    form.action = '/send';
-    form.id = 'command-form';
-    
-    const dataInput = document.createElement('input');
-    dataInput.type = 'hidden';
-    dataInput.name = 'data';
-    dataInput.value = data;
-    
-    const delayInput = document.createElement('input');
-    delayInput.type = 'hidden';
-    delayInput.name = 'continue_sequence';
-    delayInput.value = 'true';
-    
-    form.appendChild(dataInput);
-    form.appendChild(delayInput);
-    document.body.appendChild(form);
-    
-    // Add flag for sequence continuation
-    localStorage.setItem('commandWithTimer', 'true');
-    localStorage.setItem('commandDelay', delay.toString());
-    localStorage.setItem('commandDeviceAddress', address);
-    
-    // Short delay for logs to update
-    setTimeout(() => {
-      form.submit();
-    }, 100);
+  function stopReceiveStream(message = '') {
+    if (receiveStream) {
+      receiveStream.close();
+      receiveStream = null;
+    }
+    if (message) {
+      setReceiveStatus(message);
+      if (deviceRxContent) {
+        deviceRxContent.innerHTML = '<div class="no-logs-message">Brak odebranych danych.</div>';
+      }
+    }
+  }
+  
+  function setReceiveStatus(message) {
+    if (deviceRxStatus) {
+      deviceRxStatus.textContent = message;
+    }
   }
   
   /**
-   * Checks and continues command sequence if active
-   * Sprawdza i kontynuuje sekwencję komend jeśli jest aktywna
+   * Adds a received frame at the top of the list
+   * Dodaje odebraną ramkę na początku listy (najnowsze na górze)
+   * @param {Object} frame - {seq, timestamp, size, hex, ascii}
    */
-  function checkAndContinueCommandSequence() {
-    const commandWithTimer = localStorage.getItem('commandWithTimer');
-    if (commandWithTimer) {
-      console.log('Kontynuowanie sekwencji komend');
-      
-      // Get delay
-      const delay = parseInt(localStorage.getItem('commandDelay') || '0');
-      
-      // Remove flags
-      localStorage.removeItem('commandWithTimer');
-      localStorage.removeItem('commandDelay');
-      
-      // Set timer for next command
-      setTimeout(() => {
-        executeNextCommand();
-      }, delay);
+  function appendReceivedFrame(frame) {
+    const time = new Date(frame.timestamp * 1000).toLocaleTimeString();
+    let text = `[${time}] #${frame.seq} (${frame.size} B) 0x${frame.hex}`;
+    if (frame.ascii) {
+      text += `  ${frame.ascii}`;
     }
+    appendReceiveEntry(text, 'log-entry');
   }
-
+  
+  function appendReceiveNotice(message) {
+    appendReceiveEntry(message, 'log-entry rx-notice');
+  }
+  
+  function appendReceiveEntry(text, className) {
+    if (!deviceRxContent) return;
+    
+    const placeholder = deviceRxContent.querySelector('.no-logs-message');
+    if (placeholder) {
+      placeholder.remove();
+    }
+    
+    const entry = document.createElement('div');
+    entry.className = className;
+    entry.textContent = text;
+    deviceRxContent.insertBefore(entry, deviceRxContent.firstChild);
+    
+    while (deviceRxContent.childElementCount > MAX_RX_ENTRIES) {
+      deviceRxContent.removeChild(deviceRxContent.lastChild);
+    }
+  }
+  
   // ========================================
   // LOGGING - System logowania
   // ========================================
@@ -114,57 +114,95 @@ document.addEventListener('DOMContentLoaded', function() {
       method: 'POST',
       headers: {
         'Content-Type': 'application/x-www-form-urlencoded',
+        'Accept': 'application/json'
       },
       body: 'show_results=true'
     })
-    .then(response => {
-      console.log('Skanowanie zakończone pomyślnie');
-      
-      setTimeout(() => {
-        fetchScanResults();
-        
-        // Reset minecraft button
-        if (minecraftBtn) {
-          updateScanButtonText();
-          minecraftBtn.disabled = false;
-          minecraftBtn.style.opacity = "1";
-        }
-        
-        // Reset header scan button
-        if (headerScanBtn) {
-          const originalContent = headerScanBtn.dataset.originalContent || '<i class="fas fa-search"></i><span>Scan</span>';
-          headerScanBtn.innerHTML = originalContent;
-          headerScanBtn.disabled = false;
-          headerScanBtn.style.opacity = "1";
-          headerScanBtn.classList.remove('scanning');
-          delete headerScanBtn.dataset.originalContent;
-        }
-      }, 2000);
+    .then(response => response.json())
+    .then(data => {
+      if (data.status !== 'success') {
+        throw new Error(data.message || 'Nie udało się rozpocząć skanowania');
+      }
+      console.log('Rozpoczęto zadanie skanowania:', data.job_id);
+      followScanJob(data.events_url);
     })
     .catch(error => {
       console.error('Błąd podczas skanowania:', error);
       addToMainLog(`[BŁĄD] Błąd podczas skanowania: ${error}`);
       showToast('Błąd podczas skanowania urządzeń', 'error', 5000);
-      
-      // Reset minecraft button
-      if (minecraftBtn) {
-        updateScanButtonText();
-        minecraftBtn.disabled = false;
-        minecraftBtn.style.opacity = "1";
-      }
-      
-      // Reset header scan button
-      if (headerScanBtn) {
-        const originalContent = headerScanBtn.dataset.originalContent || '<i class="fas fa-search"></i><span>Scan</span>';
-        headerScanBtn.innerHTML = originalContent;
-        headerScanBtn.disabled = false;
-        headerScanBtn.style.opacity = "1";
-        headerScanBtn.classList.remove('scanning');
-        delete headerScanBtn.dataset.originalContent;
+      resetScanButtons();
+    });
+  }
+  
+  /**
+   * Follow a background scan job over Server-Sent Events
+   * Urządzenia są wyświetlane na bieżąco, w miarę ich wykrywania
+   * @param {string} eventsUrl - URL of the job event stream
+   */
+  function followScanJob(eventsUrl) {
+    const foundDevices = new Map();
+    const source = new EventSource(eventsUrl);
+    
+    source.addEventListener('device', function(e) {
+      const data = JSON.parse(e.data);
+      // Po ponownym połączeniu strumień odtwarza zdarzenia od początku
+      foundDevices.set(data.device.address, data.device);
+      displayScanResults(Array.from(foundDevices.values()));
+    });
+    
+    source.addEventListener('finished', function() {
+      source.close();
+      console.log('Skanowanie zakończone pomyślnie');
+      fetchScanResults();
+      resetScanButtons();
+    });
+    
+    source.addEventListener('error', function(e) {
+      // Zdarzenie "error" z serwera zawiera dane, błąd połączenia - nie
+      if (e.data) {
+        const data = JSON.parse(e.data);
+        source.close();
+        addToMainLog(`[BŁĄD] Błąd podczas skanowania: ${data.error}`);
+        showToast(`Błąd podczas skanowania: ${data.error}`, 'error', 5000);
+        resetScanButtons();
+      } else if (source.readyState === EventSource.CLOSED) {
+        showToast('Utracono połączenie ze strumieniem skanowania', 'error', 5000);
+        resetScanButtons();
       }
     });
   }
   
+  /**
+   * Restore scan buttons after the scan has ended
+   */
+  function resetScanButtons() {
+    const minecraftBtn = document.querySelector('.minecraft-play-button');
+    const headerScanBtn = document.getElementById('header-scan-btn');
+    
+    // Reset minecraft button
+    if (minecraftBtn) {
+      updateScanButtonText();
+      minecraftBtn.disabled = false;
+      minecraftBtn.style.opacity = "1";
+    }
+    
+    // Reset header scan button
+    if (headerScanBtn) {
+      const originalContent = headerScanBtn.dataset.originalContent || '<i class="fas fa-search"></i><span>Scan</span>';
+      headerScanBtn.innerHTML = originalContent;
+      headerScanBtn.disabled = false;
+      headerScanBtn.style.opacity = "1";
+      headerScanBtn.classList.remove('scanning');
+      delete headerScanBtn.dataset.originalContent;
+    }
+    
+    // Ukryj wskaźnik skanowania z bluetooth.js
+    const scanningIndicator = document.getElementById('scanning-indicator');
+    if (scanningIndicator) {
+      scanningIndicator.style.display = 'none';
+    }
+  }
+  
   /**
    * Fetch scan results from server
    */
@@ -196,6 +234,20 @@ document.addEventListener('DOMContentLoaded', function() {
       });
   }
   
+  /**
+   * Re-render scan results from the status channel snapshot (no request to the server)
+   */
+  function redisplayScanResults() {
+    if (!scanResultsVisible) return;
+    
+    const snapshot = window.bluetoothStatus.snapshot;
+    if (snapshot) {
+      displayScanResults(snapshot.discovered);
+    } else {
+      fetchScanResults();
+    }
+  }
+  
   /**
    * Display scan results in the UI
    * @param {Array} devices - Array of discovered devices
@@ -385,86 +437,14 @@ document.addEventListener('DOMContentLoaded', function() {
       connectButton.disabled = true;
     }
     
-    fetch('/connect', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/x-www-form-urlencoded',
-      },
-      body: `address=${encodeURIComponent(address)}`
-    })
-    .then(response => {
-      if (response.ok) {
-        return response.text();
-      } else {
-        throw new Error(`Server error: ${response.status}`);
-      }
-    })
-    .then(data => {
-      setTimeout(() => {
-        checkConnectionResult(address, connectButton);
-      }, 2000);
-    })
-    .catch(error => {
-      console.error('Błąd podczas łączenia:', error);
-      addToMainLog(`[BŁĄD] Błąd podczas łączenia z ${address}: ${error.message}`);
-      showToast(`Nie udało się połączyć z urządzeniem ${address}`, 'error', 5000);
-      
-      if (connectButton) {
-        connectButton.textContent = 'Połącz';
-        connectButton.disabled = false;
-      }
-    });
-  }
-  
-  /**
-   * Check connection result
-   * @param {string} address - Device MAC address
-   * @param {HTMLElement} connectButton - Connect button element
-   */
-  function checkConnectionResult(address, connectButton) {
-    fetch('/connection_status')
-      .then(response => response.json())
-      .then(data => {
-        const isConnected = data.connected;
-        const connectedAddress = data.address || '';
-        
-        if (isConnected && connectedAddress === address) {
-          addToMainLog(`[SUKCES] Pomyślnie połączono z urządzeniem ${address}`);
-          showToast(`Pomyślnie połączono z urządzeniem ${address}`, 'success', 5000);
-          
-          window.dispatchEvent(new CustomEvent('deviceConnectionChanged', {
-            detail: {
-              address: address,
-              connected: true
-            }
-          }));
-          
-          if (connectButton) {
-            connectButton.textContent = 'Połączono';
-            connectButton.disabled = true;
-            connectButton.style.backgroundColor = '#2ecc71';
-          }
-          
-          setTimeout(() => {
-            if (scanResultsVisible) {
-              fetchScanResults();
-            }
-          }, 1000);
-          
-        } else {
-          addToMainLog(`[BŁĄD] Nie udało się połączyć z urządzeniem ${address}`);
-          showToast(`Nie udało się połączyć z urządzeniem ${address}`, 'error', 5000);
-          
-          if (connectButton) {
-            connectButton.textContent = 'Połącz';
-            connectButton.disabled = false;
-          }
-        }
+    window.connectToDeviceAsync(address)
+      .then(operation => {
+        handleConnectionResult(address, connectButton, operation);
       })
       .catch(error => {
-        console.error('Błąd podczas sprawdzania statusu połączenia:', error);
-        addToMainLog(`[BŁĄD] Błąd podczas sprawdzania statusu połączenia`);
-        showToast(`Błąd podczas sprawdzania połączenia z ${address}`, 'error', 5000);
+        console.error('Błąd podczas łączenia:', error);
+        addToMainLog(`[BŁĄD] Błąd podczas łączenia z ${address}: ${error.message}`);
+        showToast(`Nie udało się połączyć z urządzeniem ${address}`, 'error', 5000);
         
         if (connectButton) {
           connectButton.textContent = 'Połącz';
@@ -473,6 +453,44 @@ document.addEventListener('DOMContentLoaded', function() {
       });
   }
   
+  /**
+   * Handle the result of a connect operation
+   * @param {string} address - Device MAC address
+   * @param {HTMLElement} connectButton - Connect button element
+   * @param {Object} operation - Final operation state from the server
+   */
+  function handleConnectionResult(address, connectButton, operation) {
+    if (operation && operation.status === 'connected') {
+      addToMainLog(`[SUKCES] Pomyślnie połączono z urządzeniem ${address}`);
+      showToast(`Pomyślnie połączono z urządzeniem ${address}`, 'success', 5000);
+      
+      window.dispatchEvent(new CustomEvent('deviceConnectionChanged', {
+        detail: {
+          address: address,
+          connected: true
+        }
+      }));
+      
+      if (connectButton) {
+        connectButton.textContent = 'Połączono';
+        connectButton.disabled = true;
+        connectButton.style.backgroundColor = '#2ecc71';
+      }
+      
+      redisplayScanResults();
+      
+    } else {
+      const reason = operation && operation.error ? `: ${operation.error}` : '';
+      addToMainLog(`[BŁĄD] Nie udało się połączyć z urządzeniem ${address}${reason}`);
+      showToast(`Nie udało się połączyć z urządzeniem ${address}`, 'error', 5000);
+      
+      if (connectButton) {
+        connectButton.textContent = 'Połącz';
+        connectButton.disabled = false;
+      }
+    }
+  }
+  
   /**
    * Add device to the paired devices list
    * @param {Object} device - Device data
@@ -502,11 +520,7 @@ document.addEventListener('DOMContentLoaded', function() {
     addToMainLog(`[DODANO] Urządzenie ${deviceName} dodane do listy`);
     showToast(`Urządzenie "${deviceName}" zostało dodane do listy sparowanych`, 'success', 5000);
     
-    setTimeout(() => {
-      if (scanResultsVisible) {
-        fetchScanResults();
-      }
-    }, 500);
+    redisplayScanResults();
   }
   
   /**
@@ -673,11 +687,7 @@ document.addEventListener('DOMContentLoaded', function() {
         manualDeviceModal.style.display = 'none';
         addManualDeviceForm.reset();
         
-        setTimeout(() => {
-          if (scanResultsVisible) {
-            fetchScanResults();
-          }
-        }, 500);
+        redisplayScanResults();
       });
     }
     
@@ -820,11 +830,7 @@ document.addEventListener('DOMContentLoaded', function() {
   window.addEventListener('deviceListUpdated', function(e) {
     console.log('Lista urządzeń została zaktualizowana:', e.detail);
     
-    if (scanResultsVisible) {
-      setTimeout(() => {
-        fetchScanResults();
-      }, 200);
-    }
+    redisplayScanResults();
   });
   
   // ========================================
@@ -34,6 +34,7 @@ document.addEventListener('DOMContentLoaded', function() {
     let discoveredDevices = [];
     let connectedDevice = null;
     let isConnected = false;
+    let statusSubscribed = false; // Czy zasubskrybowano kanał statusu
     
     // Initialize
     loadPairedDevices();
@@ -293,129 +294,145 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     /**
-     * Ładuje urządzenia z API i localStorage - POPRAWIONA WERSJA
+     * Ładuje urządzenia z localStorage i subskrybuje kanał statusu serwera.
+     * Sparowane urządzenia i stan połączenia przychodzą z kanału (migawka,
+     * a potem tylko zmiany) - bez odpytywania /get_paired_devices i /connection_status
      */
-    async function loadPairedDevices() {
-        try {
-            // Pobierz ulubione urządzenia z localStorage
-            pairedDevices = JSON.parse(localStorage.getItem('favoriteDevices') || '[]');
-            
-            // Pobierz discovered devices z localStorage
-            discoveredDevices = JSON.parse(localStorage.getItem('discoveredDevices') || '[]');
-            
-            addToLog(`Loaded from localStorage: ${pairedDevices.length} favorite devices and ${discoveredDevices.length} discovered devices`, 'INFO');
-            
-            // Pobierz urządzenia z API
-            const response = await fetch('/get_paired_devices');
-            if (response.ok) {
-                const result = await response.json();
-                if (result.status === 'success') {
-                    // Sprawdź które urządzenia z API nie są jeszcze w naszych listach
-                    const apiDevices = result.devices;
-                    
-                    apiDevices.forEach(apiDevice => {
-                        const deviceData = {
-                            ...apiDevice,
-                            id: apiDevice.address,
-                            type: getDeviceTypeFromName(apiDevice.name),
-                            connected: false,
-                            favorite: false
-                        };
-                        
-                        // Sprawdź czy urządzenie nie istnieje już w favorites lub discovered
-                        const existsInFavorites = pairedDevices.find(d => d.address === apiDevice.address);
-                        const existsInDiscovered = discoveredDevices.find(d => d.address === apiDevice.address);
-                        
-                        if (!existsInFavorites && !existsInDiscovered) {
-                            // Dodaj do discovered devices
-                            discoveredDevices.push(deviceData);
-                            addToLog(`Added new API device to discovered: ${apiDevice.name}`, 'INFO');
-                        }
-                    });
-                    
-                    // Zapisz zaktualizowane discovered devices
-                    localStorage.setItem('discoveredDevices', JSON.stringify(discoveredDevices));
-                    
-                    addToLog(`Total after API sync: ${discoveredDevices.length} discovered devices and ${pairedDevices.length} favorite devices`, 'SUCCESS');
-                }
-            }
-        } catch (error) {
-            addToLog(`Failed to load devices: ${error.message}`, 'ERROR');
-            // Fallback do localStorage
-            pairedDevices = JSON.parse(localStorage.getItem('favoriteDevices') || '[]');
-            discoveredDevices = JSON.parse(localStorage.getItem('discoveredDevices') || '[]');
-        }
+    function loadPairedDevices() {
+        // Pobierz ulubione urządzenia z localStorage
+        pairedDevices = JSON.parse(localStorage.getItem('favoriteDevices') || '[]');
+        
+        // Pobierz discovered devices z localStorage
+        discoveredDevices = JSON.parse(localStorage.getItem('discoveredDevices') || '[]');
         
-        // Sprawdź status połączenia
-        await checkConnectionStatus();
+        addToLog(`Loaded from localStorage: ${pairedDevices.length} favorite devices and ${discoveredDevices.length} discovered devices`, 'INFO');
+        
+        // Migawka z kanału (jeśli już znana) od razu uzupełni listy i stan połączenia
+        checkConnectionStatus();
         
         // Wyświetl urządzenia
         displayPairedDevices();
         displayDiscoveredDevices();
+        
+        if (!statusSubscribed) {
+            statusSubscribed = true;
+            window.bluetoothStatus.subscribe(handleStatusEvent);
+        }
     }
     
     /**
-     * Sprawdza status połączenia - POPRAWIONA WERSJA
+     * Obsługuje zdarzenia kanału statusu
+     * @param {string} type - snapshot, connection, paired lub discovered
+     * @param {Object} data - Dane zdarzenia
      */
-    async function checkConnectionStatus() {
-        try {
-            const response = await fetch('/connection_status');
-            if (response.ok) {
-                const result = await response.json();
-                isConnected = result.connected;
-                
-                if (result.connected && result.address) {
-                    // Znajdź połączone urządzenie w pairedDevices
-                    const pairedDevice = pairedDevices.find(d => d.address === result.address);
-                    
-                    // Znajdź połączone urządzenie w discoveredDevices
-                    const discoveredDevice = discoveredDevices.find(d => d.address === result.address);
-                    
-                    if (pairedDevice) {
-                        connectedDevice = { ...pairedDevice, connected: true };
-                        pairedDevice.connected = true;
-                    } else if (discoveredDevice) {
-                        connectedDevice = { ...discoveredDevice, connected: true };
-                        discoveredDevice.connected = true;
-                    } else {
-                        connectedDevice = {
-                            name: 'Connected Device',
-                            address: result.address,
-                            type: 'other',
-                            connected: true,
-                            battery: getBatteryLevel(),
-                            signal: getSignalStrength(),
-                            security: 'AES-256'
-                        };
-                    }
-                    
-                    // Zaktualizuj status połączenia we wszystkich listach
-                    pairedDevices.forEach(device => {
-                        device.connected = device.address === result.address;
-                    });
-                    
-                    discoveredDevices.forEach(device => {
-                        device.connected = device.address === result.address;
-                    });
-                    
-                } else {
-                    connectedDevice = null;
-                    // Oznacz wszystkie urządzenia jako niepołączone
-                    pairedDevices.forEach(device => {
-                        device.connected = false;
-                    });
-                    discoveredDevices.forEach(device => {
-                        device.connected = false;
-                    });
-                }
-                
-                updateConnectionDisplay();
+    function handleStatusEvent(type, data) {
+        if (type === 'snapshot') {
+            mergeApiDevices(data.paired);
+            applyConnectionStatus(data.connected);
+        } else if (type === 'paired') {
+            mergeApiDevices(data.devices);
+        } else if (type === 'connection') {
+            applyConnectionStatus(data.addresses);
+            addToLog(`Device ${data.address} ${data.connected ? 'connected' : 'disconnected'}`, 'INFO');
+        } else {
+            return;
+        }
+        
+        displayPairedDevices();
+        displayDiscoveredDevices();
+    }
+    
+    /**
+     * Dodaje do znalezionych urządzenia sparowane w systemie, których nie ma jeszcze na listach
+     * @param {Array} apiDevices - Sparowane urządzenia z serwera
+     */
+    function mergeApiDevices(apiDevices) {
+        let added = 0;
+        
+        apiDevices.forEach(apiDevice => {
+            const deviceData = {
+                ...apiDevice,
+                id: apiDevice.address,
+                type: getDeviceTypeFromName(apiDevice.name),
+                connected: false,
+                favorite: false
+            };
+            
+            // Sprawdź czy urządzenie nie istnieje już w favorites lub discovered
+            const existsInFavorites = pairedDevices.find(d => d.address === apiDevice.address);
+            const existsInDiscovered = discoveredDevices.find(d => d.address === apiDevice.address);
+            
+            if (!existsInFavorites && !existsInDiscovered) {
+                // Dodaj do discovered devices
+                discoveredDevices.push(deviceData);
+                added++;
+                addToLog(`Added new API device to discovered: ${apiDevice.name}`, 'INFO');
             }
-        } catch (error) {
-            addToLog(`Failed to check connection status: ${error.message}`, 'ERROR');
+        });
+        
+        if (added > 0) {
+            // Zapisz zaktualizowane discovered devices
+            localStorage.setItem('discoveredDevices', JSON.stringify(discoveredDevices));
+            addToLog(`Total after API sync: ${discoveredDevices.length} discovered devices and ${pairedDevices.length} favorite devices`, 'SUCCESS');
+        }
+    }
+    
+    /**
+     * Ustawia stan połączenia z ostatniej migawki kanału statusu (bez zapytania do serwera)
+     */
+    function checkConnectionStatus() {
+        const snapshot = window.bluetoothStatus.snapshot;
+        if (snapshot) {
+            applyConnectionStatus(snapshot.connected);
         }
     }
     
+    /**
+     * Oznacza połączone urządzenia na listach - POPRAWIONA WERSJA
+     * @param {Array} addresses - Adresy połączonych urządzeń
+     */
+    function applyConnectionStatus(addresses) {
+        // Sidebar pokazuje jedno połączone urządzenie - pierwsze z listy
+        const address = addresses.length > 0 ? addresses[0] : null;
+        isConnected = address !== null;
+        
+        if (address) {
+            // Znajdź połączone urządzenie w pairedDevices
+            const pairedDevice = pairedDevices.find(d => d.address === address);
+            
+            // Znajdź połączone urządzenie w discoveredDevices
+            const discoveredDevice = discoveredDevices.find(d => d.address === address);
+            
+            if (pairedDevice) {
+                connectedDevice = { ...pairedDevice, connected: true };
+            } else if (discoveredDevice) {
+                connectedDevice = { ...discoveredDevice, connected: true };
+            } else {
+                connectedDevice = {
+                    name: 'Connected Device',
+                    address: address,
+                    type: 'other',
+                    connected: true,
+                    battery: getBatteryLevel(),
+                    signal: getSignalStrength(),
+                    security: 'AES-256'
+                };
+            }
+        } else {
+            connectedDevice = null;
+        }
+        
+        // Zaktualizuj status połączenia we wszystkich listach
+        pairedDevices.forEach(device => {
+            device.connected = addresses.includes(device.address);
+        });
+        discoveredDevices.forEach(device => {
+            device.connected = addresses.includes(device.address);
+        });
+        
+        updateConnectionDisplay();
+    }
+    
     /**
      * Wyświetla ulubione urządzenia - ZMODYFIKOWANA WERSJA
      * Teraz pokazuje wszystkie urządzenia, nawet połączone
@@ -645,35 +662,25 @@ document.addEventListener('DOMContentLoaded', function() {
                 connectButton.style.transform = "translateY(-1px)";
             }
             
-            const formData = new FormData();
-            formData.append('address', address);
+            addToLog(`Connection request sent for ${address}`, 'INFO');
+            showToast(`Connecting to device ${address}...`, 'info');
             
-            const response = await fetch('/connect', {
-                method: 'POST',
-                body: formData
-            });
+            // Operacja łączenia trwa w tle - czekamy na jej wynik ze strumienia zdarzeń
+            // Listy odświeży zdarzenie connection z kanału statusu
+            const operation = await window.connectToDeviceAsync(address);
             
-            if (response.ok) {
-                // Opóźnienie dla efektu ładowania
-                setTimeout(async () => {
-                    await checkConnectionStatus();
-                    displayPairedDevices();
-                    displayDiscoveredDevices();
-                    
-                    // Przywróć przycisk po zakończeniu
-                    if (connectButton) {
-                        connectButton.innerHTML = originalButtonContent;
-                        connectButton.disabled = false;
-                        connectButton.style.opacity = "1";
-                        connectButton.style.transform = "translateY(0)";
-                    }
-                }, 2000);
-                
-                addToLog(`Connection request sent for ${address}`, 'INFO');
-                showToast(`Connecting to device ${address}...`, 'info');
-            } else {
-                throw new Error('Connection failed');
+            // Przywróć przycisk po zakończeniu
+            if (connectButton) {
+                connectButton.innerHTML = originalButtonContent;
+                connectButton.disabled = false;
+                connectButton.style.opacity = "1";
+                connectButton.style.transform = "translateY(0)";
+            }
+            
+            if (operation.status !== 'connected') {
+                throw new Error(operation.error || 'Connection failed');
             }
+            addToLog(`Connected to ${address}`, 'SUCCESS');
         } catch (error) {
             addToLog(`Failed to connect to ${address}: ${error.message}`, 'ERROR');
             showToast(`Failed to connect to device`, 'error');
@@ -706,37 +713,34 @@ document.addEventListener('DOMContentLoaded', function() {
         try {
             addToLog('Disconnecting device...', 'DISCONNECT');
             
-            const response = await fetch('/disconnect', {
-                method: 'POST'
+            // Bez adresu serwer rozłącza wszystkie urządzenia
+            await window.bluetoothAction('disconnect', {
+                address: connectedDevice && connectedDevice.address ? connectedDevice.address : null
             });
             
-            if (response.ok) {
-                isConnected = false;
-                connectedDevice = null;
-                
-                // Oznacz wszystkie urządzenia jako niepołączone
-                pairedDevices.forEach(device => {
-                    device.connected = false;
-                });
-                
-                discoveredDevices.forEach(device => {
-                    device.connected = false;
-                });
-                
-                // Zapisz stan do localStorage
-                localStorage.setItem('favoriteDevices', JSON.stringify(pairedDevices));
-                localStorage.setItem('discoveredDevices', JSON.stringify(discoveredDevices));
-                
-                updateConnectionDisplay();
-                displayPairedDevices();
-                displayDiscoveredDevices();
-                
-                addToLog('Device disconnected', 'SUCCESS');
-                if (typeof window.showToast === 'function') {
-                    window.showToast('Urządzenie rozłączone', 'info');
-                }
-            } else {
-                throw new Error('Disconnection failed');
+            isConnected = false;
+            connectedDevice = null;
+            
+            // Oznacz wszystkie urządzenia jako niepołączone
+            pairedDevices.forEach(device => {
+                device.connected = false;
+            });
+            
+            discoveredDevices.forEach(device => {
+                device.connected = false;
+            });
+            
+            // Zapisz stan do localStorage
+            localStorage.setItem('favoriteDevices', JSON.stringify(pairedDevices));
+            localStorage.setItem('discoveredDevices', JSON.stringify(discoveredDevices));
+            
+            updateConnectionDisplay();
+            displayPairedDevices();
+            displayDiscoveredDevices();
+            
+            addToLog('Device disconnected', 'SUCCESS');
+            if (typeof window.showToast === 'function') {
+                window.showToast('Urządzenie rozłączone', 'info');
             }
         } catch (error) {
             addToLog(`Failed to disconnect: ${error.message}`, 'ERROR');
@@ -1092,9 +1096,6 @@ document.addEventListener('DOMContentLoaded', function() {
         return stats;
     }
     
-    // Sprawdzaj status połączenia co 5 sekund - WYŁĄCZONE TYMCZASOWO
-    // setInterval(checkConnectionStatus, 5000);
-    
     // Nasłuchuj na zdarzenia połączenia z urządzeniem
     window.addEventListener('deviceConnected', function(e) {
         if (e.detail && e.detail.device) {